@@ -7,18 +7,26 @@ from datetime import datetime, timezone, timedelta
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
 from app.logger import logger
-from app.betfair.auth import BetfairAuthManager
+from app.betfair.auth import BetfairAuthManager, session_manager
 from app.config import config
-from app.betfair.utils import execute_betting_workflow, fetch_market_data,get_all_market_data
-from typing import List
-from app.betfair.stream import BetfairStream
+from app.betfair.utils import cancel_instruction, execute_betting_workflow, get_all_market_data
+from app.betfair.client import betfair_client
+from typing import List, Optional
+from app.betfair.async_stream import AsyncBetfairStream
+from app.betfair.metrics import metrics_registry
+from app.betfair.events import event_bus
+from app.betfair.ttl_cache import navigation_cache
+from app.betfair.rate_limiter import request_scheduler
+from app.betfair.retry import retry_policy
+from app.betfair.orders import outstanding_orders
+from app.betfair.discovery import market_discovery
+from app.betfair.stream_manager import StreamManager
+from app.betting_wager.scanner import scan_markets
+from app.betting_wager.evaluation_scheduler import evaluation_scheduler
 
 SECRET_KEY = config.SECRET_KEY
 
 auth_router = APIRouter()
-# Use FastAPI's state management
-app = FastAPI()
-app.state.betfair_stream = None
 
 
 # Signup
@@ -221,7 +229,7 @@ async def logout():
 @auth_router.get("/protected-route")
 async def protected_route():
     try:
-        token = BetfairAuthManager.get_token()
+        token = await session_manager.get_token()
         return {
             "message": "Accessed protected route successfully.",
             "session_token": token,
@@ -239,12 +247,15 @@ async def place_bet_endpoint(market_id: str, selection_id: int, side: str, size:
     try:
         logger.info(f"Received request to place bet on market ID: {market_id}")
 
-        # Example values for time_to_start and matched_amount
-        time_to_start = 179  # Replace with actual logic to calculate time to start
-        matched_amount = 7968  # Replace with actual logic to fetch matched amount
+        # Start time and matched volume come from the watchlist (or the catalogue)
+        market = await market_discovery.lookup(market_id)
+        if market is None or market.start_time is None:
+            raise HTTPException(status_code=404, detail=f"Market {market_id} not found in the catalogue")
+        time_to_start = market.time_to_start
+        matched_amount = market.total_matched
 
         # Execute the betting workflow
-        response = execute_betting_workflow(market_id, time_to_start, matched_amount)
+        response = await execute_betting_workflow(market_id, time_to_start, matched_amount)
 
         # Return the response
         return {"message": "Bet placed successfully", "response": response}
@@ -268,7 +279,7 @@ async def fetch_market_data_endpoint(market_id: str):
             logger.info(f"Received request to fetch market data for market ID: {market_id}")
 
             # Fetch market data
-            market_data = fetch_market_data(market_id)
+            market_data = (await get_all_market_data([market_id]))[market_id]
 
             # Return the response
             return {"message": "Market data fetched successfully", "market_data": market_data}
@@ -285,13 +296,16 @@ async def fetch_market_data_endpoint(market_id: str):
 #-----------------------------------------------------
 
 @auth_router.post("/get-all-market-data/")
-async def get_all_market_data_endpoint():
-    """Endpoint to fetch market data for all markets."""
+async def get_all_market_data_endpoint(market_ids: Optional[List[str]] = None):
+    """
+    Endpoint to fetch market data for many markets in batched requests.
+    Without market IDs, every market currently tracked by the stream is fetched.
+    """
     try:
         logger.info("Received request to fetch market data for all markets")
 
         # Fetch market data
-        market_data = get_all_market_data()
+        market_data = await get_all_market_data(market_ids)
 
         # Return the response
         return {"message": "Market data fetched successfully", "market_data": market_data}
@@ -301,6 +315,26 @@ async def get_all_market_data_endpoint():
         raise e
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+@auth_router.post("/scan-markets/")
+async def scan_markets_endpoint(market_ids: Optional[List[str]] = None, limit: Optional[int] = 50):
+    """
+    Endpoint to shortlist markets for the strategies with one vectorized pass
+    over top-of-book prices. Without market IDs, every market currently
+    tracked by the stream (or on the discovery watchlist) is scanned.
+    """
+    try:
+        logger.info("Received request to scan markets")
+        candidates = await scan_markets(market_ids, limit=limit)
+        return {"message": "Markets scanned successfully", "candidates": candidates}
+
+    except HTTPException as e:
+        logger.error(f"HTTPException: {e.detail}")
+        raise e
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 #-----------------------------------------------------
  # Fetch market specific data endpoint
@@ -316,7 +350,7 @@ async def fetch_market_specific_data_endpoint():
         logger.info(f"Received request to fetch market specific data for market ID: {market_id}")    
 
         # Fetch market specific data
-        market_data = fetch_market_data(market_id)  
+        market_data = await betfair_client.get_market_data(market_id)
 
         # Return the response
         return {"message": "Market specific data fetched successfully", "market_data": market_data}
@@ -334,15 +368,21 @@ async def fetch_market_specific_data_endpoint():
 
 
 @auth_router.post("/stream/start")
-async def start_stream(market_ids: List[str]):
+async def start_stream(request: Request, market_ids: List[str]):
     """Start streaming market data for specified markets."""
     try:
-        if app.betfair_stream and app.betfair_stream.running:
+        stream = getattr(request.app.state, "betfair_stream", None)
+        if stream and stream.running:
             return {"message": "Stream is already running"}
 
-        app.betfair_stream = BetfairStream()
-        app.betfair_stream.start()
-        app.betfair_stream.subscribe_to_markets(market_ids)
+        # Runs as a task on the server's event loop
+        stream = AsyncBetfairStream()
+        event_bus.attach(stream)
+        evaluation_scheduler.attach_stream(stream)  # Conflated per-market re-evaluation on updates
+        await stream.start()
+        stream.subscribe_to_markets(market_ids)
+        stream.subscribe_to_orders()
+        request.app.state.betfair_stream = stream
         
         return {"message": "Stream started successfully"}
     except Exception as e:
@@ -350,16 +390,169 @@ async def start_stream(market_ids: List[str]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @auth_router.post("/stream/stop")
-async def stop_stream():
+async def stop_stream(request: Request):
     """Stop the market data stream."""
     try:
-        if app.betfair_stream:
-            app.betfair_stream.stop()
-            app.betfair_stream = None
+        stream = getattr(request.app.state, "betfair_stream", None)
+        if stream:
+            await stream.stop()
+            request.app.state.betfair_stream = None
             return {"message": "Stream stopped successfully"}
         return {"message": "No active stream to stop"}
     except Exception as e:
         logger.error(f"Error stopping stream: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@auth_router.get("/stream/metrics")
+async def stream_metrics():
+    """Latency, parse/handler time, heartbeat gaps and queue depths per stream connection."""
+    return {"streams": metrics_registry.snapshot(), "event_bus": event_bus.stats()}
+
+#-----------------------------------------------------
+# Navigation cache routes
+#-----------------------------------------------------
+
+@auth_router.get("/navigation-cache/stats")
+async def navigation_cache_stats():
+    """Hit/miss counters of the event type, event and catalogue cache."""
+    return navigation_cache.stats()
+
+@auth_router.post("/navigation-cache/invalidate")
+async def invalidate_navigation_cache(method: Optional[str] = None):
+    """Drop cached navigation data, for one API method (e.g. listEvents) or all of them."""
+    removed = navigation_cache.invalidate(method)
+    return {"message": f"Removed {removed} cached entries"}
+
+#-----------------------------------------------------
+# Request scheduler routes
+#-----------------------------------------------------
+
+@auth_router.get("/request-scheduler/stats")
+async def request_scheduler_stats():
+    """Queue depths, wait times, drops and remaining tokens per Betfair request class."""
+    return request_scheduler.stats()
+
+@auth_router.get("/retry-policy/stats")
+async def retry_policy_stats():
+    """Remaining retry budget and circuit breaker state per Betfair endpoint."""
+    return retry_policy.stats()
+
+#-----------------------------------------------------
+# Order routes
+#-----------------------------------------------------
+
+@auth_router.get("/orders/outstanding")
+async def outstanding_order_placements():
+    """Order placements whose outcome is not yet known (pending reconciliation)."""
+    return {"placements": outstanding_orders.outstanding()}
+
+@auth_router.get("/orders/current")
+async def current_orders(market_id: Optional[str] = None):
+    """Unsettled orders, for one market or all of them."""
+    response = await betfair_client.list_current_orders([market_id] if market_id else None)
+    if not response or "result" not in response:
+        raise HTTPException(status_code=500, detail="Failed to fetch current orders")
+    return response["result"]
+
+@auth_router.post("/orders/cancel")
+async def cancel_market_orders(market_id: str, bet_ids: Optional[List[str]] = None):
+    """Cancel the given unmatched bets on a market in one request, or all of them if none are given."""
+    instructions = [cancel_instruction(bet_id) for bet_id in bet_ids] if bet_ids else None
+    response = await betfair_client.cancel_orders(market_id, instructions)
+    if not response or "result" not in response:
+        raise HTTPException(status_code=500, detail="Failed to cancel orders")
+    return response["result"]
+
+#-----------------------------------------------------
+# Market discovery routes
+#-----------------------------------------------------
+
+@auth_router.post("/discovery/start")
+async def start_discovery(request: Request, event_type_ids: Optional[List[str]] = None,
+                          market_type_codes: Optional[List[str]] = None, stream: bool = False,
+                          window_minutes: Optional[float] = None):
+    """
+    Start maintaining the watchlist of markets starting within the scan window
+    (or `window_minutes`). With `stream`, watched markets are subscribed on a
+    sharded stream as they enter the window and unsubscribed as they leave it.
+    """
+    try:
+        if market_discovery.running:
+            return {"message": "Market discovery is already running", "stats": market_discovery.stats()}
+        market_discovery.configure(event_type_ids, market_type_codes, window_minutes)
+        if stream and getattr(request.app.state, "stream_manager", None) is None:
+            stream_manager = StreamManager()
+            for connection in stream_manager.streams:
+                event_bus.attach(connection)
+                evaluation_scheduler.attach_stream(connection)
+            request.app.state.discovery_listener = market_discovery.attach_stream_manager(stream_manager)
+            request.app.state.stream_manager = stream_manager
+            await stream_manager.start()
+        await market_discovery.start()
+        return {"message": "Market discovery started", "stats": market_discovery.stats()}
+    except Exception as e:
+        logger.error(f"Error starting market discovery: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@auth_router.post("/discovery/stop")
+async def stop_discovery(request: Request):
+    """Stop refreshing the watchlist and close any stream it was feeding."""
+    try:
+        await market_discovery.stop()
+        stream_manager = getattr(request.app.state, "stream_manager", None)
+        if stream_manager:
+            await stream_manager.stop()
+            market_discovery.remove_listener(request.app.state.discovery_listener)
+            request.app.state.stream_manager = None
+        return {"message": "Market discovery stopped"}
+    except Exception as e:
+        logger.error(f"Error stopping market discovery: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@auth_router.get("/discovery/watchlist")
+async def discovery_watchlist():
+    """Watched markets with start time, minutes to start and matched volume, first to start first."""
+    return {"stats": market_discovery.stats(), "markets": market_discovery.watchlist()}
+
+#-----------------------------------------------------
+# Evaluation scheduler routes
+#-----------------------------------------------------
+
+@auth_router.post("/evaluation-scheduler/start")
+async def start_evaluation_scheduler():
+    """
+    Evaluate watchlist markets as they cross each strategy's time-to-start
+    window, more often as the off approaches. Markets come from market discovery.
+    """
+    try:
+        if evaluation_scheduler.running:
+            return {"message": "Evaluation scheduler is already running", "stats": evaluation_scheduler.stats()}
+        evaluation_scheduler.attach(market_discovery)
+        await evaluation_scheduler.start()
+        return {"message": "Evaluation scheduler started", "stats": evaluation_scheduler.stats()}
+    except Exception as e:
+        logger.error(f"Error starting evaluation scheduler: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@auth_router.post("/evaluation-scheduler/stop")
+async def stop_evaluation_scheduler():
+    """Stop evaluating markets and stop following the watchlist."""
+    await evaluation_scheduler.stop()
+    evaluation_scheduler.detach(market_discovery)
+    return {"message": "Evaluation scheduler stopped"}
+
+@auth_router.get("/evaluation-scheduler/stats")
+async def evaluation_scheduler_stats():
+    """Scheduled markets, wake-ups and the latest candidates per market."""
+    return {"stats": evaluation_scheduler.stats(), "candidates": list(evaluation_scheduler.candidates.values())}
+
+#-----------------------------------------------------
+# Session routes
+#-----------------------------------------------------
+
+@auth_router.get("/session/stats")
+async def session_stats():
+    """Betfair session validity, time to expiry and login/keepAlive counters."""
+    return session_manager.stats()
+
 
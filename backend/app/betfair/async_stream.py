@@ -0,0 +1,186 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import json
+import ssl
+from typing import Any, AsyncIterator, Dict, List
+from app.logger import logger
+from app.betfair.auth import session_manager
+from app.betfair.events import COALESCE, DEFAULT_QUEUE_SIZE, DROP_OLDEST, Subscription
+from app.betfair.framing import LineFramer
+from app.betfair.metrics import metrics_registry
+from app.betfair.stream import BetfairStream
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+STREAM_TIMEOUT = 15.0  # Seconds allowed for connecting and authenticating
+
+# ------------------------------------------------
+#               AsyncBetfairStream Class
+# ------------------------------------------------
+class AsyncBetfairStream(BetfairStream):
+    """
+    asyncio-native Betfair stream client.
+
+    Runs as a task on the caller's event loop instead of a receive thread.
+    Message handling (clocks, market cache) is shared with `BetfairStream`.
+    Parsed messages can be consumed with `async for message in stream`, or
+    with `stream.consume(maxsize, policy)`; each consumer has a bounded queue
+    with an event bus overflow policy, so a slow consumer only loses its own
+    messages.
+
+    Usage:
+        stream = AsyncBetfairStream()
+        await stream.start()
+        stream.subscribe_to_markets(["1.123"])
+        async for message in stream:
+            ...
+        await stream.stop()
+    """
+    def __init__(self, cache=None, subscription_id: int = 1, recorder=None, conflate_ms=None,
+                 orders=None, reconnect_delay: float = 2.0, metrics_name=None, timeout: float = STREAM_TIMEOUT):
+        super().__init__(cache, subscription_id, recorder, conflate_ms, orders, metrics_name)
+        self.reconnect_delay = reconnect_delay
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.task = None
+        self.framer = LineFramer(self.buf_size)
+        self.consumers: List[Subscription] = []
+        self.metrics.register_gauge("consumer_queue_depth", lambda: sum(consumer.queue.qsize() for consumer in self.consumers))
+        self.metrics.register_gauge("consumer_dropped", lambda: sum(consumer.dropped for consumer in self.consumers))
+        self.metrics.register_gauge("buffered_bytes", lambda: len(self.framer))
+
+    # ------------------------------------------------
+    #               Connection Handling
+    # ------------------------------------------------
+    async def connect(self):
+        """
+        Open the TLS connection and wait until the session is authenticated.
+        A server that stays silent for `timeout` seconds raises ConnectionError,
+        which `run` handles like any other dropped connection.
+        """
+        # Make sure a valid token is cached so `authenticate` never logs in on the loop
+        await session_manager.get_token()
+        try:
+            await asyncio.wait_for(self._handshake(), self.timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise ConnectionError(f"Stream handshake timed out after {self.timeout}s") from None
+
+    async def _handshake(self):
+        ssl_context = ssl.create_default_context()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=ssl_context)
+        self.framer.reset()
+        messages = self.read_messages()
+        try:
+            async for message in messages:
+                if message.get('op') != 'status':
+                    continue
+                if message.get('statusCode') == 'SUCCESS':
+                    return
+                if message.get('connectionClosed'):
+                    raise ConnectionError(f"Stream authentication failed: {message.get('errorCode')}")
+        finally:
+            await messages.aclose()
+
+    async def close(self):
+        """Close the current connection, if any; its books are stale until the stream resumes."""
+        writer, self.reader, self.writer = self.writer, None, None
+        self.authenticated = False
+        self.segments = {}
+        self.mark_markets_stale()
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception as e:
+            logger.debug(f"Error closing stream connection: {e}")
+
+    def refresh_session(self):
+        """Start replacing the rejected token and reconnect; `connect` waits for the new one."""
+        session_manager.invalidate()
+        session_manager.start_refresh()
+        raise ConnectionError("Stream session expired")
+
+    def send_message(self, message: Dict[str, Any]):
+        if self.writer is None:
+            raise ConnectionError("Stream is not connected")
+        self.writer.write((json.dumps(message) + '\r\n').encode())
+
+    # ------------------------------------------------
+    #               Message Loop
+    # ------------------------------------------------
+    async def read_messages(self) -> AsyncIterator[Dict[str, Any]]:
+        """Read, handle and yield messages from the current connection."""
+        while True:
+            # Lines left over from a previous reader are handled first
+            for line in self.framer.lines():
+                yield self.process_line(line)
+            data = await self.reader.read(self.buf_size)
+            if not data:
+                raise ConnectionError("Stream connection closed by server")
+            self.framer.feed(data)
+
+    async def run(self):
+        """Consume the stream until stopped, reconnecting after errors."""
+        while self.running:
+            try:
+                if self.writer is None:
+                    await self.connect()
+                async for message in self.read_messages():
+                    for consumer in self.consumers:
+                        consumer.offer(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error receiving message: {e}")
+            await self.close()
+            if self.running:
+                logger.info("Reconnecting...")
+                await asyncio.sleep(self.reconnect_delay)
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self.consume()
+
+    async def consume(self, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = DROP_OLDEST) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the parsed messages received after this call until the stream
+        stops. When `maxsize` messages are waiting, `policy` (DROP_OLDEST or
+        DROP_NEWEST) decides which one is lost; raw messages have no key to
+        coalesce on, so coalescing consumers subscribe to the event bus.
+        """
+        if policy == COALESCE:
+            raise ValueError("Stream messages cannot be coalesced; use an EventBus subscription")
+        consumer = Subscription(f"{self.metrics_name}-consumer", maxsize, policy)
+        self.consumers.append(consumer)
+        try:
+            async for message in consumer:
+                yield message
+        finally:
+            self.consumers.remove(consumer)
+
+    # ------------------------------------------------
+    #               Lifecycle
+    # ------------------------------------------------
+    async def start(self):
+        """Connect, authenticate and start the receive task on the running loop."""
+        self.running = True
+        metrics_registry.register(self.metrics_name, self.metrics)
+        await self.connect()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Cancel the receive task, close the connection and end all consumers."""
+        self.running = False
+        metrics_registry.unregister(self.metrics_name, self.metrics)
+        task, self.task = self.task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.close()
+        for consumer in self.consumers:
+            consumer.close()
@@ -1,7 +1,10 @@
 import time
 import os
 import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
 import requests
 from dotenv import load_dotenv
 from fastapi import HTTPException
@@ -11,12 +14,17 @@ import asyncio
 # Load .env variables
 load_dotenv()
 
+LOGIN_URL = "https://identitysso-cert.betfair.com.au/api/certlogin"
+KEEP_ALIVE_URL = "https://identitysso.betfair.com.au/api/keepAlive"
+SESSION_LIFETIME = timedelta(hours=24)  # Assumed lifetime of a fresh or kept-alive session
+KEEP_ALIVE_INTERVAL = 3600  # Seconds between background keepAlive calls
+REFRESH_MARGIN = 600  # Seconds before expiry at which callers trigger a background refresh
+
 class BetfairAuthManager:
     """Handles Betfair login and session management with automatic reconnection."""
     
     session_token = None
     token_expiration = None
-    is_running = False  # Prevent multiple background loops
     
     @classmethod
     def login(cls):
@@ -47,7 +55,7 @@ class BetfairAuthManager:
         for attempt in range(max_retries):
             try:
                 response = requests.post(
-                    "https://identitysso-cert.betfair.com.au/api/certlogin",
+                    LOGIN_URL,
                     cert=(cert_path, key_path),
                     headers={
                         "X-Application": api_key,
@@ -68,7 +76,7 @@ class BetfairAuthManager:
                     data = response.json()
                     if data.get("loginStatus") == "SUCCESS":
                         cls.session_token = data.get("sessionToken")
-                        cls.token_expiration = datetime.now() + timedelta(hours=24)
+                        cls.token_expiration = datetime.now() + SESSION_LIFETIME
                         logger.info("Betfair login successful.")
                         return  # Successful login, exit retry loop
                     else:
@@ -86,31 +94,149 @@ class BetfairAuthManager:
 
         raise HTTPException(status_code=500, detail="Betfair login failed after multiple attempts.")
 
+    @classmethod
+    def keep_alive(cls) -> bool:
+        """Extend the current session through the keepAlive endpoint. Returns False if it has to be replaced."""
+        if not cls.session_token:
+            return False
+        try:
+            response = requests.post(
+                KEEP_ALIVE_URL,
+                headers={
+                    "X-Application": os.getenv("BETFAIR_API_KEY"),
+                    "X-Authentication": cls.session_token,
+                    "Accept": "application/json",
+                },
+                timeout=10
+            )
+            data = response.json() if response.status_code == 200 else {}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Betfair keepAlive error: {e}")
+            return False
+        if data.get("status") != "SUCCESS":
+            logger.warning(f"Betfair keepAlive failed: {data.get('error') or response.status_code}")
+            return False
+        cls.token_expiration = datetime.now() + SESSION_LIFETIME
+        logger.info("Betfair session kept alive.")
+        return True
+
     @classmethod
     def get_token(cls):
-        """Get the current session token or log in if expired."""
-        if cls.session_token and cls.token_expiration and cls.token_expiration > datetime.now():
-            return cls.session_token
+        """Get the current session token or log in if expired (blocking; async code uses session_manager)."""
+        return session_manager.get_token_sync()
 
-        logger.info("Session expired or not available. Logging in again...")
-        cls.login()
-        return cls.session_token
+# ------------------------------------------------
+#               SessionManager Class
+# ------------------------------------------------
+class SessionManager:
+    """
+    Non-blocking access to the Betfair session token.
 
-    @classmethod
-    async def monitor_connection(cls):
-        """Continuously monitors the connection and attempts reconnection if needed."""
-        if cls.is_running:
-            return  # Prevent multiple loops from running
-        cls.is_running = True
+    Logins and keepAlive calls run on one worker thread, never on an event
+    loop. At most one refresh is in flight: concurrent callers, on any loop
+    or thread, wait for the same future. Callers get the cached token
+    without waiting while it is valid; within `refresh_margin` of expiry a
+    background refresh is started, so the token is normally replaced before
+    anyone has to wait for it. `run` keeps the session alive periodically.
+    """
+    def __init__(self, keep_alive_interval: float = KEEP_ALIVE_INTERVAL, refresh_margin: float = REFRESH_MARGIN):
+        self.keep_alive_interval = keep_alive_interval
+        self.refresh_margin = refresh_margin
+        self.logins = 0
+        self.keep_alives = 0
+        self.failures = 0
+        self.shared = 0  # Callers that joined a refresh already in flight
+        self._refresh: Optional[Future] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def current_token(self) -> Optional[str]:
+        """The cached token if it has not expired, without refreshing."""
+        token, expiration = BetfairAuthManager.session_token, BetfairAuthManager.token_expiration
+        if token and expiration and expiration > datetime.now():
+            return token
+        return None
+
+    def expires_in(self) -> float:
+        """Seconds until the cached token expires (0 if there is none)."""
+        expiration = BetfairAuthManager.token_expiration
+        if not BetfairAuthManager.session_token or not expiration:
+            return 0.0
+        return max(0.0, (expiration - datetime.now()).total_seconds())
+
+    def invalidate(self):
+        """Forget the cached token, e.g. after the exchange rejected it."""
+        BetfairAuthManager.session_token = None
 
+    def _refresh_session(self, keep_alive: bool) -> str:
+        try:
+            if keep_alive and BetfairAuthManager.keep_alive():
+                self.keep_alives += 1
+            else:
+                BetfairAuthManager.login()
+                self.logins += 1
+        except Exception:
+            self.failures += 1
+            raise
+        return BetfairAuthManager.session_token
+
+    def start_refresh(self, keep_alive: bool = False) -> Future:
+        """Start a refresh on the worker thread, or join the one in flight."""
+        with self._lock:
+            if self._refresh is not None and not self._refresh.done():
+                self.shared += 1
+                return self._refresh
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="betfair-session")
+            self._refresh = self._executor.submit(self._refresh_session, keep_alive)
+            return self._refresh
+
+    async def refresh(self, keep_alive: bool = False) -> str:
+        # Shielded: a cancelled caller must not cancel the refresh other callers wait for
+        return await asyncio.shield(asyncio.wrap_future(self.start_refresh(keep_alive)))
+
+    async def get_token(self) -> str:
+        """Valid session token; waits only when there is none."""
+        token = self.current_token()
+        if token is None:
+            return await self.refresh()
+        if self.expires_in() < self.refresh_margin:
+            self.start_refresh(keep_alive=True)
+        return token
+
+    def get_token_sync(self) -> str:
+        """Blocking `get_token` for code running on its own thread."""
+        token = self.current_token()
+        if token is None:
+            return self.start_refresh().result()
+        if self.expires_in() < self.refresh_margin:
+            self.start_refresh(keep_alive=True)
+        return token
+
+    async def run(self):
+        """Keep the session alive every `keep_alive_interval` seconds, logging in again if that fails."""
         while True:
+            await asyncio.sleep(self.keep_alive_interval)
             try:
-                if not cls.session_token or cls.token_expiration <= datetime.now():
-                    logger.warning("Session expired. Attempting to reconnect...")
-                    cls.login()
-                else:
-                    logger.info("Session is active.")
+                await self.refresh(keep_alive=True)
             except Exception as e:
-                logger.error(f"Error in connection monitor: {e}")
+                logger.error(f"Error refreshing Betfair session: {e}")
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "valid": self.current_token() is not None,
+            "expires_in": round(self.expires_in()),
+            "logins": self.logins,
+            "keep_alives": self.keep_alives,
+            "failures": self.failures,
+            "shared_refreshes": self.shared,
+        }
 
-            await asyncio.sleep(3600)  # Check every 60 seconds
+# Shared session used by every Betfair API call
+session_manager = SessionManager()
@@ -0,0 +1,432 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+from app.logger import logger
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Seconds a streamed book is served without an update or a confirmation from
+# its stream (heartbeats arrive every 5 s by default)
+MAX_BOOK_AGE = 15.0
+
+# ------------------------------------------------
+#               Runner Cache
+# ------------------------------------------------
+class RunnerBookCache:
+    """
+    Local price ladder for a single runner, built from stream `rc` deltas.
+
+    Price-point ladders (atb/atl/trd) are keyed by price, level-based ladders
+    (batb/batl) are keyed by depth level. A size of zero removes the entry.
+    """
+    def __init__(self, selection_id: int):
+        self.selection_id = selection_id
+        self.status = "ACTIVE"
+        self.last_price_traded = None
+        self.total_matched = 0.0
+        self.available_to_back = {}  # price -> size
+        self.available_to_lay = {}  # price -> size
+        self.best_available_to_back = {}  # level -> [price, size]
+        self.best_available_to_lay = {}  # level -> [price, size]
+        self.traded_volume = {}  # price -> size
+
+    @staticmethod
+    def _update_price_ladder(ladder: Dict[float, float], updates: List[List[float]]):
+        for price, size in updates:
+            if size == 0:
+                ladder.pop(price, None)
+            else:
+                ladder[price] = size
+
+    @staticmethod
+    def _update_level_ladder(ladder: Dict[int, List[float]], updates: List[List[float]]):
+        for level, price, size in updates:
+            if size == 0:
+                ladder.pop(level, None)
+            else:
+                ladder[level] = [price, size]
+
+    def apply(self, runner_change: Dict[str, Any]):
+        """Apply one `rc` entry from an `mcm` message."""
+        if "atb" in runner_change:
+            self._update_price_ladder(self.available_to_back, runner_change["atb"])
+        if "atl" in runner_change:
+            self._update_price_ladder(self.available_to_lay, runner_change["atl"])
+        if "batb" in runner_change:
+            self._update_level_ladder(self.best_available_to_back, runner_change["batb"])
+        if "batl" in runner_change:
+            self._update_level_ladder(self.best_available_to_lay, runner_change["batl"])
+        if "trd" in runner_change:
+            self._update_price_ladder(self.traded_volume, runner_change["trd"])
+        if "ltp" in runner_change:
+            self.last_price_traded = runner_change["ltp"]
+        if "tv" in runner_change:
+            self.total_matched = runner_change["tv"]
+
+    def back_ladder(self) -> List[Dict[str, float]]:
+        """Available-to-back prices, best (highest) first."""
+        if self.best_available_to_back:
+            levels = [self.best_available_to_back[level] for level in sorted(self.best_available_to_back)]
+        else:
+            levels = sorted(self.available_to_back.items(), reverse=True)
+        return [{"price": price, "size": size} for price, size in levels]
+
+    def lay_ladder(self) -> List[Dict[str, float]]:
+        """Available-to-lay prices, best (lowest) first."""
+        if self.best_available_to_lay:
+            levels = [self.best_available_to_lay[level] for level in sorted(self.best_available_to_lay)]
+        else:
+            levels = sorted(self.available_to_lay.items())
+        return [{"price": price, "size": size} for price, size in levels]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of the runner in the flattened market book shape."""
+        return {
+            "selectionId": self.selection_id,
+            "status": self.status,
+            "lastPriceTraded": self.last_price_traded,
+            "totalMatched": self.total_matched,
+            "availableToBack": self.back_ladder(),
+            "availableToLay": self.lay_ladder(),
+            "tradedVolume": [{"price": price, "size": size} for price, size in sorted(self.traded_volume.items())],
+        }
+
+# ------------------------------------------------
+#               Market Cache
+# ------------------------------------------------
+class MarketBookCache:
+    """Local state of a single market, built from stream `mc` entries."""
+    def __init__(self, market_id: str):
+        self.market_id = market_id
+        self.definition = {}
+        self.total_matched = 0.0
+        self.runners = {}  # selection_id -> RunnerBookCache
+        self.publish_time = None
+        self.updated = None  # Monotonic time of the last change or stream confirmation
+        self.stale = False  # Set when the stream feeding the market stopped or disconnected
+
+    @property
+    def status(self) -> str:
+        return self.definition.get("status", "OPEN")
+
+    def apply(self, market_change: Dict[str, Any], publish_time: Optional[int] = None):
+        """Apply one `mc` entry from an `mcm` message."""
+        if "marketDefinition" in market_change:
+            self.definition = market_change["marketDefinition"]
+            for runner_definition in self.definition.get("runners", []):
+                runner = self._get_runner(runner_definition["id"])
+                runner.status = runner_definition.get("status", runner.status)
+        if "tv" in market_change:
+            self.total_matched = market_change["tv"]
+        for runner_change in market_change.get("rc", []):
+            self._get_runner(runner_change["id"]).apply(runner_change)
+        if publish_time is not None:
+            self.publish_time = publish_time
+
+    def _get_runner(self, selection_id: int) -> RunnerBookCache:
+        runner = self.runners.get(selection_id)
+        if runner is None:
+            runner = self.runners[selection_id] = RunnerBookCache(selection_id)
+        return runner
+
+    def market_book(self) -> Dict[str, Any]:
+        """Snapshot in the flattened market book shape used by the strategies."""
+        return {
+            "marketId": self.market_id,
+            "status": self.status,
+            "inplay": self.definition.get("inPlay", False),
+            "totalMatched": self.total_matched,
+            "publishTime": self.publish_time,
+            "runners": [runner.snapshot() for runner in self.runners.values()],
+        }
+
+    def market_data(self) -> Dict[str, Any]:
+        """Snapshot in the same shape as `fetch_market_data`."""
+        runners = []
+        for runner in self.runners.values():
+            if runner.status != "ACTIVE":
+                continue
+            back_prices = runner.back_ladder()
+            lay_prices = runner.lay_ladder()
+            back_odds = back_prices[0]["price"] if back_prices else None
+            lay_odds = lay_prices[0]["price"] if lay_prices else None
+            if back_odds or lay_odds:
+                runners.append({
+                    "selection_id": runner.selection_id,
+                    "back_odds": back_odds,
+                    "lay_odds": lay_odds
+                })
+        return {
+            "market_id": self.market_id,
+            "runners": runners,
+            "total_matched": self.total_matched
+        }
+
+class MarketCache:
+    """
+    Thread-safe store of market books kept up to date from the Betfair stream.
+
+    The stream receive loop calls `apply_market_change` for every `mc` entry;
+    strategies read copies through `get_market_data` / `get_market_book`,
+    which return None for markets that are not being streamed, whose stream
+    stopped or disconnected (`mark_stale`), or that have been neither updated
+    nor confirmed live (`touch`) for `max_age` seconds. Callers then fall
+    back to REST instead of trading on stale prices.
+    """
+    def __init__(self, max_age: Optional[float] = MAX_BOOK_AGE, clock: Callable[[], float] = time.monotonic):
+        self._markets = {}  # market_id -> MarketBookCache
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        self.clock = clock
+
+    def apply_market_change(self, market_change: Dict[str, Any], publish_time: Optional[int] = None):
+        """Apply a full image (`img: true`) or a delta for one market."""
+        self.apply_market_changes([(market_change, publish_time)])
+        return market_change["id"]
+
+    def apply_market_changes(self, changes: List[tuple]):
+        """Apply several (market_change, publish_time) pairs as one atomic update."""
+        now = self.clock()
+        with self._lock:
+            for market_change, publish_time in changes:
+                market_id = market_change["id"]
+                market = self._markets.get(market_id)
+                if market is None or market_change.get("img"):
+                    market = self._markets[market_id] = MarketBookCache(market_id)
+                market.apply(market_change, publish_time)
+                market.updated = now
+                market.stale = False
+
+    def touch(self, market_ids: List[str]):
+        """Confirm the books of these markets are live: their stream is connected and up to date."""
+        now = self.clock()
+        with self._lock:
+            for market_id in market_ids:
+                market = self._markets.get(market_id)
+                if market is not None:
+                    market.updated = now
+                    market.stale = False
+
+    def mark_stale(self, market_ids: List[str]):
+        """Hide these books from readers until their stream updates or confirms them again."""
+        with self._lock:
+            for market_id in market_ids:
+                market = self._markets.get(market_id)
+                if market is not None:
+                    market.stale = True
+
+    def _live(self, market_id: str) -> Optional[MarketBookCache]:
+        market = self._markets.get(market_id)
+        if market is None or market.stale:
+            return None
+        if self.max_age is not None and (market.updated is None or self.clock() - market.updated > self.max_age):
+            return None
+        return market
+
+    def get_market_data(self, market_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            market = self._live(market_id)
+            return market.market_data() if market else None
+
+    def get_market_book(self, market_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            market = self._live(market_id)
+            return market.market_book() if market else None
+
+    def market_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._markets)
+
+    def closed_market_ids(self) -> List[str]:
+        """Markets whose definition reports status CLOSED."""
+        with self._lock:
+            return [market_id for market_id, market in self._markets.items() if market.status == "CLOSED"]
+
+    def remove(self, market_id: str):
+        with self._lock:
+            self._markets.pop(market_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._markets.clear()
+
+    def __contains__(self, market_id: str) -> bool:
+        with self._lock:
+            return market_id in self._markets
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._markets)
+
+# ------------------------------------------------
+#               Helper Functions
+# ------------------------------------------------
+def flatten_market_book(response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a `listMarketBook` JSON-RPC response into the flattened market
+    book shape returned by `MarketCache.get_market_book`.
+    """
+    if not response:
+        return None
+    if "runners" in response:
+        return response  # Already flattened
+    results = response.get("result") or []
+    if not results:
+        logger.warning("Empty market book response")
+        return None
+    book = results[0]
+    return {
+        "marketId": book.get("marketId"),
+        "status": book.get("status"),
+        "inplay": book.get("inplay", False),
+        "totalMatched": book.get("totalMatched", 0),
+        "publishTime": None,
+        "runners": [
+            {
+                "selectionId": runner.get("selectionId"),
+                "status": runner.get("status"),
+                "lastPriceTraded": runner.get("lastPriceTraded"),
+                "totalMatched": runner.get("totalMatched", 0),
+                "availableToBack": runner.get("ex", {}).get("availableToBack", []),
+                "availableToLay": runner.get("ex", {}).get("availableToLay", []),
+                "tradedVolume": runner.get("ex", {}).get("tradedVolume", []),
+            }
+            for runner in book.get("runners", [])
+        ],
+    }
+
+# Shared cache fed by BetfairStream and read by the betting strategies
+market_cache = MarketCache()
+
+# ------------------------------------------------
+#               Order Cache
+# ------------------------------------------------
+ORDER_SIDES = {"B": "BACK", "L": "LAY"}
+ORDER_STATUSES = {"E": "EXECUTABLE", "EC": "EXECUTION_COMPLETE"}
+
+class OrderRecord:
+    """
+    Latest known state of one order, built from stream `uo` entries.
+
+    Attributes:
+        bet_id (str): Betfair bet ID
+        market_id (str): Market the order is on
+        selection_id (int): Runner the order is on
+        side (str): BACK or LAY
+        price (float): Requested price
+        size (float): Requested size
+        size_matched (float): Matched so far
+        size_remaining (float): Still unmatched
+        average_price_matched (float): Average matched price
+        status (str): EXECUTABLE or EXECUTION_COMPLETE
+    """
+    def __init__(self, bet_id: str, market_id: str, selection_id: int):
+        self.bet_id = bet_id
+        self.market_id = market_id
+        self.selection_id = selection_id
+        self.side = None
+        self.price = None
+        self.size = 0.0
+        self.size_matched = 0.0
+        self.size_remaining = 0.0
+        self.size_lapsed = 0.0
+        self.size_cancelled = 0.0
+        self.size_voided = 0.0
+        self.average_price_matched = 0.0
+        self.status = None
+        self.customer_order_ref = None
+        self.placed_date = None
+        self.matched_date = None
+
+    def apply(self, order: Dict[str, Any]):
+        """Apply one `uo` entry from an `ocm` message (each entry is a full order state)."""
+        self.side = ORDER_SIDES.get(order.get("side"), self.side)
+        self.price = order.get("p", self.price)
+        self.size = order.get("s", self.size)
+        self.size_matched = order.get("sm", self.size_matched)
+        self.size_remaining = order.get("sr", self.size_remaining)
+        self.size_lapsed = order.get("sl", self.size_lapsed)
+        self.size_cancelled = order.get("sc", self.size_cancelled)
+        self.size_voided = order.get("sv", self.size_voided)
+        self.average_price_matched = order.get("avp", self.average_price_matched)
+        self.status = ORDER_STATUSES.get(order.get("status"), self.status)
+        self.customer_order_ref = order.get("rfo", self.customer_order_ref)
+        self.placed_date = order.get("pd", self.placed_date)
+        self.matched_date = order.get("md", self.matched_date)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bet_id": self.bet_id,
+            "market_id": self.market_id,
+            "selection_id": self.selection_id,
+            "side": self.side,
+            "price": self.price,
+            "size": self.size,
+            "size_matched": self.size_matched,
+            "size_remaining": self.size_remaining,
+            "size_lapsed": self.size_lapsed,
+            "size_cancelled": self.size_cancelled,
+            "size_voided": self.size_voided,
+            "average_price_matched": self.average_price_matched,
+            "status": self.status,
+            "customer_order_ref": self.customer_order_ref,
+            "placed_date": self.placed_date,
+            "matched_date": self.matched_date,
+        }
+
+class OrderCache:
+    """
+    Thread-safe store of our orders keyed by bet ID, fed by the order stream.
+
+    Readers get dict copies through `get` / `get_market_orders`; unknown bets
+    return None so callers can fall back to the placement response.
+    """
+    def __init__(self):
+        self._orders = {}  # bet_id -> OrderRecord
+        self._lock = threading.Lock()
+
+    def apply_order_changes(self, order_changes: List[Dict[str, Any]]):
+        """Apply the `oc` entries of one (possibly reassembled) `ocm` message atomically."""
+        with self._lock:
+            for order_change in order_changes:
+                market_id = order_change["id"]
+                for runner_change in order_change.get("orc", []):
+                    selection_id = runner_change["id"]
+                    if runner_change.get("fullImage"):
+                        for bet_id in [bet_id for bet_id, order in self._orders.items()
+                                       if order.market_id == market_id and order.selection_id == selection_id]:
+                            del self._orders[bet_id]
+                    for order in runner_change.get("uo", []):
+                        record = self._orders.get(order["id"])
+                        if record is None:
+                            record = self._orders[order["id"]] = OrderRecord(order["id"], market_id, selection_id)
+                        record.apply(order)
+
+    def get(self, bet_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._orders.get(str(bet_id))
+            return record.to_dict() if record else None
+
+    def get_market_orders(self, market_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [record.to_dict() for record in self._orders.values() if record.market_id == market_id]
+
+    def remove_market(self, market_id: str):
+        with self._lock:
+            for bet_id in [bet_id for bet_id, order in self._orders.items() if order.market_id == market_id]:
+                del self._orders[bet_id]
+
+    def clear(self):
+        with self._lock:
+            self._orders.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._orders)
+
+# Shared cache fed by the order stream and read by the betting strategies
+order_cache = OrderCache()
@@ -0,0 +1,148 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import functools
+import threading
+from typing import Any, Dict, List, Optional
+from app.logger import logger
+from app.betfair import utils
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+SYNC_CALL_TIMEOUT = 60  # Seconds a sync facade call waits for its result
+
+# ------------------------------------------------
+#               Background Loop
+# ------------------------------------------------
+class BackgroundLoop:
+    """
+    One long-lived event loop on a daemon thread, started on first use.
+
+    Sync code submits coroutines with `run`, which works the same whether or
+    not the caller's thread already runs an event loop, so there is no
+    per-call loop setup and no nested-loop error.
+    """
+    def __init__(self, name: str = "betfair-client"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                logger.info(f"Started background event loop {self.name}")
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = SYNC_CALL_TIMEOUT):
+        """Run a coroutine on the background loop and block until it finishes."""
+        loop = self._ensure_started()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Sync Betfair calls cannot be made from the client's own loop; await the async method")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+# ------------------------------------------------
+#               BetfairClient Class
+# ------------------------------------------------
+class BetfairClient:
+    """
+    Single entry point for Betfair API calls.
+
+    Async code awaits the methods directly:
+        market_data = await betfair_client.get_market_data(market_id)
+    Sync code (e.g. BackDutchWager, ModifiedLTDWager) uses the facade, which
+    runs the same coroutines on one shared background loop:
+        market_data = betfair_client.sync.get_market_data(market_id)
+    """
+    def __init__(self):
+        self.background = BackgroundLoop()
+        self.sync = SyncBetfairClient(self)
+
+    async def list_event_types(self):
+        return await utils.list_event_types()
+
+    async def list_events(self, event_type_id: int):
+        return await utils.list_events(event_type_id)
+
+    async def list_market_catalogue(self, event_id: str, max_results: int = 10):
+        return await utils.list_market_catalogue(event_id, max_results)
+
+    async def list_market_catalogue_by_filter(self, market_filter: Dict[str, Any], max_results: int = 200,
+                                              market_projection: Optional[List[str]] = None):
+        return await utils.list_market_catalogue_by_filter(market_filter, max_results, market_projection)
+
+    async def list_market_book(self, market_id: str, price_projection: Optional[Dict[str, Any]] = None):
+        return await utils.list_market_book(market_id, price_projection)
+
+    async def list_market_books(self, market_ids: List[str], price_projection: Optional[Dict[str, Any]] = None):
+        return await utils.list_market_books(market_ids, price_projection)
+
+    async def list_market_book_records(self, market_ids: List[str], price_projection: Optional[Dict[str, Any]] = None):
+        return await utils.list_market_book_records(market_ids, price_projection)
+
+    async def get_market_data(self, market_id: str) -> Dict[str, Any]:
+        """Strategy-formatted market data (see `utils.format_market_data`)."""
+        return await utils._fetch_market_data_async(market_id)
+
+    async def get_all_market_data(self, market_ids: Optional[List[str]] = None,
+                                  price_projection: Optional[Dict[str, Any]] = None):
+        return await utils.get_all_market_data(market_ids, price_projection)
+
+    async def place_bet(self, market_id: str, selection_id: int, side: str, size: float, price: float,
+                        group: Optional[str] = None):
+        return await utils.place_bet(market_id, selection_id, side, size, price, group)
+
+    async def place_orders(self, market_id: str, instructions: List[Dict[str, Any]], group: Optional[str] = None):
+        """Place several orders on one market in a single request (see `utils.place_orders`)."""
+        return await utils.place_orders(market_id, instructions, group)
+
+    async def list_current_orders(self, market_ids: Optional[List[str]] = None, customer_order_refs: Optional[List[str]] = None,
+                                  bet_ids: Optional[List[str]] = None, order_projection: Optional[str] = None):
+        return await utils.list_current_orders(market_ids, customer_order_refs, bet_ids, order_projection)
+
+    async def cancel_orders(self, market_id: str, instructions: Optional[List[Dict[str, Any]]] = None):
+        return await utils.cancel_orders(market_id, instructions)
+
+    async def replace_orders(self, market_id: str, instructions: List[Dict[str, Any]]):
+        return await utils.replace_orders(market_id, instructions)
+
+    async def get_account_funds(self):
+        return await utils.get_account_funds()
+
+    def close(self):
+        """Stop the background loop used by the sync facade."""
+        self.background.stop()
+
+class SyncBetfairClient:
+    """Blocking view of a BetfairClient: every async method becomes a plain call."""
+    def __init__(self, client: BetfairClient):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+        if not asyncio.iscoroutinefunction(method):
+            return method
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            return self._client.background.run(method(*args, **kwargs))
+        return call
+
+# Shared client used by routes, strategies and the terminal interface
+betfair_client = BetfairClient()
@@ -0,0 +1,121 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Optional
+from app.logger import logger
+from app.betfair.cache import market_cache
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+DEFAULT_CONFLATION_WINDOW = 0.5  # Seconds between evaluations of the same market
+
+# ------------------------------------------------
+#               MarketConflator Class
+# ------------------------------------------------
+class MarketConflator:
+    """
+    Per-market conflation between stream updates and strategy evaluation.
+
+    Any number of updates to a market inside one window trigger a single
+    call to `evaluate(market_id, market_book)` with the latest cached book.
+    The first update after a quiet period is evaluated immediately. If an
+    async evaluation is still running when the next one is due, it waits for
+    the running one to finish, so each market has at most one evaluation in
+    flight.
+
+    Usage with the asyncio stream (same loop):
+        conflator = MarketConflator(evaluate, window=0.5)
+        stream.add_market_listener(conflator.notify)
+    With the threaded stream, register `conflator.notify_threadsafe`.
+    """
+    def __init__(self, evaluate: Callable[[str, Dict[str, Any]], Any],
+                 window: float = DEFAULT_CONFLATION_WINDOW, cache=None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.evaluate = evaluate
+        self.window = window
+        self.market_cache = cache if cache is not None else market_cache
+        self.loop = loop
+        self.pending = {}  # market_id -> scheduled evaluation handle
+        self.last_evaluated = {}  # market_id -> monotonic time of last evaluation
+        self.in_flight = set()  # markets with an async evaluation running
+        self.dirty = set()  # markets updated while an evaluation was running
+        self.updates = 0
+        self.evaluations = 0
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        return self.loop
+
+    def notify(self, market_id: str):
+        """Record an update to a market. Must be called on the event loop thread."""
+        self.updates += 1
+        if market_id in self.pending:
+            return  # Coalesced into the evaluation already scheduled
+        loop = self._get_loop()
+        last = self.last_evaluated.get(market_id)
+        delay = 0.0 if last is None else last + self.window - time.monotonic()
+        if delay > 0:
+            self.pending[market_id] = loop.call_later(delay, self._fire, market_id)
+        else:
+            self.pending[market_id] = loop.call_soon(self._fire, market_id)
+
+    def notify_threadsafe(self, market_id: str):
+        """Variant of `notify` for callers on other threads (e.g. the threaded stream)."""
+        if self.loop is None:
+            raise RuntimeError("MarketConflator needs an explicit loop for thread-safe notifications")
+        self.loop.call_soon_threadsafe(self.notify, market_id)
+
+    def _fire(self, market_id: str):
+        self.pending.pop(market_id, None)
+        if market_id in self.in_flight:
+            self.dirty.add(market_id)
+            return
+        market_book = self.market_cache.get_market_book(market_id)
+        if market_book is None:
+            return
+        self.last_evaluated[market_id] = time.monotonic()
+        self.evaluations += 1
+        try:
+            result = self.evaluate(market_id, market_book)
+        except Exception as e:
+            logger.error(f"Error evaluating market {market_id}: {e}")
+            return
+        if inspect.isawaitable(result):
+            self.in_flight.add(market_id)
+            task = asyncio.ensure_future(result)
+            task.add_done_callback(lambda done: self._finished(market_id, done))
+
+    def _finished(self, market_id: str, task: asyncio.Future):
+        self.in_flight.discard(market_id)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error evaluating market {market_id}: {task.exception()}")
+        if market_id in self.dirty:
+            self.dirty.discard(market_id)
+            self.updates -= 1  # Re-notification of an update already counted
+            self.notify(market_id)
+
+    def discard(self, market_id: str):
+        """Forget a market, cancelling any scheduled evaluation."""
+        handle = self.pending.pop(market_id, None)
+        if handle is not None:
+            handle.cancel()
+        self.last_evaluated.pop(market_id, None)
+        self.dirty.discard(market_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "updates": self.updates,
+            "evaluations": self.evaluations,
+            "coalesced": self.updates - self.evaluations,
+            "pending": len(self.pending),
+            "in_flight": len(self.in_flight),
+        }
+
+    def close(self):
+        for market_id in list(self.pending):
+            self.discard(market_id)
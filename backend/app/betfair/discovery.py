@@ -0,0 +1,336 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from app.logger import logger
+from app.betfair.utils import list_market_catalogue_by_filter
+from app.betting_wager.laydutch import GV_SCAN_START_MINUTES
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+DISCOVERY_INTERVAL_SECONDS = 60
+DISCOVERY_PAGE_SIZE = 200  # listMarketCatalogue accepts up to 1000
+MAX_PAGES = 50
+DISCOVERY_PROJECTION = ["EVENT", "EVENT_TYPE", "MARKET_START_TIME", "MARKET_DESCRIPTION"]
+
+def parse_start_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Betfair timestamp (e.g. 2024-05-01T12:30:00.000Z) as an aware UTC datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+    except ValueError:
+        logger.warning(f"Unparseable market start time: {value}")
+        return None
+
+def format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def minutes_until(start_time: Optional[datetime], now: Optional[datetime] = None) -> Optional[float]:
+    """Minutes from `now` until `start_time`; negative once the event has started."""
+    if start_time is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    return (start_time - now).total_seconds() / 60
+
+# ------------------------------------------------
+#               WatchedMarket Class
+# ------------------------------------------------
+class WatchedMarket:
+    """
+    One market on the watchlist, built from a listMarketCatalogue entry.
+
+    Attributes:
+        market_id (str): Betfair market ID
+        market_name (str): Market name (e.g. Match Odds)
+        event_name (str): Event the market belongs to
+        event_type_id (str): Sport ID
+        market_type (str): Market type code, if the description was projected
+        start_time (datetime): Scheduled start (UTC)
+        total_matched (float): Amount matched so far
+    """
+    def __init__(self, market_id: str, market_name: Optional[str] = None, event_name: Optional[str] = None,
+                 event_type_id: Optional[str] = None, market_type: Optional[str] = None,
+                 start_time: Optional[datetime] = None, total_matched: float = 0.0):
+        self.market_id = market_id
+        self.market_name = market_name
+        self.event_name = event_name
+        self.event_type_id = event_type_id
+        self.market_type = market_type
+        self.start_time = start_time
+        self.total_matched = total_matched
+        self.discovered = time.time()
+
+    @classmethod
+    def from_catalogue(cls, entry: Dict[str, Any]) -> "WatchedMarket":
+        return cls(
+            entry["marketId"],
+            entry.get("marketName"),
+            (entry.get("event") or {}).get("name"),
+            (entry.get("eventType") or {}).get("id"),
+            (entry.get("description") or {}).get("marketType"),
+            parse_start_time(entry.get("marketStartTime")),
+            entry.get("totalMatched", 0.0),
+        )
+
+    @property
+    def time_to_start(self) -> Optional[float]:
+        """Minutes until the scheduled start, computed now."""
+        return minutes_until(self.start_time)
+
+    def update(self, other: "WatchedMarket"):
+        """Take the latest start time and matched volume (start times can move)."""
+        self.start_time = other.start_time or self.start_time
+        self.total_matched = other.total_matched
+
+    def to_dict(self) -> Dict[str, Any]:
+        time_to_start = self.time_to_start
+        return {
+            "market_id": self.market_id,
+            "market_name": self.market_name,
+            "event_name": self.event_name,
+            "event_type_id": self.event_type_id,
+            "market_type": self.market_type,
+            "start_time": format_time(self.start_time) if self.start_time else None,
+            "time_to_start": round(time_to_start, 1) if time_to_start is not None else None,
+            "total_matched": self.total_matched,
+        }
+
+# ------------------------------------------------
+#               MarketDiscovery Class
+# ------------------------------------------------
+class MarketDiscovery:
+    """
+    Keeps a watchlist of markets starting within the next `window_minutes`.
+
+    Every refresh pages listMarketCatalogue for the configured sports and
+    market types, sorted by start time: each page starts where the previous
+    one ended, so windows with more markets than one page holds are covered.
+    Markets that appear are added, markets that start or leave the filter
+    are removed, and the listeners (stream subscriptions, price polling,
+    evaluation scheduling) are told about both, and about start times that
+    moved:
+
+        market_discovery.attach_stream_manager(stream_manager)
+        await market_discovery.start()
+    """
+    def __init__(self, event_type_ids: Optional[List[str]] = None, market_type_codes: Optional[List[str]] = None,
+                 window_minutes: float = GV_SCAN_START_MINUTES, page_size: int = DISCOVERY_PAGE_SIZE,
+                 market_filter: Optional[Dict[str, Any]] = None):
+        self.event_type_ids = event_type_ids
+        self.market_type_codes = market_type_codes
+        self.window_minutes = window_minutes
+        self.page_size = page_size
+        self.extra_filter = market_filter or {}
+        self.markets: Dict[str, WatchedMarket] = {}
+        self.listeners = []  # (on_added, on_removed) callables receiving market ID lists
+        self.running = False
+        self.task = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh = None
+
+    def configure(self, event_type_ids: Optional[List[str]] = None, market_type_codes: Optional[List[str]] = None,
+                  window_minutes: Optional[float] = None):
+        """Change the filter; takes effect on the next refresh."""
+        self.event_type_ids = event_type_ids
+        self.market_type_codes = market_type_codes
+        if window_minutes is not None:
+            self.window_minutes = window_minutes
+
+    # ------------------------------------------------
+    #               Listeners
+    # ------------------------------------------------
+    def add_listener(self, on_added: Optional[Callable] = None, on_removed: Optional[Callable] = None,
+                     on_changed: Optional[Callable] = None):
+        """Register callbacks (plain or async) called with the IDs of added/removed/rescheduled markets."""
+        listener = (on_added, on_removed, on_changed)
+        self.listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def attach_stream_manager(self, stream_manager):
+        """Subscribe watchlist markets on a StreamManager as they enter and leave the window."""
+        async def on_added(market_ids: List[str]):
+            rejected = await stream_manager.add_markets(market_ids)
+            if rejected:
+                logger.warning(f"{len(rejected)} discovered markets did not fit on the stream")
+        return self.add_listener(on_added, stream_manager.remove_markets)
+
+    async def _notify(self, position: int, market_ids: List[str]):
+        if not market_ids:
+            return
+        for listener in self.listeners:
+            callback = listener[position]
+            if callback is None:
+                continue
+            try:
+                result = callback(market_ids)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Watchlist listener failed: {e}")
+
+    # ------------------------------------------------
+    #               Catalogue Paging
+    # ------------------------------------------------
+    def market_filter(self, start_from: datetime, start_to: datetime) -> Dict[str, Any]:
+        market_filter = {**self.extra_filter, "marketStartTime": {"from": format_time(start_from), "to": format_time(start_to)}}
+        if self.event_type_ids:
+            market_filter["eventTypeIds"] = list(self.event_type_ids)
+        if self.market_type_codes:
+            market_filter["marketTypeCodes"] = list(self.market_type_codes)
+        return market_filter
+
+    async def fetch_catalogue(self, now: datetime) -> Optional[List[Dict[str, Any]]]:
+        """
+        Every catalogue entry starting between `now` and the end of the
+        window, or None if a page could not be fetched.
+        """
+        window_end = now + timedelta(minutes=self.window_minutes)
+        start_from, entries = now, {}
+        for _ in range(MAX_PAGES):
+            response = await list_market_catalogue_by_filter(
+                self.market_filter(start_from, window_end), self.page_size, DISCOVERY_PROJECTION
+            )
+            if not response or "result" not in response:
+                return None
+            page = response["result"]
+            new = [entry for entry in page if entry["marketId"] not in entries]
+            entries.update((entry["marketId"], entry) for entry in new)
+            if len(page) < self.page_size:
+                break
+            if not new:
+                # A full page of markets sharing one start time cannot be paged past
+                logger.warning(f"Catalogue paging stuck at {format_time(start_from)}")
+                break
+            start_from = parse_start_time(page[-1].get("marketStartTime")) or window_end
+        else:
+            logger.warning(f"Catalogue paging stopped after {MAX_PAGES} pages")
+        return list(entries.values())
+
+    # ------------------------------------------------
+    #               Watchlist
+    # ------------------------------------------------
+    async def refresh(self, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """
+        Re-read the catalogue and update the watchlist. Returns the IDs of
+        added, removed and rescheduled (start time changed) markets. A failed
+        fetch leaves the watchlist as is.
+        """
+        now = now or datetime.now(timezone.utc)
+        entries = await self.fetch_catalogue(now)
+        if entries is None:
+            self.failures += 1
+            logger.warning("Market discovery refresh failed, keeping the current watchlist")
+            return {"added": [], "removed": [], "changed": []}
+
+        current = {}
+        for entry in entries:
+            market = WatchedMarket.from_catalogue(entry)
+            if market.start_time is not None and market.start_time < now:
+                continue
+            current[market.market_id] = market
+        added = [market_id for market_id in current if market_id not in self.markets]
+        removed = [market_id for market_id in self.markets if market_id not in current]
+        changed = [market_id for market_id, market in current.items()
+                   if market_id in self.markets and market.start_time not in (None, self.markets[market_id].start_time)]
+        for market_id in removed:
+            del self.markets[market_id]
+        for market_id, market in current.items():
+            if market_id in self.markets:
+                self.markets[market_id].update(market)
+            else:
+                self.markets[market_id] = market
+
+        self.refreshes += 1
+        self.last_refresh = time.time()
+        if added or removed or changed:
+            logger.info(f"Watchlist: {len(added)} added, {len(removed)} removed, "
+                        f"{len(changed)} rescheduled, {len(self.markets)} watched")
+        await self._notify(1, removed)
+        await self._notify(0, added)
+        await self._notify(2, changed)
+        return {"added": added, "removed": removed, "changed": changed}
+
+    def get(self, market_id: str) -> Optional[WatchedMarket]:
+        return self.markets.get(market_id)
+
+    def market_ids(self) -> List[str]:
+        return list(self.markets)
+
+    def start_minutes(self) -> Dict[str, float]:
+        """Minutes to start per watched market, as the scanner takes them."""
+        return {market_id: market.time_to_start for market_id, market in self.markets.items()
+                if market.start_time is not None}
+
+    def update_matched(self, market_id: str, total_matched: float):
+        """Record fresher matched volume (e.g. from a market book or the stream)."""
+        market = self.markets.get(market_id)
+        if market is not None:
+            market.total_matched = total_matched
+
+    def watchlist(self) -> List[Dict[str, Any]]:
+        """Watched markets, first to start first."""
+        far_future = datetime.max.replace(tzinfo=timezone.utc)
+        markets = sorted(self.markets.values(), key=lambda market: market.start_time or far_future)
+        return [market.to_dict() for market in markets]
+
+    async def lookup(self, market_id: str) -> Optional[WatchedMarket]:
+        """Watchlist entry for a market, fetched from the catalogue if it is not watched."""
+        market = self.markets.get(market_id)
+        if market is not None:
+            return market
+        response = await list_market_catalogue_by_filter({"marketIds": [market_id]}, 1, DISCOVERY_PROJECTION)
+        if not response or not response.get("result"):
+            return None
+        return WatchedMarket.from_catalogue(response["result"][0])
+
+    # ------------------------------------------------
+    #               Lifecycle
+    # ------------------------------------------------
+    async def _run(self, interval: float):
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error refreshing the watchlist: {e}")
+
+    async def start(self, interval: float = DISCOVERY_INTERVAL_SECONDS):
+        """Build the watchlist now and refresh it every `interval` seconds."""
+        if self.running:
+            return
+        self.running = True
+        await self.refresh()
+        self.task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "watched": len(self.markets),
+            "window_minutes": self.window_minutes,
+            "event_type_ids": self.event_type_ids,
+            "market_type_codes": self.market_type_codes,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_refresh": self.last_refresh,
+        }
+
+# Shared watchlist used by routes, the scanner and the terminal interface
+market_discovery = MarketDiscovery()
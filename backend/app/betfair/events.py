@@ -0,0 +1,307 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.logger import logger
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Policies applied when a subscriber's queue is full
+DROP_OLDEST = "drop_oldest"  # Discard the oldest queued event to make room
+DROP_NEWEST = "drop_newest"  # Discard the incoming event
+COALESCE = "coalesce"  # Merge into the queued event for the same market/runner
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+DEFAULT_QUEUE_SIZE = 1000
+# `rc` ladders: [price, size] updates keyed by price, [level, price, size] keyed by level
+LADDER_KEYS = ("atb", "atl", "trd", "spb", "spl", "batb", "batl", "bdatb", "bdatl")
+
+def merge_runner_change(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge two consecutive `rc` deltas into one. Ladders are merged per price
+    (or depth level), the newer update winning; zero sizes are kept so the
+    removal still reaches whoever applies the merged delta.
+    """
+    merged = {**older, **newer}
+    for key in LADDER_KEYS:
+        if key in older and key in newer:
+            levels = {update[0]: update for update in older[key]}
+            levels.update((update[0], update) for update in newer[key])
+            merged[key] = list(levels.values())
+    return merged
+
+# ------------------------------------------------
+#               Event Classes
+# ------------------------------------------------
+class MarketChangeEvent:
+    """
+    A market changed in one stream message.
+
+    Attributes:
+        market_id (str): Betfair market ID
+        publish_time (int): Exchange publish time (`pt`, epoch ms)
+        image (bool): True when the change replaced the whole market
+        market_definition (dict): New market definition, if it changed
+        selection_ids (list): Runners that changed
+    """
+    def __init__(self, market_id: str, publish_time: Optional[int] = None, image: bool = False,
+                 market_definition: Optional[Dict[str, Any]] = None, selection_ids: Optional[List[int]] = None):
+        self.market_id = market_id
+        self.publish_time = publish_time
+        self.image = image
+        self.market_definition = market_definition
+        self.selection_ids = selection_ids or []
+
+    @property
+    def key(self) -> Tuple:
+        return ("market", self.market_id)
+
+    @property
+    def status(self) -> Optional[str]:
+        return self.market_definition.get("status") if self.market_definition else None
+
+    def merge(self, older: "MarketChangeEvent") -> "MarketChangeEvent":
+        """
+        Combine with an older, still undelivered event for the same market.
+        Returns a new event: published events are shared between subscribers.
+        """
+        return MarketChangeEvent(
+            self.market_id, self.publish_time, self.image or older.image,
+            self.market_definition if self.market_definition is not None else older.market_definition,
+            list(dict.fromkeys(older.selection_ids + self.selection_ids))
+        )
+
+    def __repr__(self):
+        return f"MarketChangeEvent({self.market_id}, runners={self.selection_ids})"
+
+class RunnerChangeEvent:
+    """
+    A runner changed in one stream message.
+
+    Attributes:
+        market_id (str): Betfair market ID
+        selection_id (int): Runner selection ID
+        publish_time (int): Exchange publish time (`pt`, epoch ms)
+        last_traded_price (float): Last traded price, if it changed
+        traded_volume (float): Total traded volume, if it changed
+        change (dict): Raw `rc` entry (ladder deltas)
+        image (bool): True when the change came with a full market image
+    """
+    def __init__(self, market_id: str, selection_id: int, publish_time: Optional[int] = None,
+                 last_traded_price: Optional[float] = None, traded_volume: Optional[float] = None,
+                 change: Optional[Dict[str, Any]] = None, image: bool = False):
+        self.market_id = market_id
+        self.selection_id = selection_id
+        self.publish_time = publish_time
+        self.last_traded_price = last_traded_price
+        self.traded_volume = traded_volume
+        self.change = change or {}
+        self.image = image
+
+    @property
+    def key(self) -> Tuple:
+        return ("runner", self.market_id, self.selection_id)
+
+    def merge(self, older: "RunnerChangeEvent") -> "RunnerChangeEvent":
+        """
+        Combine with an older, still undelivered event for the same runner
+        (returns a new event). Ladder deltas are merged level by level; an
+        image replaces whatever came before it.
+        """
+        return RunnerChangeEvent(
+            self.market_id, self.selection_id, self.publish_time,
+            self.last_traded_price if self.last_traded_price is not None else older.last_traded_price,
+            self.traded_volume if self.traded_volume is not None else older.traded_volume,
+            self.change if self.image else merge_runner_change(older.change, self.change),
+            self.image or older.image
+        )
+
+    def __repr__(self):
+        return f"RunnerChangeEvent({self.market_id}, {self.selection_id}, ltp={self.last_traded_price})"
+
+def events_from_market_changes(changes: Iterable[Tuple[Dict[str, Any], Optional[int]]]) -> List[Any]:
+    """Build typed events from the (mc, pt) pairs of one stream message."""
+    events = []
+    for market_change, publish_time in changes:
+        market_id = market_change["id"]
+        runner_changes = market_change.get("rc", [])
+        events.append(MarketChangeEvent(
+            market_id, publish_time, bool(market_change.get("img")),
+            market_change.get("marketDefinition"), [rc["id"] for rc in runner_changes]
+        ))
+        for rc in runner_changes:
+            events.append(RunnerChangeEvent(market_id, rc["id"], publish_time, rc.get("ltp"), rc.get("tv"), rc,
+                                            bool(market_change.get("img"))))
+    return events
+
+# ------------------------------------------------
+#               Subscription Class
+# ------------------------------------------------
+class Subscription:
+    """
+    One consumer of the event bus with its own bounded queue.
+
+    Publishing never waits on a subscriber: when the queue is full the
+    overflow policy decides what is lost, so a slow consumer only ever
+    falls behind itself. Consume with `await subscription.get()` or
+    `async for event in subscription`.
+    """
+    def __init__(self, name: str, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = DROP_OLDEST,
+                 event_types: Optional[Tuple[type, ...]] = None, market_ids: Optional[Iterable[str]] = None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {OVERFLOW_POLICIES}")
+        if maxsize <= 0:
+            raise ValueError("Subscription queues must be bounded (maxsize > 0)")
+        self.name = name
+        self.policy = policy
+        self.event_types = event_types
+        self.market_ids = set(market_ids) if market_ids is not None else None
+        # Coalescing queues hold event keys; the latest event per key lives in `pending`
+        self.queue = asyncio.Queue(maxsize)
+        self.pending = {}
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def accepts(self, event) -> bool:
+        if self.event_types is not None and not isinstance(event, self.event_types):
+            return False
+        return self.market_ids is None or event.market_id in self.market_ids
+
+    def _evict_oldest(self):
+        item = self.queue.get_nowait()
+        if self.policy == COALESCE:
+            self.pending.pop(item, None)
+        self.dropped += 1
+
+    def offer(self, event):
+        """Enqueue without waiting, applying the overflow policy."""
+        if self.closed:
+            return
+        if self.policy == COALESCE:
+            key = event.key
+            older = self.pending.get(key)
+            if older is not None:
+                self.pending[key] = event.merge(older)
+                self.coalesced += 1
+                return
+            if self.queue.full():
+                self._evict_oldest()
+            self.pending[key] = event
+            self.queue.put_nowait(key)
+        elif self.queue.full():
+            if self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return
+            self._evict_oldest()
+            self.queue.put_nowait(event)
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self):
+        """Next event, or None once the subscription is closed and drained."""
+        if self.closed and self.queue.empty():
+            return None
+        item = await self.queue.get()
+        if item is None:
+            return None
+        self.delivered += 1
+        return self.pending.pop(item) if self.policy == COALESCE else item
+
+    def close(self):
+        """Stop accepting events; consumers get None after the queued ones."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.queue.full():
+            self._evict_oldest()
+        self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "queued": self.queue.qsize(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+# ------------------------------------------------
+#               EventBus Class
+# ------------------------------------------------
+class EventBus:
+    """
+    In-process pub/sub for stream updates.
+
+    Subscriptions and publishing belong to one event loop. A stream running
+    on another thread is attached with that loop so events are handed over
+    with `call_soon_threadsafe`:
+
+        subscription = event_bus.subscribe("dashboard", maxsize=100, policy=COALESCE)
+        event_bus.attach(stream)
+        async for event in subscription: ...
+    """
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+        self.published = 0
+
+    def subscribe(self, name: str, maxsize: int = DEFAULT_QUEUE_SIZE, policy: str = DROP_OLDEST,
+                  event_types: Optional[Tuple[type, ...]] = None,
+                  market_ids: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(name, maxsize, policy, event_types, market_ids)
+        self.subscriptions.append(subscription)
+        logger.info(f"Event bus subscriber {name} added ({policy}, queue {maxsize})")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        subscription.close()
+
+    def publish(self, event):
+        """Offer an event to every matching subscriber. Call on the bus's event loop."""
+        self.published += 1
+        for subscription in self.subscriptions:
+            if subscription.accepts(event):
+                subscription.offer(event)
+
+    def publish_market_changes(self, changes: List[Tuple[Dict[str, Any], Optional[int]]]):
+        """Stream change listener: publish the events of one applied mcm message."""
+        if not self.subscriptions:
+            return
+        for event in events_from_market_changes(changes):
+            self.publish(event)
+
+    def attach(self, stream, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Feed a stream's market changes into the bus. Pass `loop` when the
+        stream runs on another thread (the threaded BetfairStream).
+        """
+        if loop is None:
+            stream.add_change_listener(self.publish_market_changes)
+        else:
+            stream.add_change_listener(lambda changes: loop.call_soon_threadsafe(self.publish_market_changes, changes))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "subscribers": {subscription.name: subscription.stats() for subscription in self.subscriptions},
+        }
+
+    def close(self):
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription)
+
+# Shared bus fed by the API-managed stream
+event_bus = EventBus()
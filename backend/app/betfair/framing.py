@@ -0,0 +1,82 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+from typing import Iterator
+
+# ------------------------------------------------
+#               CRLF Line Framer
+# ------------------------------------------------
+class LineFramer:
+    """
+    Split a CRLF-delimited byte stream into complete messages.
+
+    Socket reads land directly in one reusable `bytearray` through a
+    `memoryview`, so no intermediate chunk objects are created. Only complete
+    lines are returned; a partial tail stays in the buffer until the rest of
+    the message arrives. Each line is copied out exactly once as `bytes`,
+    which `json.loads` decodes directly.
+    """
+    DELIMITER = b"\r\n"
+
+    def __init__(self, buf_size: int = 8192):
+        self.min_read = buf_size
+        self.buffer = bytearray(buf_size * 2)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # First unconsumed byte
+        self.end = 0  # End of received data
+        self.scan = 0  # Where the next delimiter search resumes
+
+    def __len__(self) -> int:
+        """Number of buffered bytes not yet returned as a line."""
+        return self.end - self.start
+
+    def _reserve(self, size: int):
+        """Make room for at least `size` more bytes after `end`."""
+        if len(self.buffer) - self.end >= size:
+            return
+        pending = self.end - self.start
+        if self.start:
+            # Move the partial tail to the front of the buffer. The ranges can
+            # overlap, so copy it out first rather than assigning a view of the
+            # buffer onto itself; the buffer keeps its size, so `view` stays valid.
+            self.buffer[:pending] = bytes(self.view[self.start:self.end])
+            self.scan -= self.start
+            self.start = 0
+            self.end = pending
+        if len(self.buffer) - self.end < size:
+            # A single message is larger than the buffer: grow it
+            self.view.release()
+            self.buffer.extend(bytes(max(size, len(self.buffer))))
+            self.view = memoryview(self.buffer)
+
+    def recv_into(self, sock) -> int:
+        """Read from a socket straight into the buffer. Returns bytes read (0 on EOF)."""
+        self._reserve(self.min_read)
+        received = sock.recv_into(self.view[self.end:])
+        self.end += received
+        return received
+
+    def feed(self, data: bytes):
+        """Append bytes obtained elsewhere (e.g. an asyncio reader)."""
+        self._reserve(len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def lines(self) -> Iterator[bytes]:
+        """Yield every complete line currently buffered, without the delimiter."""
+        while True:
+            index = self.buffer.find(self.DELIMITER, self.scan, self.end)
+            if index < 0:
+                # Resume next search just before the end in case the delimiter is split
+                self.scan = max(self.start, self.end - len(self.DELIMITER) + 1)
+                break
+            line = bytes(self.view[self.start:index])
+            self.start = self.scan = index + len(self.DELIMITER)
+            if line:
+                yield line
+        if self.start == self.end:
+            self.start = self.end = self.scan = 0
+
+    def reset(self):
+        """Drop any buffered data, e.g. after a reconnect."""
+        self.start = self.end = self.scan = 0
@@ -0,0 +1,80 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from app.logger import logger
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+DEFAULT_POOL_SIZE = 16  # Keep-alive connections per Betfair host
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+# ------------------------------------------------
+#               BetfairHttpClient Class
+# ------------------------------------------------
+class BetfairHttpClient:
+    """
+    Shared, non-blocking HTTP client for the Betfair JSON-RPC endpoints.
+
+    Each host (betting, account, ...) gets one requests.Session with a
+    keep-alive connection pool, so calls reuse warm TLS connections instead
+    of opening a new one per request. Requests run on a dedicated thread
+    pool sized to the pools, so `await client.post(...)` never blocks the
+    event loop and concurrent calls overlap on separate connections.
+
+    requests is kept instead of an asyncio HTTP library: it is already the
+    project's HTTP dependency and its connection pools are thread-safe.
+    """
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _session(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount(f"https://{host}", adapter)
+                self._sessions[host] = session
+                logger.info(f"Opened HTTP connection pool for {host} ({self.pool_size} connections)")
+            return session
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="betfair-http")
+            return self._executor
+
+    def post_sync(self, url: str, headers: Dict[str, str], json: Dict[str, Any]) -> requests.Response:
+        """Blocking POST over the pooled session for `url`'s host."""
+        return self._session(url).post(url, headers=headers, json=json, timeout=self.timeout)
+
+    async def post(self, url: str, headers: Dict[str, str], json: Dict[str, Any]) -> requests.Response:
+        """POST on the client's thread pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), lambda: self.post_sync(url, headers, json))
+
+    def close(self):
+        """Close all pooled connections. The client can be reused afterwards."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for session in sessions.values():
+            session.close()
+
+# Shared client used by all JSON-RPC helpers
+http_client = BetfairHttpClient()
@@ -0,0 +1,167 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Histogram bucket upper bounds in milliseconds (roughly 3 buckets per decade)
+DEFAULT_BUCKETS_MS = [
+    0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50,
+    100, 200, 500, 1000, 2000, 5000, 10000, 30000,
+]
+DEFAULT_HEARTBEAT_MS = 5000  # Betfair stream default heartbeatMs
+HEARTBEAT_GAP_FACTOR = 2  # A silence longer than this many heartbeats counts as a gap
+
+# ------------------------------------------------
+#               Histogram
+# ------------------------------------------------
+class Histogram:
+    """Fixed-bucket histogram of millisecond durations with approximate percentiles."""
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.buckets = list(buckets or DEFAULT_BUCKETS_MS)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of observations."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 4) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max, 4),
+        }
+
+# ------------------------------------------------
+#               Stream Metrics
+# ------------------------------------------------
+class StreamMetrics:
+    """
+    Latency and liveness metrics for one stream connection.
+
+    - latency: receive time minus the exchange publish time (`pt`)
+    - parse / handler: time spent in json.loads and in handle_message
+    - heartbeat gaps: silences longer than HEARTBEAT_GAP_FACTOR heartbeats
+    - gauges: callables sampled at snapshot time (e.g. queue depths)
+    """
+    def __init__(self, heartbeat_ms: int = DEFAULT_HEARTBEAT_MS):
+        self.heartbeat_ms = heartbeat_ms
+        self.latency = Histogram()
+        self.parse = Histogram()
+        self.handler = Histogram()
+        self.messages = 0
+        self.heartbeats = 0
+        self.heartbeat_gaps = 0
+        self.max_gap_ms = 0.0
+        self.last_message_at = None  # Epoch seconds
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        self.gauges[name] = read
+
+    def observe(self, message: Dict[str, Any], received_at: float, parse_seconds: float, handler_seconds: float):
+        """Record one message. `received_at` is epoch seconds."""
+        with self._lock:
+            self.messages += 1
+            if self.last_message_at is not None:
+                gap_ms = (received_at - self.last_message_at) * 1000
+                if gap_ms > self.max_gap_ms:
+                    self.max_gap_ms = gap_ms
+                if gap_ms > self.heartbeat_ms * HEARTBEAT_GAP_FACTOR:
+                    self.heartbeat_gaps += 1
+            self.last_message_at = received_at
+            if message.get('ct') == 'HEARTBEAT':
+                self.heartbeats += 1
+            publish_time = message.get('pt')
+            if publish_time is not None:
+                self.latency.observe(max(0.0, received_at * 1000 - publish_time))
+            self.parse.observe(parse_seconds * 1000)
+            self.handler.observe(handler_seconds * 1000)
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """True when nothing (not even a heartbeat) arrived for too long."""
+        if self.last_message_at is None:
+            return False
+        now = time.time() if now is None else now
+        return (now - self.last_message_at) * 1000 > self.heartbeat_ms * HEARTBEAT_GAP_FACTOR
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            result = {
+                "messages": self.messages,
+                "heartbeats": self.heartbeats,
+                "heartbeat_gaps": self.heartbeat_gaps,
+                "max_gap_ms": round(self.max_gap_ms, 1),
+                "seconds_since_last_message": round(now - self.last_message_at, 3) if self.last_message_at else None,
+                "stale": self.is_stale(now),
+                "latency": self.latency.snapshot(),
+                "parse": self.parse.snapshot(),
+                "handler": self.handler.snapshot(),
+            }
+        gauges = {}
+        for name, read in self.gauges.items():
+            try:
+                gauges[name] = read()
+            except Exception:
+                gauges[name] = None
+        result["gauges"] = gauges
+        return result
+
+# ------------------------------------------------
+#               Metrics Registry
+# ------------------------------------------------
+class MetricsRegistry:
+    """Named StreamMetrics of every live stream connection."""
+    def __init__(self):
+        self._metrics: Dict[str, StreamMetrics] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, metrics: StreamMetrics):
+        with self._lock:
+            self._metrics[name] = metrics
+
+    def unregister(self, name: str, metrics: Optional[StreamMetrics] = None):
+        """Remove `name`; with `metrics`, only if that is still what is registered under it."""
+        with self._lock:
+            if metrics is None or self._metrics.get(name) is metrics:
+                self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional[StreamMetrics]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._metrics.items())
+        return {name: metrics.snapshot() for name, metrics in items}
+
+# Shared registry read by the metrics endpoint
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,192 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+MAX_REF_LENGTH = 32  # Betfair limit for customerRef and customerOrderRef
+DUPLICATE_TRANSACTION = "DUPLICATE_TRANSACTION"
+
+def make_customer_ref(market_id: str, instructions: List[Dict[str, Any]], group: Optional[str] = None) -> str:
+    """
+    Deterministic customerRef for one placement group.
+
+    The same market, instructions and group always give the same reference,
+    so every retry of a placement carries it and the exchange can reject
+    re-submissions as duplicates. Callers pass a group that identifies the
+    decision (see `wager_group`) so a repeated call, e.g. a strategy re-run
+    after an error, is recognised too. Without a group a random one is used:
+    the reference is then only stable across the retries of one call.
+    """
+    group = group or uuid.uuid4().hex
+    key = json.dumps([market_id, instructions, group], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(key.encode()).hexdigest()[:MAX_REF_LENGTH]
+
+def wager_group(strategy: str, market_id: str) -> str:
+    """Placement group of a strategy's wager on a market, stable across repeated runs."""
+    return f"{strategy}:{market_id}"
+
+# ------------------------------------------------
+#               Placement Class
+# ------------------------------------------------
+class Placement:
+    """
+    One placeOrders request and everything learned about its outcome.
+
+    Each instruction is tagged with a customerOrderRef derived from the
+    customerRef, so orders that reached the exchange can be found with
+    listCurrentOrders after an attempt whose response was lost.
+
+    Attributes:
+        market_id (str): Market the orders are on
+        customer_ref (str): customerRef shared by every attempt
+        instructions (List[Dict]): Instructions with their customerOrderRef
+        reports (Dict): customerOrderRef -> instruction report
+        attempts (int): Requests sent so far
+    """
+    def __init__(self, market_id: str, instructions: List[Dict[str, Any]], customer_ref: str):
+        self.market_id = market_id
+        self.customer_ref = customer_ref
+        self.instructions = [
+            {**instruction, "customerOrderRef": self.order_ref(index)}
+            for index, instruction in enumerate(instructions)
+        ]
+        self.reports = {}
+        self.attempts = 0
+        self.reconciled = 0
+        self.created = time.time()
+
+    def order_ref(self, index: int) -> str:
+        return f"{self.customer_ref[:MAX_REF_LENGTH - 4]}-{index:03d}"
+
+    def order_refs(self) -> List[str]:
+        return [instruction["customerOrderRef"] for instruction in self.instructions]
+
+    def pending_instructions(self) -> List[Dict[str, Any]]:
+        """Instructions without a known outcome."""
+        return [instruction for instruction in self.instructions if instruction["customerOrderRef"] not in self.reports]
+
+    def request_ref(self) -> str:
+        """
+        customerRef for the next attempt: the original one while nothing has
+        been placed, a derived one when only the remaining legs are re-sent
+        (the original would be rejected as a duplicate).
+        """
+        if len(self.pending_instructions()) == len(self.instructions):
+            return self.customer_ref
+        return f"{self.customer_ref[:MAX_REF_LENGTH - 4]}-r{self.attempts:02d}"
+
+    @property
+    def settled(self) -> bool:
+        return not self.pending_instructions()
+
+    def record_result(self, sent: List[Dict[str, Any]], result: Dict[str, Any]):
+        """
+        Record the `result` of one placeOrders response for the instructions
+        it was sent with. Reports come back in instruction order; a failure
+        without reports applies to every instruction. Duplicates are left
+        pending for reconciliation.
+        """
+        reports = result.get("instructionReports") or [
+            {"status": result.get("status", "FAILURE"), "errorCode": result.get("errorCode")} for _ in sent
+        ]
+        for instruction, report in zip(sent, reports):
+            if report.get("errorCode") == DUPLICATE_TRANSACTION:
+                continue
+            self.reports[instruction["customerOrderRef"]] = {**report, "instruction": instruction}
+
+    def record_current_orders(self, current_orders: List[Dict[str, Any]]):
+        """Mark instructions found among the exchange's current orders as placed."""
+        instructions = {instruction["customerOrderRef"]: instruction for instruction in self.instructions}
+        for order in current_orders:
+            ref = order.get("customerOrderRef")
+            if ref not in instructions or ref in self.reports:
+                continue
+            self.reports[ref] = {
+                "status": "SUCCESS",
+                "instruction": instructions[ref],
+                "betId": order.get("betId"),
+                "placedDate": order.get("placedDate"),
+                "averagePriceMatched": order.get("averagePriceMatched", 0.0),
+                "sizeMatched": order.get("sizeMatched", 0.0),
+                "orderStatus": order.get("status"),
+                "reconciled": True,
+            }
+
+    def response(self) -> Dict[str, Any]:
+        """placeOrders-shaped response merging every attempt and reconciliation."""
+        reports = [
+            self.reports.get(ref, {"status": "FAILURE", "errorCode": "UNKNOWN", "instruction": instruction})
+            for ref, instruction in zip(self.order_refs(), self.instructions)
+        ]
+        success = all(report.get("status") == "SUCCESS" for report in reports)
+        return {
+            "result": {
+                "customerRef": self.customer_ref,
+                "marketId": self.market_id,
+                "status": "SUCCESS" if success else "FAILURE",
+                "instructionReports": reports,
+            }
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "customer_ref": self.customer_ref,
+            "market_id": self.market_id,
+            "order_refs": self.order_refs(),
+            "pending": len(self.pending_instructions()),
+            "attempts": self.attempts,
+            "reconciled": self.reconciled,
+            "created": self.created,
+        }
+
+# ------------------------------------------------
+#               Outstanding Orders Registry
+# ------------------------------------------------
+class OutstandingOrders:
+    """
+    Thread-safe registry of placements whose outcome is not yet known.
+
+    A placement is registered before its first request and resolved once
+    every instruction has a report. Placements left here after their retries
+    ran out may or may not have reached the exchange; they must be
+    reconciled against listCurrentOrders before anything is re-submitted.
+    """
+    def __init__(self):
+        self._placements = {}  # customer_ref -> Placement
+        self._lock = threading.Lock()
+
+    def register(self, market_id: str, instructions: List[Dict[str, Any]], group: Optional[str] = None) -> Placement:
+        """Return the placement for this group, creating it if it is not outstanding."""
+        customer_ref = make_customer_ref(market_id, instructions, group)
+        with self._lock:
+            placement = self._placements.get(customer_ref)
+            if placement is None:
+                placement = self._placements[customer_ref] = Placement(market_id, instructions, customer_ref)
+            return placement
+
+    def resolve(self, placement: Placement):
+        with self._lock:
+            self._placements.pop(placement.customer_ref, None)
+
+    def get(self, customer_ref: str) -> Optional[Placement]:
+        with self._lock:
+            return self._placements.get(customer_ref)
+
+    def outstanding(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [placement.to_dict() for placement in self._placements.values()]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._placements)
+
+# Shared registry used by order placement
+outstanding_orders = OutstandingOrders()
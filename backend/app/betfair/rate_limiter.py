@@ -0,0 +1,227 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.logger import logger
+from app.betfair.metrics import Histogram
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Request classes in strict priority order (lower value goes first)
+ORDER = 0
+PRICE = 1
+NAVIGATION = 2
+CLASS_NAMES = {ORDER: "order", PRICE: "price", NAVIGATION: "navigation"}
+
+# JSON-RPC method (without the API prefix) -> request class
+METHOD_CLASSES = {
+    "placeOrders": ORDER,
+    "cancelOrders": ORDER,
+    "replaceOrders": ORDER,
+    "updateOrders": ORDER,
+    "listCurrentOrders": ORDER,
+    "listMarketBook": PRICE,
+    "listRunnerBook": PRICE,
+    "getAccountFunds": PRICE,
+    "listEventTypes": NAVIGATION,
+    "listEvents": NAVIGATION,
+    "listMarketCatalogue": NAVIGATION,
+}
+
+# Token bucket (requests per second, burst) per request class
+DEFAULT_RATES = {
+    ORDER: (20.0, 20),
+    PRICE: (10.0, 10),
+    NAVIGATION: (5.0, 5),
+}
+# Seconds a request may wait for a slot before it is dropped (None: never dropped)
+DEFAULT_DEADLINES = {
+    ORDER: None,
+    PRICE: 5.0,
+    NAVIGATION: 10.0,
+}
+DEFAULT_MAX_IN_FLIGHT = 16  # Matches the HTTP client's pool size
+
+class RequestDeadlineExceeded(Exception):
+    """A queued request was dropped because it waited past its deadline."""
+
+def method_class(method: str) -> int:
+    """Request class of a JSON-RPC method such as `SportsAPING/v1.0/listMarketBook`."""
+    return METHOD_CLASSES.get(method.rsplit("/", 1)[-1], NAVIGATION)
+
+# ------------------------------------------------
+#               TokenBucket Class
+# ------------------------------------------------
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_token(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+# ------------------------------------------------
+#               RequestScheduler Class
+# ------------------------------------------------
+class _Waiter:
+    __slots__ = ("future", "loop", "request_class", "enqueued_at", "granted")
+
+    def __init__(self, future: asyncio.Future, loop: asyncio.AbstractEventLoop, request_class: int):
+        self.future = future
+        self.loop = loop
+        self.request_class = request_class
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+class RequestScheduler:
+    """
+    Rate limiting and strict-priority scheduling of Betfair API calls.
+
+    Each request class (order, price, navigation) has its own token bucket.
+    Whenever a slot frees up, queued order operations are released before
+    price reads, and price reads before navigation calls; at most
+    `max_in_flight` requests run at once. Reads that wait longer than their
+    class deadline are dropped with RequestDeadlineExceeded instead of being
+    sent stale.
+
+    Callers may live on different event loops (API server, the client's
+    background loop), so the queues are guarded by a thread lock and waiters
+    are woken on their own loop.
+    """
+    def __init__(self, rates: Optional[Dict[int, tuple]] = None, deadlines: Optional[Dict[int, Optional[float]]] = None,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        rates = {**DEFAULT_RATES, **(rates or {})}
+        self.buckets = {request_class: TokenBucket(rate, burst) for request_class, (rate, burst) in rates.items()}
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.max_in_flight = max_in_flight
+        self.queues = {request_class: deque() for request_class in CLASS_NAMES}
+        self.in_flight = 0
+        self.completed = {request_class: 0 for request_class in CLASS_NAMES}
+        self.dropped = {request_class: 0 for request_class in CLASS_NAMES}
+        self.wait_times = {request_class: Histogram() for request_class in CLASS_NAMES}
+        self._wakeup_at = None
+        self._lock = threading.Lock()
+
+    async def run(self, method: str, operation: Callable[[], Awaitable[Any]], deadline: Optional[float] = None):
+        """
+        Wait for a slot for `method`, then return `await operation()`.
+        `deadline` overrides the class deadline in seconds.
+        """
+        request_class = method_class(method)
+        await self.acquire(request_class, deadline if deadline is not None else self.deadlines.get(request_class))
+        try:
+            return await operation()
+        finally:
+            self.release(request_class)
+
+    async def acquire(self, request_class: int, deadline: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future(), loop, request_class)
+        with self._lock:
+            self.queues[request_class].append(waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self.queues[request_class].remove(waiter)
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.dropped[request_class] += 1
+            if granted:
+                # Granted while timing out: hand the slot back
+                self.release(request_class)
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning(f"Dropped {CLASS_NAMES[request_class]} request after waiting {deadline}s for a slot")
+                raise RequestDeadlineExceeded(f"{CLASS_NAMES[request_class]} request waited more than {deadline}s") from None
+            raise
+
+    def release(self, request_class: int):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed[request_class] += 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant slots in strict priority order while capacity and tokens allow."""
+        with self._lock:
+            now = time.monotonic()
+            next_token = None
+            for request_class, queue in self.queues.items():
+                bucket = self.buckets[request_class]
+                while queue and self.in_flight < self.max_in_flight:
+                    if not bucket.try_acquire(now):
+                        wait = bucket.time_until_token(now)
+                        if next_token is None or wait < next_token[0]:
+                            next_token = (wait, queue[0].loop)
+                        break
+                    waiter = queue.popleft()
+                    waiter.granted = True
+                    self.in_flight += 1
+                    self.wait_times[request_class].observe((now - waiter.enqueued_at) * 1000)
+                    self._call_soon(waiter.loop, self._grant, waiter.future)
+            if next_token is not None:
+                wait, loop = next_token
+                due = now + wait
+                if self._wakeup_at is None or due < self._wakeup_at or self._wakeup_at < now:
+                    # Re-dispatch when the next token of a blocked class is available
+                    self._wakeup_at = due
+                    self._call_soon(loop, loop.call_later, wait, self._wakeup)
+
+    def _wakeup(self):
+        with self._lock:
+            self._wakeup_at = None
+        self._dispatch()
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback, *args):
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # The caller's loop has been closed; nobody is waiting any more
+
+    @staticmethod
+    def _grant(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "classes": {
+                    name: {
+                        "queued": len(self.queues[request_class]),
+                        "completed": self.completed[request_class],
+                        "dropped": self.dropped[request_class],
+                        "tokens": round(self.buckets[request_class].tokens, 2),
+                        "wait": self.wait_times[request_class].snapshot(),
+                    }
+                    for request_class, name in CLASS_NAMES.items()
+                },
+            }
+
+# Shared scheduler for every JSON-RPC call
+request_scheduler = RequestScheduler()
@@ -0,0 +1,153 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import gzip
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from app.logger import logger
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Transport-level messages that are not acted on during replay (they would
+# trigger authentication against the live exchange)
+CONTROL_OPS = ("connection", "status")
+
+# ------------------------------------------------
+#               Stream Recorder
+# ------------------------------------------------
+class StreamRecorder:
+    """
+    Append-only, gzip-compressed journal of raw stream lines.
+
+    Each record is `<receive time in epoch seconds> <raw JSON line>\\n`.
+    Opening an existing journal appends a new gzip member, which readers
+    handle transparently, so a journal can span several sessions.
+    """
+    def __init__(self, path: str, compresslevel: int = 6):
+        self.path = path
+        self.file = gzip.open(path, "ab", compresslevel=compresslevel)
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def record(self, line: bytes, received_at: Optional[float] = None):
+        """Write one raw stream line (without the CRLF delimiter)."""
+        timestamp = time.time() if received_at is None else received_at
+        with self._lock:
+            self.file.write(b"%.6f %s\n" % (timestamp, line))
+            self.records += 1
+
+    def flush(self):
+        with self._lock:
+            self.file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self.file.closed:
+                self.file.close()
+        logger.info(f"Stream journal {self.path} closed after {self.records} records")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_journal(path: str) -> Iterator[Tuple[float, bytes]]:
+    """Yield (receive time, raw line) pairs from a journal."""
+    with gzip.open(path, "rb") as file:
+        for record in file:
+            timestamp, _, line = record.rstrip(b"\n").partition(b" ")
+            if line:
+                yield float(timestamp), line
+
+# ------------------------------------------------
+#               Replay Engine
+# ------------------------------------------------
+class StreamReplayer:
+    """
+    Feed a journal back through `BetfairStream.process_line`.
+
+    Each recorded line takes the live path: parsing, handling and metrics,
+    with its recorded receive time, so latency figures match the session.
+    `speed` is a multiple of real time: 1.0 replays at the recorded pace,
+    10.0 ten times faster, and None replays as fast as possible.
+    Recording is off during replay, and connection and status messages are
+    not acted on so no live authentication is attempted.
+    """
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        if speed is not None and speed <= 0:
+            raise ValueError("Replay speed must be positive, or None for maximum speed")
+        self.path = path
+        self.speed = speed
+
+    @staticmethod
+    @contextmanager
+    def _replaying(stream):
+        """Turn recording off and put the stream in replay mode for the duration."""
+        recorder, stream.recorder, stream.replaying = stream.recorder, None, True
+        try:
+            yield stream
+        finally:
+            stream.recorder, stream.replaying = recorder, False
+
+    @staticmethod
+    def _handle(stream, line: bytes, received_at: float) -> bool:
+        """Process one line like the live stream. Returns False for control messages."""
+        return stream.process_line(line, received_at).get("op") not in CONTROL_OPS
+
+    def _delay(self, timestamp: float, first_timestamp: float, started: float) -> float:
+        """Seconds to wait before the record at `timestamp` is due."""
+        if self.speed is None:
+            return 0.0
+        due = started + (timestamp - first_timestamp) / self.speed
+        return due - time.perf_counter()
+
+    @staticmethod
+    def _stats(messages: int, handler_time: float, elapsed: float, first: Optional[float], last: Optional[float]) -> Dict[str, Any]:
+        return {
+            "messages": messages,
+            "elapsed_seconds": elapsed,
+            "recorded_seconds": (last - first) if first is not None else 0.0,
+            "messages_per_second": messages / elapsed if elapsed > 0 else 0.0,
+            "mean_handler_us": handler_time / messages * 1e6 if messages else 0.0,
+        }
+
+    def replay(self, stream) -> Dict[str, Any]:
+        """Replay synchronously on the calling thread."""
+        messages, handler_time, first = 0, 0.0, None
+        timestamp = None
+        started = time.perf_counter()
+        with self._replaying(stream):
+            for timestamp, line in read_journal(self.path):
+                if first is None:
+                    first = timestamp
+                delay = self._delay(timestamp, first, started)
+                if delay > 0:
+                    time.sleep(delay)
+                handler_started = time.perf_counter()
+                if self._handle(stream, line, timestamp):
+                    handler_time += time.perf_counter() - handler_started
+                    messages += 1
+        return self._stats(messages, handler_time, time.perf_counter() - started, first, timestamp)
+
+    async def replay_async(self, stream) -> Dict[str, Any]:
+        """Replay on the event loop, yielding between paced records."""
+        messages, handler_time, first = 0, 0.0, None
+        timestamp = None
+        started = time.perf_counter()
+        with self._replaying(stream):
+            for timestamp, line in read_journal(self.path):
+                if first is None:
+                    first = timestamp
+                delay = self._delay(timestamp, first, started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                handler_started = time.perf_counter()
+                if self._handle(stream, line, timestamp):
+                    handler_time += time.perf_counter() - handler_started
+                    messages += 1
+        return self._stats(messages, handler_time, time.perf_counter() - started, first, timestamp)
@@ -0,0 +1,98 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+from array import array
+from typing import Any, Dict, List, Optional
+
+# ------------------------------------------------
+#               Runner Records
+# ------------------------------------------------
+class RunnerRecord:
+    """
+    Compact runner from a `listMarketBook` response.
+
+    Ladder levels are kept as parallel `array('d')` columns (best level
+    first) instead of lists of {"price", "size"} dicts.
+    """
+    __slots__ = (
+        "selection_id", "status", "last_price_traded", "total_matched",
+        "back_prices", "back_sizes", "lay_prices", "lay_sizes",
+        "traded_prices", "traded_sizes",
+    )
+
+    def __init__(self, selection_id: int, status: Optional[str] = None,
+                 last_price_traded: Optional[float] = None, total_matched: float = 0.0):
+        self.selection_id = selection_id
+        self.status = status
+        self.last_price_traded = last_price_traded
+        self.total_matched = total_matched
+        self.back_prices = array("d")
+        self.back_sizes = array("d")
+        self.lay_prices = array("d")
+        self.lay_sizes = array("d")
+        self.traded_prices = array("d")
+        self.traded_sizes = array("d")
+
+    @property
+    def best_back_price(self) -> Optional[float]:
+        return self.back_prices[0] if self.back_prices else None
+
+    @property
+    def best_lay_price(self) -> Optional[float]:
+        return self.lay_prices[0] if self.lay_prices else None
+
+    @property
+    def best_back_size(self) -> Optional[float]:
+        return self.back_sizes[0] if self.back_sizes else None
+
+    @property
+    def best_lay_size(self) -> Optional[float]:
+        return self.lay_sizes[0] if self.lay_sizes else None
+
+    def __repr__(self):
+        return f"RunnerRecord({self.selection_id}, back={self.best_back_price}, lay={self.best_lay_price})"
+
+class MarketBookRecord:
+    """Compact market book: market fields plus a list of RunnerRecord."""
+    __slots__ = ("market_id", "status", "inplay", "total_matched", "runners")
+
+    def __init__(self, market_id: str, status: Optional[str] = None, inplay: bool = False,
+                 total_matched: float = 0.0, runners: Optional[List[RunnerRecord]] = None):
+        self.market_id = market_id
+        self.status = status
+        self.inplay = inplay
+        self.total_matched = total_matched
+        self.runners = runners or []
+
+    def active_runners(self) -> List[RunnerRecord]:
+        return [runner for runner in self.runners if runner.status == "ACTIVE"]
+
+    def __repr__(self):
+        return f"MarketBookRecord({self.market_id}, {self.status}, {len(self.runners)} runners)"
+
+# ------------------------------------------------
+#               Parsing
+# ------------------------------------------------
+def _fill_levels(levels: List[Dict[str, float]], prices: array, sizes: array):
+    for level in levels:
+        prices.append(level["price"])
+        sizes.append(level.get("size", 0.0))
+
+def parse_runner(runner: Dict[str, Any]) -> RunnerRecord:
+    record = RunnerRecord(
+        runner["selectionId"], runner.get("status"),
+        runner.get("lastPriceTraded"), runner.get("totalMatched", 0.0)
+    )
+    exchange = runner.get("ex", runner)  # Stream cache books carry the ladders on the runner itself
+    if exchange:
+        _fill_levels(exchange.get("availableToBack", ()), record.back_prices, record.back_sizes)
+        _fill_levels(exchange.get("availableToLay", ()), record.lay_prices, record.lay_sizes)
+        _fill_levels(exchange.get("tradedVolume", ()), record.traded_prices, record.traded_sizes)
+    return record
+
+def parse_market_book(book: Dict[str, Any]) -> MarketBookRecord:
+    """Parse one `listMarketBook` result entry (or a stream cache market book)."""
+    return MarketBookRecord(
+        book["marketId"], book.get("status"), book.get("inplay", False),
+        book.get("totalMatched", 0.0), [parse_runner(runner) for runner in book.get("runners", ())]
+    )
@@ -0,0 +1,287 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import requests
+from fastapi import HTTPException
+from app.logger import logger
+from app.betfair.auth import session_manager
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Betfair API error codes worth retrying: throttling, transient server
+# conditions and rejected sessions (check_rpc_error replaces the session
+# before the retry)
+RETRIABLE_ERROR_CODES = {
+    "TOO_MANY_REQUESTS",
+    "SERVICE_BUSY",
+    "TIMEOUT_ERROR",
+    "UNEXPECTED_ERROR",
+    "INVALID_SESSION_INFORMATION",
+    "NO_SESSION",
+    "DUPLICATE_TRANSACTION",  # Order placement reconciles before re-sending
+}
+# HTTP statuses worth retrying
+RETRIABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+# Statuses/codes that prove the exchange did not process the request, so
+# even non-idempotent calls (placeOrders) can be safely retried
+REJECTED_HTTP_STATUSES = {429, 503}
+REJECTED_ERROR_CODES = {"TOO_MANY_REQUESTS", "SERVICE_BUSY", "INVALID_SESSION_INFORMATION", "NO_SESSION"}
+# Codes meaning the exchange rejected the session token itself
+SESSION_ERROR_CODES = {"INVALID_SESSION_INFORMATION", "NO_SESSION"}
+
+DEFAULT_RETRIES = 3
+DEFAULT_BASE_DELAY = 0.5  # Seconds; backoff cap doubles per attempt
+DEFAULT_MAX_DELAY = 8.0
+RETRY_BUDGET_RATE = 1.0  # Retries per second earned back
+RETRY_BUDGET_BURST = 10
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive transient failures before opening
+BREAKER_RESET_TIMEOUT = 30.0  # Seconds open before a trial call is let through
+
+# ------------------------------------------------
+#               Exceptions
+# ------------------------------------------------
+class BetfairAPIError(Exception):
+    """
+    Error returned by a Betfair JSON-RPC call.
+
+    Attributes:
+        error_code (str): APING error code (e.g. TOO_MANY_REQUESTS), if any
+        rpc_code (int): JSON-RPC error code (e.g. -32099)
+    """
+    def __init__(self, message: str, error_code: Optional[str] = None, rpc_code: Optional[int] = None):
+        super().__init__(message)
+        self.error_code = error_code
+        self.rpc_code = rpc_code
+
+    @classmethod
+    def from_response(cls, error: Dict[str, Any]) -> "BetfairAPIError":
+        """Build from the `error` member of a JSON-RPC response."""
+        data = error.get("data") or {}
+        exception = data.get("APINGException") or data.get("AccountAPINGException") or {}
+        error_code = exception.get("errorCode")
+        message = exception.get("errorDetails") or error.get("message") or error_code or "Betfair API error"
+        return cls(message, error_code, error.get("code"))
+
+class CircuitOpenError(Exception):
+    """The endpoint's circuit breaker is open; the call was not attempted."""
+
+def check_rpc_error(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Raise BetfairAPIError when a JSON-RPC response carries an error. When the
+    session was rejected, the cached token is dropped and a login started, so
+    a retry goes out with a new token instead of the one just rejected.
+    """
+    if isinstance(result, dict) and result.get("error"):
+        error = BetfairAPIError.from_response(result["error"])
+        if error.error_code in SESSION_ERROR_CODES:
+            logger.warning(f"Betfair session rejected ({error.error_code}), logging in again")
+            session_manager.invalidate()
+            session_manager.start_refresh()
+        raise error
+    return result
+
+def is_retriable(error: BaseException, idempotent: bool = True) -> bool:
+    """
+    Classify an exception. Non-idempotent calls are only retried when the
+    error proves the exchange rejected the request without processing it.
+    """
+    if isinstance(error, BetfairAPIError):
+        codes = RETRIABLE_ERROR_CODES if idempotent else REJECTED_ERROR_CODES
+        return error.error_code in codes
+    if isinstance(error, HTTPException):
+        statuses = RETRIABLE_HTTP_STATUSES if idempotent else REJECTED_HTTP_STATUSES
+        return error.status_code in statuses
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError, ConnectionError)):
+        # A timed-out order may still have been placed
+        return idempotent
+    return False  # Bad arguments, validation failures, bugs, stale reads
+
+# ------------------------------------------------
+#               Retry Budget
+# ------------------------------------------------
+class RetryBudget:
+    """
+    Process-wide token bucket for retries. During an outage every caller
+    retries at once; the budget caps the extra load so retries cannot
+    multiply traffic against a struggling API.
+    """
+    def __init__(self, rate: float = RETRY_BUDGET_RATE, burst: int = RETRY_BUDGET_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+# ------------------------------------------------
+#               Circuit Breaker
+# ------------------------------------------------
+class CircuitBreaker:
+    """
+    Per-endpoint breaker: CLOSED -> OPEN after `failure_threshold`
+    consecutive transient failures; OPEN fails fast for `reset_timeout`
+    seconds, then HALF_OPEN lets one trial call through, whose outcome
+    closes or re-opens the circuit. A trial that ends without an outcome
+    (cancelled, or an unclassified error) is released so another can run.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[bool, bool]:
+        """(allowed, trial): whether a call may go ahead, and whether it is the half-open trial."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True, False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True, True
+            self.rejected += 1
+            return False, False
+
+    def allow(self) -> bool:
+        return self.acquire()[0]
+
+    def release_trial(self):
+        """Let another trial through if the current one ended without recording an outcome."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
+
+# ------------------------------------------------
+#               Retry Policy
+# ------------------------------------------------
+class RetryPolicy:
+    """
+    Retry with classification, a shared budget, full-jitter exponential
+    backoff and per-endpoint circuit breakers.
+
+    Usage:
+        result = await retry_policy.call(operation, endpoint="listMarketBook")
+    """
+    def __init__(self, retries: int = DEFAULT_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, budget: Optional[RetryBudget] = None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(endpoint)
+            return self.breakers[endpoint]
+
+    def backoff(self, attempt: int, base_delay: Optional[float] = None) -> float:
+        """Full jitter: uniform between 0 and the exponential cap."""
+        base = self.base_delay if base_delay is None else base_delay
+        return random.uniform(0, min(self.max_delay, base * (2 ** attempt)))
+
+    async def call(self, operation, *args, endpoint: str = "default", retries: Optional[int] = None,
+                   base_delay: Optional[float] = None, idempotent: bool = True):
+        """
+        Await `operation(*args)` with retries. Fatal errors are raised
+        immediately, as are transient ones once retries or the budget run out.
+        A falsy result counts as a transient failure.
+        """
+        retries = self.retries if retries is None else retries
+        breaker = self.breaker(endpoint)
+        for attempt in range(retries):
+            allowed, trial = breaker.acquire()
+            if not allowed:
+                raise CircuitOpenError(f"Circuit for {endpoint} is open")
+            try:
+                result = await operation(*args)
+            except Exception as e:
+                if not is_retriable(e, idempotent):
+                    # The endpoint answered; a fatal error says nothing about its health
+                    if isinstance(e, (BetfairAPIError, HTTPException)):
+                        breaker.record_success()
+                    raise
+                breaker.record_failure()
+                logger.warning(f"{endpoint} attempt {attempt + 1}/{retries} failed: {e}")
+                error = e
+            else:
+                breaker.record_success()
+                if result:
+                    return result
+                logger.warning(f"{endpoint} returned no result, attempt {attempt + 1}/{retries}")
+                error = None
+            finally:
+                if trial:
+                    # No-op once an outcome was recorded; frees the slot after cancellation or unclassified errors
+                    breaker.release_trial()
+            if attempt == retries - 1:
+                break
+            if not self.budget.try_spend():
+                logger.warning(f"Retry budget exhausted, not retrying {endpoint}")
+                break
+            await asyncio.sleep(self.backoff(attempt, base_delay))
+        if error is not None:
+            raise error
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+        return {"budget_tokens": round(self.budget.tokens, 2), "budget_exhausted": self.budget.exhausted,
+                "breakers": breakers}
+
+# Shared policy for all Betfair API calls
+retry_policy = RetryPolicy()
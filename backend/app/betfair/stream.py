@@ -1,28 +1,61 @@
+import itertools
 import json
 import socket
 import ssl
 import threading
-from app.betfair.auth import BetfairAuthManager
+import time
+from app.betfair.auth import session_manager
 from app.logger import logger
 from app.betfair.utils import get_headers
+from app.betfair.cache import market_cache, order_cache
+from app.betfair.framing import LineFramer
+from app.betfair.metrics import StreamMetrics, metrics_registry
+
+_stream_numbers = itertools.count(1)  # Keeps metrics registry keys unique per instance
+CONFIRM_INTERVAL = 1.0  # Seconds between confirmations that the subscribed books are live
 
 class BetfairStream:
-    def __init__(self):
+    def __init__(self, cache=None, subscription_id=1, recorder=None, conflate_ms=None, orders=None, metrics_name=None):
         self.host = 'stream-api.betfair.com'
         self.port = 443
         self.buf_size = 8192
+        self.reconnect_delay = 2
         self.running = False
+        self.authenticated = False
         self.socket = None
         self.ssl_socket = None
         self.connection_id = None
         self.initialClk = None
         self.clk = None
+        self.market_cache = cache if cache is not None else market_cache
+        self.order_cache = orders if orders is not None else order_cache
+        self.order_subscribed = False
+        self.order_initial_clk = None
+        self.order_clk = None
+        self.subscription_id = subscription_id
+        self.market_ids = []
+        self.confirmed_at = 0.0  # Monotonic time the subscribed books were last confirmed live
+        self.message_count = 0
+        self.segments = {}  # op -> messages of a segmented image being assembled
+        self.recorder = recorder  # Optional StreamRecorder journaling raw lines
+        self.replaying = False  # Set by StreamReplayer: connection/status messages are not acted on
+        self.conflate_ms = conflate_ms  # Exchange-side conflation window
+        self.market_listeners = []  # Callables notified with each changed market ID
+        self.change_listeners = []  # Callables notified with the (mc, pt) changes of each message
+        self.metrics = StreamMetrics()
+        self.metrics_name = metrics_name or f"stream-{subscription_id}-{next(_stream_numbers)}"
 
     def create_socket(self):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.ssl_socket = ssl.wrap_socket(self.socket)
         self.ssl_socket.connect((self.host, self.port))
 
+    def refresh_session(self):
+        """Replace the rejected session token and authenticate again (blocks the receive thread)."""
+        session_manager.invalidate()
+        session_manager.get_token_sync()
+        self.authenticate()
+
     def authenticate(self):
         headers = get_headers()
         auth_message = {
@@ -32,69 +65,240 @@ class BetfairStream:
         }
         self.send_message(auth_message)
 
-    def subscribe_to_markets(self, market_ids):
+    def add_market_listener(self, listener):
+        """Call `listener(market_id)` after every applied change to a market."""
+        self.market_listeners.append(listener)
+
+    def add_change_listener(self, listener):
+        """Call `listener(changes)` with the raw (mc, pt) pairs of every applied mcm message."""
+        self.change_listeners.append(listener)
+
+    def subscribe_to_markets(self, market_ids, conflate_ms=None):
+        """
+        Subscribe to the given markets. Before authentication completes the
+        market IDs are only stored; they are sent once the session is accepted,
+        and re-sent with the stored clocks after every reconnect.
+
+        `conflate_ms` asks the exchange to conflate updates over that window;
+        it is kept for later resubscriptions.
+        """
+        if conflate_ms is not None:
+            self.conflate_ms = conflate_ms
+        # Stored clocks are only valid for the market set they were issued for
+        if set(market_ids) != set(self.market_ids):
+            self.initialClk = None
+            self.clk = None
+        self.market_ids = list(market_ids)
+        if not self.authenticated:
+            logger.info("Subscription deferred until the stream is authenticated")
+            return
         subscribe_message = {
             "op": "marketSubscription",
-            "id": 1,
-            "marketFilter": {"marketIds": market_ids},
+            "id": self.subscription_id,
+            "marketFilter": {"marketIds": self.market_ids},
             "marketDataFilter": {"fields": ["EX_BEST_OFFERS", "EX_TRADED", "MARKET_STATE"]}
         }
+        if self.conflate_ms is not None:
+            subscribe_message["conflateMs"] = self.conflate_ms
         if self.initialClk and self.clk:
+            # Resume: the exchange only sends what changed since these clocks
             subscribe_message["initialClk"] = self.initialClk
             subscribe_message["clk"] = self.clk
         self.send_message(subscribe_message)
 
+    def subscribe_to_orders(self):
+        """
+        Subscribe to our own orders. Like market subscriptions it is deferred
+        until authentication and resumed with the stored clocks on reconnect.
+        """
+        self.order_subscribed = True
+        if not self.authenticated:
+            logger.info("Order subscription deferred until the stream is authenticated")
+            return
+        subscribe_message = {
+            "op": "orderSubscription",
+            "id": self.subscription_id,
+            "orderFilter": {"includeOverallPosition": False},
+            "segmentationEnabled": True
+        }
+        if self.order_initial_clk and self.order_clk:
+            subscribe_message["initialClk"] = self.order_initial_clk
+            subscribe_message["clk"] = self.order_clk
+        self.send_message(subscribe_message)
+
     def send_message(self, message):
         message_str = json.dumps(message) + '\r\n'
         self.ssl_socket.send(message_str.encode())
 
     def receive_messages(self):
+        framer = LineFramer(self.buf_size)
         while self.running:
             try:
-                data = self.ssl_socket.recv(self.buf_size).decode()
-                if data:
-                    messages = data.split('\r\n')
-                    for message in messages:
-                        if message:
-                            self.handle_message(json.loads(message))
+                if not framer.recv_into(self.ssl_socket):
+                    raise ConnectionError("Stream connection closed by server")
+                for line in framer.lines():
+                    self.process_line(line)
             except Exception as e:
+                if not self.running:
+                    break
                 logger.error(f"Error receiving message: {e}")
+                framer.reset()
                 self.reconnect()
 
+    def process_line(self, line, received_at=None):
+        """Journal (when recording), parse and handle one raw stream line."""
+        if received_at is None:
+            received_at = time.time()
+        if self.recorder is not None:
+            self.recorder.record(line, received_at)
+        parse_started = time.perf_counter()
+        message = json.loads(line)
+        handler_started = time.perf_counter()
+        self.handle_message(message)
+        handler_finished = time.perf_counter()
+        self.metrics.observe(message, received_at, handler_started - parse_started, handler_finished - handler_started)
+        return message
+
     def handle_message(self, message):
+        self.message_count += 1
         if message.get('op') == 'connection':
+            if self.replaying:
+                return
             self.connection_id = message.get('connectionId')
+            self.authenticated = False
             logger.info(f"Connected with ID: {self.connection_id}")
             self.authenticate()
         elif message.get('op') == 'status':
+            if self.replaying:
+                return
             if message.get('statusCode') == 'SUCCESS':
-                logger.info("Successfully authenticated")
+                if not self.authenticated:
+                    logger.info("Successfully authenticated")
+                    self.authenticated = True
+                    if self.market_ids:
+                        self.subscribe_to_markets(self.market_ids)
+                    if self.order_subscribed:
+                        self.subscribe_to_orders()
             elif message.get('errorCode') == 'INVALID_SESSION_INFORMATION':
                 logger.warning("Session expired. Refreshing...")
-                BetfairAuthManager.login()
-                self.authenticate()
+                self.refresh_session()
+            else:
+                logger.error(f"Stream error: {message.get('errorCode')} {message.get('errorMessage')}")
         elif message.get('op') == 'mcm':
-            self.initialClk = message.get('initialClk', self.initialClk)
-            self.clk = message.get('clk', self.clk)
+            self.handle_market_change_message(message)
+        elif message.get('op') == 'ocm':
+            self.handle_order_change_message(message)
         elif message.get('ct') == 'HEARTBEAT':
             logger.info("Heartbeat received.")
         else:
             logger.info(f"Market data received: {message}")
 
+    def assemble_segments(self, message):
+        """
+        Buffer segmented images (SEG_START/SEG/SEG_END). Returns the complete
+        list of messages to apply, or None while a segmented image is incomplete.
+        """
+        op = message.get('op')
+        segment_type = message.get('segmentType')
+        if segment_type == 'SEG_START':
+            self.segments[op] = [message]
+            return None
+        if segment_type == 'SEG':
+            if op in self.segments:
+                self.segments[op].append(message)
+            return None
+        if segment_type == 'SEG_END':
+            if op not in self.segments:
+                logger.warning("Received SEG_END without SEG_START, discarding segment")
+                return None
+            return self.segments.pop(op) + [message]
+        return [message]
+
+    def handle_market_change_message(self, message):
+        """
+        Apply an mcm message. Segmented images are applied in one step so
+        readers never see half an image, and the clocks only advance once the
+        whole image has arrived.
+        """
+        messages = self.assemble_segments(message)
+        if messages is None:
+            return
+
+        if message.get('ct') in ('SUB_IMAGE', 'RESUB_DELTA'):
+            logger.info(f"Subscription {message.get('ct')} received")
+        changes = [(market_change, part.get('pt')) for part in messages for market_change in part.get('mc', [])]
+        self.market_cache.apply_market_changes(changes)
+        for part in messages:
+            self.initialClk = part.get('initialClk', self.initialClk)
+            self.clk = part.get('clk', self.clk)
+        # Any mcm (heartbeats included) shows the subscription is live, so
+        # books without changes of their own are still current
+        now = time.monotonic()
+        if now - self.confirmed_at >= CONFIRM_INTERVAL:
+            self.confirmed_at = now
+            self.market_cache.touch(self.market_ids)
+        for listener in self.change_listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                logger.error(f"Error in change listener: {e}")
+        if self.market_listeners:
+            for market_id in dict.fromkeys(market_change['id'] for market_change, _ in changes):
+                for listener in self.market_listeners:
+                    try:
+                        listener(market_id)
+                    except Exception as e:
+                        logger.error(f"Error in market listener for {market_id}: {e}")
+
+    def handle_order_change_message(self, message):
+        """Apply an ocm message (order fills and status) to the order cache."""
+        messages = self.assemble_segments(message)
+        if messages is None:
+            return
+        self.order_cache.apply_order_changes([order_change for part in messages for order_change in part.get('oc', [])])
+        for part in messages:
+            self.order_initial_clk = part.get('initialClk', self.order_initial_clk)
+            self.order_clk = part.get('clk', self.order_clk)
+
+    def mark_markets_stale(self):
+        """Hide this stream's books from readers until it updates or confirms them again."""
+        self.confirmed_at = 0.0
+        self.market_cache.mark_stale(self.market_ids)
+
     def reconnect(self):
+        """
+        Re-open the connection from the receive thread. The subscription is
+        resumed with the stored clocks once the new session is authenticated.
+        """
         logger.info("Reconnecting...")
-        self.stop()
-        self.start()
+        self.authenticated = False
+        self.segments = {}
+        self.mark_markets_stale()
+        if self.ssl_socket:
+            try:
+                self.ssl_socket.close()
+            except OSError:
+                pass
+        time.sleep(self.reconnect_delay)
+        try:
+            self.create_socket()
+        except OSError as e:
+            logger.error(f"Reconnect failed: {e}")
 
     def start(self):
         self.running = True
+        metrics_registry.register(self.metrics_name, self.metrics)
         self.create_socket()
         self.receive_thread = threading.Thread(target=self.receive_messages)
         self.receive_thread.start()
 
     def stop(self):
         self.running = False
+        self.authenticated = False
+        self.mark_markets_stale()
+        metrics_registry.unregister(self.metrics_name, self.metrics)
         if self.ssl_socket:
             self.ssl_socket.close()
-        if hasattr(self, 'receive_thread'):
-            self.receive_thread.join()
+        receive_thread = getattr(self, 'receive_thread', None)
+        if receive_thread and receive_thread is not threading.current_thread():
+            receive_thread.join()
@@ -0,0 +1,219 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import time
+import zlib
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from app.logger import logger
+from app.betfair.async_stream import AsyncBetfairStream
+from app.betfair.cache import market_cache
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+MAX_MARKETS_PER_CONNECTION = 200  # Betfair default market subscription limit
+DEFAULT_CONNECTIONS = 2
+REBALANCE_INTERVAL_SECONDS = 60
+RATE_WINDOW_SECONDS = 60  # Message rates are averaged over this window
+RATE_SAMPLE_INTERVAL_SECONDS = 5
+
+# ------------------------------------------------
+#               StreamManager Class
+# ------------------------------------------------
+class StreamManager:
+    """
+    Shards market subscriptions across several stream connections.
+
+    Each market is placed on the connection given by a stable hash of its ID,
+    so the same market always lands on the same connection while there is
+    room. If that connection is full the next one with spare capacity is used.
+    Every connection keeps its own subscription id and `clk`/`initialClk`.
+    Closed markets are dropped and their connections resubscribed by
+    `rebalance()`, which also runs periodically once started. Connections
+    are only opened while they have markets to stream.
+    """
+    def __init__(self, connections: int = DEFAULT_CONNECTIONS,
+                 max_markets_per_connection: int = MAX_MARKETS_PER_CONNECTION,
+                 cache=None, conflate_ms: Optional[int] = None,
+                 stream_factory: Optional[Callable[[int], AsyncBetfairStream]] = None):
+        if connections < 1:
+            raise ValueError("At least one stream connection is required")
+        self.market_cache = cache if cache is not None else market_cache
+        self.max_markets_per_connection = max_markets_per_connection
+        stream_factory = stream_factory or (
+            lambda index: AsyncBetfairStream(cache=self.market_cache, subscription_id=index + 1, conflate_ms=conflate_ms)
+        )
+        self.streams = [stream_factory(index) for index in range(connections)]
+        self.shards = [set() for _ in self.streams]  # connection index -> market ids
+        self.assignments = {}  # market_id -> connection index
+        self.running = False
+        self.rebalance_task = None
+        self.sample_task = None
+        started = time.monotonic()
+        self._rate_samples = [deque([(started, 0)]) for _ in self.streams]  # (time, message_count) per connection
+
+    # ------------------------------------------------
+    #               Shard Placement
+    # ------------------------------------------------
+    @staticmethod
+    def home_shard(market_id: str, connections: int) -> int:
+        """Stable connection index for a market ID (independent of process hash seed)."""
+        return zlib.crc32(market_id.encode()) % connections
+
+    def _place(self, market_id: str) -> int:
+        home = self.home_shard(market_id, len(self.streams))
+        for offset in range(len(self.streams)):
+            index = (home + offset) % len(self.streams)
+            if len(self.shards[index]) < self.max_markets_per_connection:
+                return index
+        raise ValueError(
+            f"Stream capacity exhausted: {len(self.streams)} connections x "
+            f"{self.max_markets_per_connection} markets"
+        )
+
+    async def _resubscribe(self, indexes: Iterable[int]):
+        """
+        Send the current market set of each changed connection.
+
+        An empty market filter would subscribe to everything, so connections
+        left without markets are stopped and restarted when they get new ones.
+        """
+        if not self.running:
+            return
+        for index in sorted(set(indexes)):
+            stream = self.streams[index]
+            if not self.shards[index]:
+                if stream.running:
+                    logger.info(f"Stream {index} has no markets left, closing it")
+                    await stream.stop()
+                continue
+            if not stream.running:
+                await stream.start()
+            stream.subscribe_to_markets(sorted(self.shards[index]))
+            logger.info(f"Stream {index} subscribed to {len(self.shards[index])} markets")
+
+    # ------------------------------------------------
+    #               Market Management
+    # ------------------------------------------------
+    async def add_markets(self, market_ids: Iterable[str]) -> List[str]:
+        """Subscribe new markets. Returns markets that did not fit."""
+        changed, rejected = set(), []
+        for market_id in market_ids:
+            if market_id in self.assignments:
+                continue
+            try:
+                index = self._place(market_id)
+            except ValueError as e:
+                logger.warning(f"Cannot subscribe market {market_id}: {e}")
+                rejected.append(market_id)
+                continue
+            self.shards[index].add(market_id)
+            self.assignments[market_id] = index
+            changed.add(index)
+        await self._resubscribe(changed)
+        return rejected
+
+    async def remove_markets(self, market_ids: Iterable[str]):
+        """Unsubscribe markets and drop them from the cache."""
+        changed = set()
+        for market_id in market_ids:
+            index = self.assignments.pop(market_id, None)
+            if index is None:
+                continue
+            self.shards[index].discard(market_id)
+            self.market_cache.remove(market_id)
+            changed.add(index)
+        await self._resubscribe(changed)
+
+    async def rebalance(self):
+        """Drop closed markets and move displaced markets back to their home connection."""
+        closed = [market_id for market_id in self.market_cache.closed_market_ids() if market_id in self.assignments]
+        if closed:
+            logger.info(f"Removing {len(closed)} closed markets from the stream")
+        changed = set()
+        for market_id in closed:
+            index = self.assignments.pop(market_id)
+            self.shards[index].discard(market_id)
+            self.market_cache.remove(market_id)
+            changed.add(index)
+
+        for market_id, index in list(self.assignments.items()):
+            home = self.home_shard(market_id, len(self.streams))
+            if index != home and len(self.shards[home]) < self.max_markets_per_connection:
+                self.shards[index].discard(market_id)
+                self.shards[home].add(market_id)
+                self.assignments[market_id] = home
+                changed.update((index, home))
+        await self._resubscribe(changed)
+
+    # ------------------------------------------------
+    #               Monitoring
+    # ------------------------------------------------
+    def sample_rates(self, now: Optional[float] = None):
+        """Record each connection's message count, keeping one sample older than the rate window."""
+        now = time.monotonic() if now is None else now
+        for index, stream in enumerate(self.streams):
+            samples = self._rate_samples[index]
+            samples.append((now, stream.message_count))
+            while len(samples) > 1 and samples[1][0] <= now - RATE_WINDOW_SECONDS:
+                samples.popleft()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Per-connection market count, clocks and message rate over about the
+        last RATE_WINDOW_SECONDS (since start-up until sampling has run that
+        long). Reading does not change any state.
+        """
+        now = time.monotonic()
+        result = []
+        for index, stream in enumerate(self.streams):
+            first_time, first_count = self._rate_samples[index][0]
+            elapsed = now - first_time
+            rate = (stream.message_count - first_count) / elapsed if elapsed > 0 else 0.0
+            result.append({
+                "connection": index,
+                "subscription_id": stream.subscription_id,
+                "running": stream.running,
+                "markets": len(self.shards[index]),
+                "initial_clk": stream.initialClk,
+                "clk": stream.clk,
+                "messages": stream.message_count,
+                "messages_per_second": round(rate, 2),
+            })
+        return result
+
+    # ------------------------------------------------
+    #               Lifecycle
+    # ------------------------------------------------
+    async def _rebalance_loop(self, interval: float):
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebalance()
+            except Exception as e:
+                logger.error(f"Error rebalancing streams: {e}")
+
+    async def _sample_loop(self, interval: float):
+        while self.running:
+            await asyncio.sleep(interval)
+            self.sample_rates()
+
+    async def start(self, rebalance_interval: float = REBALANCE_INTERVAL_SECONDS):
+        """Connect the streams that have markets, subscribe them and start rebalancing and rate sampling."""
+        self.running = True
+        active = [index for index, shard in enumerate(self.shards) if shard]
+        await asyncio.gather(*(self.streams[index].start() for index in active))
+        await self._resubscribe(active)
+        self.rebalance_task = asyncio.create_task(self._rebalance_loop(rebalance_interval))
+        self.sample_task = asyncio.create_task(self._sample_loop(RATE_SAMPLE_INTERVAL_SECONDS))
+
+    async def stop(self):
+        self.running = False
+        tasks = [task for task in (self.rebalance_task, self.sample_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.rebalance_task, self.sample_task = None, None
+        await asyncio.gather(*(stream.stop() for stream in self.streams if stream.running))
@@ -0,0 +1,141 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+# Slots per level: seconds, minutes, hours, days with one-second ticks
+DEFAULT_WHEEL_SLOTS = (60, 60, 24, 7)
+
+# ------------------------------------------------
+#               Timer Class
+# ------------------------------------------------
+class Timer:
+    """One scheduled deadline (in ticks) and the slot currently holding it."""
+    __slots__ = ("key", "deadline", "payload", "level", "slot")
+
+    def __init__(self, key: Hashable, deadline: int, payload: Any = None):
+        self.key = key
+        self.deadline = deadline
+        self.payload = payload
+        self.level = None
+        self.slot = None
+
+    def __repr__(self):
+        return f"Timer({self.key!r}, deadline={self.deadline})"
+
+# ------------------------------------------------
+#               HierarchicalTimingWheel Class
+# ------------------------------------------------
+class HierarchicalTimingWheel:
+    """
+    Hierarchical timing wheel over integer ticks.
+
+    Level 0 has one slot per tick; each slot of level n spans a full turn of
+    level n-1. A timer goes into the lowest level whose range covers its
+    deadline, so scheduling, rescheduling and cancelling are O(1) and a
+    timer far in the future is touched only when its coarse slot comes
+    round and it cascades one level down. Deadlines beyond the top level's
+    range wait there and are re-filed on each turn. Timers are keyed;
+    scheduling an existing key moves it. Not thread-safe.
+
+        wheel = HierarchicalTimingWheel(now)
+        wheel.schedule(market_id, now + 600)
+        due = wheel.advance(now + 1)  # List of expired timers
+    """
+    def __init__(self, current: int = 0, slots: Tuple[int, ...] = DEFAULT_WHEEL_SLOTS):
+        self.current = current
+        self.slots = slots
+        self.spans = []  # Ticks per slot at each level
+        span = 1
+        for size in slots:
+            self.spans.append(span)
+            span *= size
+        self.levels: List[List[Dict[Hashable, Timer]]] = [[{} for _ in range(size)] for size in slots]
+        self.overdue: Dict[Hashable, Timer] = {}  # Scheduled at or before `current`
+        self._timers: Dict[Hashable, Timer] = {}
+        self.cascaded = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def get(self, key: Hashable) -> Optional[Timer]:
+        return self._timers.get(key)
+
+    def _file(self, timer: Timer):
+        delta = timer.deadline - self.current
+        if delta <= 0:
+            timer.level, timer.slot = None, None
+            self.overdue[timer.key] = timer
+            return
+        level = 0
+        while level < len(self.slots) - 1 and delta >= self.spans[level] * self.slots[level]:
+            level += 1
+        slot = (timer.deadline // self.spans[level]) % self.slots[level]
+        timer.level, timer.slot = level, slot
+        self.levels[level][slot][timer.key] = timer
+
+    def _unfile(self, timer: Timer):
+        if timer.level is None:
+            self.overdue.pop(timer.key, None)
+        else:
+            self.levels[timer.level][timer.slot].pop(timer.key, None)
+
+    def schedule(self, key: Hashable, deadline: int, payload: Any = None) -> Timer:
+        """Schedule (or move) the timer for `key` to expire at tick `deadline`."""
+        timer = self._timers.get(key)
+        if timer is not None:
+            self._unfile(timer)
+            timer.deadline, timer.payload = deadline, payload
+        else:
+            timer = self._timers[key] = Timer(key, deadline, payload)
+        self._file(timer)
+        return timer
+
+    def cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        self._unfile(timer)
+        return True
+
+    def advance(self, tick: int) -> List[Timer]:
+        """Move the wheel forward to `tick` and return every timer that expired, earliest first."""
+        expired = list(self.overdue.values())
+        self.overdue.clear()
+        if not self._timers or tick <= self.current:
+            self.current = max(self.current, tick)
+            for timer in expired:
+                del self._timers[timer.key]
+            return expired
+        while self.current < tick:
+            self.current += 1
+            # Cascade every coarser slot that starts at this tick, top level first
+            for level in range(len(self.slots) - 1, 0, -1):
+                if self.current % self.spans[level]:
+                    continue
+                slot = (self.current // self.spans[level]) % self.slots[level]
+                bucket = self.levels[level][slot]
+                if bucket:
+                    self.levels[level][slot] = {}
+                    self.cascaded += len(bucket)
+                    for timer in bucket.values():
+                        self._file(timer)
+            bucket = self.levels[0][self.current % self.slots[0]]
+            if bucket:
+                self.levels[0][self.current % self.slots[0]] = {}
+                expired.extend(bucket.values())
+            if self.overdue:
+                expired.extend(self.overdue.values())
+                self.overdue.clear()
+            if len(expired) == len(self._timers):
+                self.current = tick  # Nothing left to expire on the way
+        for timer in expired:
+            del self._timers[timer.key]
+        expired.sort(key=lambda timer: timer.deadline)
+        return expired
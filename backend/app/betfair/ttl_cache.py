@@ -0,0 +1,102 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL = 300  # Seconds
+# Navigation data changes rarely; event types almost never
+NAVIGATION_TTLS = {
+    "listEventTypes": 3600,
+    "listEvents": 300,
+    "listMarketCatalogue": 300,
+}
+
+# ------------------------------------------------
+#               TTLCache Class
+# ------------------------------------------------
+class TTLCache:
+    """
+    Bounded cache with per-method time-to-live and LRU eviction.
+
+    Entries are keyed by (method, key). Each method has its own TTL
+    (`ttls`, falling back to `default_ttl`); when `maxsize` is reached the
+    least recently used entry is evicted. Thread-safe.
+    """
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, method: str, key: Hashable) -> Optional[Any]:
+        """Cached value, or None when missing or expired."""
+        entry_key = (method, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[entry_key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, method: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttls.get(method, self.default_ttl)
+        entry_key = (method, key)
+        with self._lock:
+            self._entries[entry_key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, method: Optional[str] = None, key: Optional[Hashable] = None) -> int:
+        """
+        Drop one entry (method and key), all entries of a method, or
+        everything (no arguments). Returns the number of entries removed.
+        """
+        with self._lock:
+            if method is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            elif key is not None:
+                removed = 1 if self._entries.pop((method, key), None) is not None else 0
+            else:
+                stale = [entry_key for entry_key in self._entries if entry_key[0] == method]
+                for entry_key in stale:
+                    del self._entries[entry_key]
+                removed = len(stale)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+# Shared cache for event types, events and market catalogues
+navigation_cache = TTLCache(ttls=NAVIGATION_TTLS)
@@ -1,13 +1,21 @@
 # ------------------------------------------------
 #                     Imports
 # ------------------------------------------------
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
-import requests
 import os
+import json
+import time
 from dotenv import load_dotenv
 from app.logger import logger
-from app.betfair.auth import BetfairAuthManager
+from app.betfair.auth import BetfairAuthManager, session_manager
+from app.betfair.http import http_client
+from app.betfair.cache import market_cache
+from app.betfair.ttl_cache import navigation_cache
+from app.betfair.rate_limiter import request_scheduler, RequestDeadlineExceeded
+from app.betfair.records import MarketBookRecord, parse_market_book
+from app.betfair.retry import retry_policy, check_rpc_error, BetfairAPIError, CircuitOpenError
+from app.betfair.orders import DUPLICATE_TRANSACTION, Placement, outstanding_orders
 import asyncio
 
 # ------------------------------------------------
@@ -17,17 +25,32 @@ import asyncio
 load_dotenv()
 api_key = os.getenv("BETFAIR_API_KEY")
 BETFAIR_API_URL = "https://api.betfair.com/exchange/betting/json-rpc/v1"
+BETFAIR_ACCOUNT_URL = "https://api.betfair.com/exchange/account/json-rpc/v1"
+
+# listMarketBook data-weight limit and weight per market of each price projection
+MAX_DATA_WEIGHT = 200
+BASE_MARKET_WEIGHT = 2  # Market book without price data
+PRICE_DATA_WEIGHTS = {
+    "SP_AVAILABLE": 3,
+    "SP_TRADED": 7,
+    "EX_BEST_OFFERS": 5,
+    "EX_ALL_OFFERS": 17,
+    "EX_TRADED": 17,
+}
+# Combinations the exchange weighs below the sum of their parts
+COMBINED_PRICE_DATA_WEIGHTS = {
+    frozenset({"EX_BEST_OFFERS", "EX_TRADED"}): 20,
+    frozenset({"EX_ALL_OFFERS", "EX_TRADED"}): 32,
+}
+DEFAULT_PRICE_PROJECTION = {"priceData": ["EX_BEST_OFFERS"]}
+MAX_CONCURRENT_BOOK_REQUESTS = 8
+MARKET_BOOK_FRESHNESS = 0.2  # Seconds a completed market book is shared with later callers
 
 # ------------------------------------------------
 #               Utility Functions
 # ------------------------------------------------
-def get_headers():
-    """ Generate headers for Betfair API calls."""
-    session_token = BetfairAuthManager.get_token()
-    if not session_token:
-        logger.warning("Session token missing, re-authenticating...")
-        BetfairAuthManager.login()
-        session_token = BetfairAuthManager.get_token()
+def build_headers(session_token: str) -> Dict[str, str]:
+    """ Headers for Betfair API calls made with `session_token`."""
     return {
         "X-Authentication": session_token,
         "X-Application": api_key,
@@ -36,6 +59,23 @@ def get_headers():
         "Content-Type": "application/json",
     }
 
+def get_headers():
+    """ Generate headers for Betfair API calls (blocking; for code on its own thread)."""
+    return build_headers(BetfairAuthManager.get_token())
+
+async def get_headers_async():
+    """ Generate headers for Betfair API calls without blocking the event loop on a login."""
+    return build_headers(await session_manager.get_token())
+
+async def post_rpc(url: str, payload: Dict[str, Any]):
+    """
+    POST a JSON-RPC payload over the pooled client once the request scheduler
+    grants its method a slot (orders before prices before navigation).
+    """
+    async def operation():
+        return await http_client.post(url, headers=await get_headers_async(), json=payload)
+    return await request_scheduler.run(payload["method"], operation)
+
 def handle_api_error(response):
     """ Handle API errors from Betfair responses. """
     if response.status_code != 200:
@@ -45,31 +85,109 @@ def handle_api_error(response):
 # ------------------------------------------------
 #               Retry Mechanism
 # ------------------------------------------------
-async def fetch_with_retry(operation, *args, retries=3, delay=2):
+async def fetch_with_retry(operation, *args, retries=3, delay=None, endpoint="default", idempotent=True):
     """
-    Execute an operation with exponential backoff retry logic.
+    Execute an operation through the shared retry policy: only transient
+    errors are retried, with jittered exponential backoff, within the global
+    retry budget and the endpoint's circuit breaker.
     
     Args:
         operation: Function to execute
         *args: Arguments for the operation
-        retries (int): Number of retry attempts
-        delay (int): Base delay between retries in seconds
+        retries (int): Maximum number of attempts
+        delay (float): Base delay for the backoff in seconds (policy default if None)
+        endpoint (str): API method name, keys the circuit breaker
+        idempotent (bool): False for calls that are only safe to retry when
+            the exchange provably rejected the request
         
     Returns:
         Any: Result of the operation if successful
-        None: If all retries fail
+        None: If all retries fail, the error is fatal or the circuit is open
     """
-    for i in range(retries):
-        try:
-            result = await operation(*args)
-            if result:
-                return result
-            logger.warning(f"Operation returned no result, attempt {i+1}/{retries}")
-        except Exception as e:
-            logger.warning(f"Retry {i+1}/{retries} failed: {str(e)}")
-            if i < retries - 1:  # Don't sleep on the last iteration
-                await asyncio.sleep(delay * (2 ** i))  # Exponential backoff
-    return None
+    try:
+        return await retry_policy.call(operation, *args, endpoint=endpoint, retries=retries,
+                                       base_delay=delay, idempotent=idempotent)
+    except RequestDeadlineExceeded:
+        return None  # A stale read is not worth retrying
+    except CircuitOpenError as e:
+        logger.warning(str(e))
+        return None
+    except Exception as e:
+        logger.error(f"{endpoint} failed: {e}")
+        return None
+
+# ------------------------------------------------
+#               Request Coalescing
+# ------------------------------------------------
+class SingleFlight:
+    """
+    Coalesce identical in-flight read calls.
+
+    Concurrent callers asking for the same (method, params) await one shared
+    task instead of each sending the request. With a freshness window, a
+    successful result is also handed to callers arriving shortly after it
+    completed. Only use it for read methods; shared results must be treated
+    as read-only by callers.
+    """
+    def __init__(self):
+        self.in_flight = {}  # key -> running task
+        self.recent = {}  # key -> (monotonic expiry time, result)
+        self.calls = 0
+        self.shared = 0
+
+    @staticmethod
+    def make_key(method: str, params: Dict[str, Any]) -> str:
+        return f"{method}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    async def do(self, method: str, params: Dict[str, Any], operation, freshness: float = 0.0):
+        """Return `await operation()`, sharing it with identical concurrent calls."""
+        key = self.make_key(method, params)
+        self.calls += 1
+        if freshness > 0:
+            cached = self.recent.get(key)
+            if cached and time.monotonic() < cached[0]:
+                self.shared += 1
+                return cached[1]
+        loop = asyncio.get_running_loop()
+        task = self.in_flight.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.shared += 1
+        else:
+            task = loop.create_task(operation())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._completed(key, done, freshness))
+        # Shielded so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _completed(self, key: str, task: asyncio.Task, freshness: float):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if freshness > 0 and not task.cancelled() and task.exception() is None and task.result():
+            now = time.monotonic()
+            # Drop expired entries so the table does not grow with every market seen
+            self.recent = {k: v for k, v in self.recent.items() if v[0] > now}
+            self.recent[key] = (now + freshness, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self.in_flight)}
+
+# Shared by all read helpers below
+single_flight = SingleFlight()
+
+async def cached_read(method: str, params: Dict[str, Any], operation):
+    """
+    Navigation reads (event types, events, catalogues): served from the TTL
+    cache when fresh, otherwise fetched once via single-flight and cached.
+    Error responses are never cached.
+    """
+    key = SingleFlight.make_key(method, params)
+    cached = navigation_cache.get(method, key)
+    if cached is not None:
+        return cached
+    result = await single_flight.do(method, params, operation)
+    if result and "result" in result:
+        navigation_cache.set(method, key, result)
+    return result
 
 # ------------------------------------------------
 #               Event Retrieval Functions
@@ -83,10 +201,10 @@ async def list_event_types():
         "id": 1
     }
     async def fetch_event_types():
-        response = requests.post(BETFAIR_API_URL, headers=get_headers(), json=payload)
+        response = await post_rpc(BETFAIR_API_URL, payload)
         handle_api_error(response)
-        return response.json()
-    return await fetch_with_retry(fetch_event_types)
+        return check_rpc_error(response.json())
+    return await cached_read("listEventTypes", payload["params"], lambda: fetch_with_retry(fetch_event_types, endpoint="listEventTypes"))
 
 async def list_events(event_type_id: int):
     """ Fetch events (NBA games) for a given event type ID. """
@@ -97,14 +215,38 @@ async def list_events(event_type_id: int):
         "id": 1
     }
     async def fetch_events():
-        response = requests.post(BETFAIR_API_URL, headers=get_headers(), json=payload)
+        response = await post_rpc(BETFAIR_API_URL, payload)
         handle_api_error(response)
-        return response.json()
-    return await fetch_with_retry(fetch_events)
+        return check_rpc_error(response.json())
+    return await cached_read("listEvents", payload["params"], lambda: fetch_with_retry(fetch_events, endpoint="listEvents"))
 
 # ------------------------------------------------
 #               Market Data Functions
 # ------------------------------------------------
+def format_market_data(market_id: str, book: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Format one market book (a `listMarketBook` result entry) for the betting
+    strategies: active runners with their best back and lay odds.
+    """
+    if not book:
+        return {"market_id": market_id, "runners": [], "total_matched": 0}
+
+    record = parse_market_book(book)
+    runners = [
+        {
+            "selection_id": runner.selection_id,
+            "back_odds": runner.best_back_price,
+            "lay_odds": runner.best_lay_price
+        }
+        for runner in record.active_runners()
+        if runner.back_prices or runner.lay_prices
+    ]
+    return {
+        "market_id": market_id,
+        "runners": runners,
+        "total_matched": record.total_matched
+    }
+
 async def _fetch_market_data_async(market_id: str):
     """
     Fetch market data and format it for betting strategies.
@@ -116,53 +258,19 @@ async def _fetch_market_data_async(market_id: str):
         if not market_book or "result" not in market_book or not market_book["result"]:
             logger.error("Failed to fetch market book data")
             return {"runners": []}
-        
-        # Extract runners from the first market
-        runners_data = market_book["result"][0].get("runners", [])
-        
-        # Process runners to extract back and lay odds
-        runners = []
-        for runner in runners_data:
-            selection_id = runner.get("selectionId")
-            status = runner.get("status")
-            
-            if status != "ACTIVE":
-                continue
-                
-            # Extract best back and lay prices
-            exchange_data = runner.get("ex", {})
-            back_prices = exchange_data.get("availableToBack", [])
-            lay_prices = exchange_data.get("availableToLay", [])
-            
-            back_odds = back_prices[0].get("price") if back_prices else None
-            lay_odds = lay_prices[0].get("price") if lay_prices else None
-            
-            if back_odds or lay_odds:
-                runners.append({
-                    "selection_id": selection_id,
-                    "back_odds": back_odds,
-                    "lay_odds": lay_odds
-                })
-        
-        return {
-            "market_id": market_id,
-            "runners": runners,
-            "total_matched": market_book["result"][0].get("totalMatched", 0)
-        }
+        return format_market_data(market_id, market_book["result"][0])
     except Exception as e:
         logger.error(f"Error fetching market data: {str(e)}")
         return {"runners": []}
 
 def fetch_market_data(market_id: str):
     """
-    Synchronous version of fetch_market_data.
+    Synchronous version of fetch_market_data. Runs on the shared client's
+    background loop, so it also works when called from inside a running loop.
     """
+    from app.betfair.client import betfair_client
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(_fetch_market_data_async(market_id))
-        loop.close()
-        return result
+        return betfair_client.sync.get_market_data(market_id)
     except Exception as e:
         logger.error(f"Error in fetch_market_data: {str(e)}")
         return {
@@ -185,32 +293,267 @@ async def list_market_catalogue(event_id: str, max_results: int = 10):
         "id": 1
     }
     async def fetch_market_catalogue():
-        response = requests.post(BETFAIR_API_URL, headers=get_headers(), json=payload)
+        response = await post_rpc(BETFAIR_API_URL, payload)
         handle_api_error(response)
-        return response.json()
-    return await fetch_with_retry(fetch_market_catalogue)
+        return check_rpc_error(response.json())
+    return await cached_read("listMarketCatalogue", payload["params"], lambda: fetch_with_retry(fetch_market_catalogue, endpoint="listMarketCatalogue"))
 
-async def list_market_book(market_id: str):
-    """ Fetch real-time odds for a given market. """
+async def list_market_catalogue_by_filter(market_filter: Dict[str, Any], max_results: int = 200,
+                                          market_projection: Optional[List[str]] = None, sort: str = "FIRST_TO_START"):
+    """
+    Fetch one page of market catalogue entries matching a MarketFilter.
+    Not cached: market discovery needs to see new markets as they appear.
+
+    Args:
+        market_filter: Betfair MarketFilter (eventTypeIds, marketTypeCodes, marketStartTime, ...)
+        max_results: Page size (at most 1000)
+        market_projection: Catalogue fields to include
+        sort: MarketSort order
+    """
+    payload = {
+        "jsonrpc": "2.0",
+        "method": "SportsAPING/v1.0/listMarketCatalogue",
+        "params": {
+            "filter": market_filter,
+            "marketProjection": market_projection or ["EVENT", "EVENT_TYPE", "MARKET_START_TIME"],
+            "sort": sort,
+            "maxResults": max_results
+        },
+        "id": 1
+    }
+    async def fetch_market_catalogue():
+        response = await post_rpc(BETFAIR_API_URL, payload)
+        handle_api_error(response)
+        return check_rpc_error(response.json())
+    return await fetch_with_retry(fetch_market_catalogue, endpoint="listMarketCatalogue")
+
+async def list_market_book(market_id: str, price_projection: Optional[Dict[str, Any]] = None):
+    """ Fetch real-time odds for a given market (see `build_price_projection`). """
     payload = {
         "jsonrpc": "2.0",
         "method": "SportsAPING/v1.0/listMarketBook",
         "params": {
             "marketIds": [market_id],
-            "priceProjection": {"priceData": ["EX_BEST_OFFERS"]}
+            "priceProjection": price_projection or DEFAULT_PRICE_PROJECTION
         },
         "id": 1
     }
     async def fetch_market_book():
-        response = requests.post(BETFAIR_API_URL, headers=get_headers(), json=payload)
+        response = await post_rpc(BETFAIR_API_URL, payload)
         handle_api_error(response)
-        return response.json()
-    return await fetch_with_retry(fetch_market_book)
+        return check_rpc_error(response.json())
+    return await single_flight.do(
+        "listMarketBook", payload["params"], lambda: fetch_with_retry(fetch_market_book, endpoint="listMarketBook"), freshness=MARKET_BOOK_FRESHNESS
+    )
+
+def build_price_projection(best_prices_depth: Optional[int] = None, virtualise: bool = False,
+                           traded: bool = False, all_offers: bool = False) -> Dict[str, Any]:
+    """
+    Build a listMarketBook price projection.
+
+    Args:
+        best_prices_depth (int): Ladder levels per side (Betfair default is 3)
+        virtualise (bool): Include virtual (cross-matched) prices
+        traded (bool): Include EX_TRADED volume by price
+        all_offers (bool): Full ladder (EX_ALL_OFFERS) instead of best offers
+    """
+    price_data = ["EX_ALL_OFFERS" if all_offers else "EX_BEST_OFFERS"]
+    if traded:
+        price_data.append("EX_TRADED")
+    projection = {"priceData": price_data}
+    if best_prices_depth is not None and not all_offers:
+        projection["exBestOffersOverrides"] = {"bestPricesDepth": best_prices_depth}
+    if virtualise:
+        projection["virtualise"] = True
+    return projection
+
+# Top-of-book only: all the strategies' market data needs when scanning
+SCAN_PRICE_PROJECTION = build_price_projection(best_prices_depth=1)
+
+def market_book_weight(price_projection: Optional[Dict[str, Any]] = None) -> float:
+    """Data weight of one market in a listMarketBook request with this price projection."""
+    price_data = frozenset((price_projection or {}).get("priceData") or [])
+    if not price_data:
+        return BASE_MARKET_WEIGHT
+    weight = 0
+    for combination, combined_weight in COMBINED_PRICE_DATA_WEIGHTS.items():
+        if combination <= price_data:
+            weight += combined_weight
+            price_data = price_data - combination
+    weight += sum(PRICE_DATA_WEIGHTS.get(price, 0) for price in price_data)
+    # Best-offer weights assume the default depth of 3 and scale with deeper ladders
+    depth = ((price_projection or {}).get("exBestOffersOverrides") or {}).get("bestPricesDepth")
+    if depth and depth > 3 and "EX_BEST_OFFERS" in (price_projection.get("priceData") or []):
+        weight *= depth / 3
+    return weight
+
+def chunk_market_ids(market_ids: List[str], price_projection: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+    """Split market IDs into requests that stay within MAX_DATA_WEIGHT."""
+    per_request = max(1, int(MAX_DATA_WEIGHT // market_book_weight(price_projection)))
+    return [market_ids[i:i + per_request] for i in range(0, len(market_ids), per_request)]
+
+async def list_market_books(market_ids: List[str], price_projection: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch many market books with as few requests as the data-weight limit allows.
+
+    The market IDs are split into weight-respecting chunks which are fetched
+    concurrently. Returns market ID -> market book (one `listMarketBook`
+    result entry); markets whose chunk failed are missing from the result.
+    """
+    price_projection = price_projection or DEFAULT_PRICE_PROJECTION
+    market_ids = list(dict.fromkeys(market_ids))
+    chunks = chunk_market_ids(market_ids, price_projection)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BOOK_REQUESTS)
+
+    async def fetch_chunk(chunk: List[str]):
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "SportsAPING/v1.0/listMarketBook",
+            "params": {"marketIds": chunk, "priceProjection": price_projection},
+            "id": 1
+        }
+        async def fetch_market_books():
+            response = await post_rpc(BETFAIR_API_URL, payload)
+            handle_api_error(response)
+            return check_rpc_error(response.json())
+        async with semaphore:
+            return await single_flight.do(
+                "listMarketBook", payload["params"], lambda: fetch_with_retry(fetch_market_books, endpoint="listMarketBook"), freshness=MARKET_BOOK_FRESHNESS
+            )
+
+    responses = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+    market_books = {}
+    for chunk, response in zip(chunks, responses):
+        if not response or "result" not in response:
+            logger.error(f"Failed to fetch market books for {len(chunk)} markets: {(response or {}).get('error')}")
+            continue
+        for book in response["result"]:
+            market_books[book["marketId"]] = book
+    logger.info(f"Fetched {len(market_books)}/{len(market_ids)} market books in {len(chunks)} requests")
+    return market_books
+
+async def list_market_book_records(market_ids: List[str], price_projection: Optional[Dict[str, Any]] = None) -> Dict[str, MarketBookRecord]:
+    """Batched market books parsed into compact MarketBookRecord objects."""
+    market_books = await list_market_books(market_ids, price_projection)
+    return {market_id: parse_market_book(book) for market_id, book in market_books.items()}
+
+async def get_all_market_data(market_ids: Optional[List[str]] = None,
+                              price_projection: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Strategy-formatted market data (see `format_market_data`) for many
+    markets in batched requests. Defaults to every market in the stream cache,
+    fetched with the top-of-book SCAN_PRICE_PROJECTION.
+    """
+    if market_ids is None:
+        market_ids = market_cache.market_ids()
+    market_books = await list_market_books(market_ids, price_projection or SCAN_PRICE_PROJECTION)
+    return {market_id: format_market_data(market_id, market_books.get(market_id)) for market_id in market_ids}
 
 # ------------------------------------------------
 #               Bet Placement Functions
 # ------------------------------------------------
-async def place_bet(market_id: str, selection_id: int, side: str, size: float, price: float):
+def limit_order_instruction(selection_id: int, side: str, size: float, price: float) -> Dict[str, Any]:
+    """
+    Build one LIMIT placeOrders instruction, validating stake and odds.
+
+    Raises:
+        HTTPException: If the stake or odds are invalid
+    """
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Stake must be greater than zero.")
+    if price <= 1.01:
+        raise HTTPException(status_code=400, detail="Odds must be greater than 1.01.")
+    return {
+        "selectionId": selection_id,
+        "handicap": 0,
+        "side": side,
+        "orderType": "LIMIT",
+        "limitOrder": {
+            "size": size,
+            "price": price,
+            "persistenceType": "LAPSE"
+        }
+    }
+
+async def reconcile_placement(placement: Placement):
+    """
+    Look up the placement's orders on the exchange and mark those that were
+    placed, so only the missing instructions are re-submitted.
+
+    Raises:
+        BetfairAPIError: If the current orders cannot be fetched; re-sending
+            without knowing what was placed could double the exposure
+    """
+    pending = [instruction["customerOrderRef"] for instruction in placement.pending_instructions()]
+    response = await list_current_orders([placement.market_id], pending)
+    if not response or "result" not in response:
+        raise BetfairAPIError(f"Could not reconcile placement {placement.customer_ref}", "UNRECONCILED")
+    placement.record_current_orders(response["result"].get("currentOrders", []))
+    placement.reconciled += 1
+    logger.info(f"Reconciled placement {placement.customer_ref}: "
+                f"{len(placement.instructions) - len(placement.pending_instructions())} of {len(placement.instructions)} orders known")
+
+async def place_orders(market_id: str, instructions: List[Dict[str, Any]], group: Optional[str] = None):
+    """
+    Place several orders on one market in a single placeOrders request.
+
+    All legs of a dutch wager reach the exchange together instead of one
+    round-trip apart. The response carries one instruction report per
+    instruction, in instruction order.
+
+    Every attempt carries the placement's deterministic customerRef, and
+    every instruction a customerOrderRef. After an attempt with an unknown
+    outcome (timeout, lost response, duplicate rejection) the placement is
+    reconciled against listCurrentOrders and only the missing instructions
+    are re-sent, so placement can be retried like any idempotent call.
+
+    Args:
+        market_id: Betfair market ID
+        instructions: Instructions built with `limit_order_instruction`
+        group: Placement group; calls with the same market, instructions
+            and group share one customerRef. If None a random group is used
+            and only the retries within this call are idempotent.
+
+    Returns:
+        Dict containing the API response
+    """
+    if not instructions:
+        raise HTTPException(status_code=400, detail="At least one order instruction is required.")
+    placement = outstanding_orders.register(market_id, instructions, group)
+
+    async def place_orders_operation():
+        if placement.attempts:
+            # The previous attempt may have placed some or all of the orders
+            await reconcile_placement(placement)
+        pending = placement.pending_instructions()
+        if pending:
+            payload = {
+                "jsonrpc": "2.0",
+                "method": "SportsAPING/v1.0/placeOrders",
+                "params": {
+                    "marketId": market_id,
+                    "instructions": pending,
+                    "customerRef": placement.request_ref()
+                },
+                "id": 1
+            }
+            placement.attempts += 1
+            response = await post_rpc(BETFAIR_API_URL, payload)
+            handle_api_error(response)
+            placement.record_result(pending, check_rpc_error(response.json()).get("result") or {})
+            if not placement.settled:
+                raise BetfairAPIError(f"Placement {placement.customer_ref} rejected as duplicate", DUPLICATE_TRANSACTION)
+        outstanding_orders.resolve(placement)
+        return placement.response()
+    return await fetch_with_retry(place_orders_operation, endpoint="placeOrders")
+
+def get_instruction_reports(response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Instruction reports of a placeOrders response (empty if the call failed)."""
+    result = (response or {}).get("result") or {}
+    return result.get("instructionReports") or []
+
+async def place_bet(market_id: str, selection_id: int, side: str, size: float, price: float,
+                    group: Optional[str] = None):
     """
     Place a bet on the Betfair exchange.
     
@@ -220,39 +563,128 @@ async def place_bet(market_id: str, selection_id: int, side: str, size: float, p
         side: BACK or LAY
         size: Stake amount
         price: Odds
+        group: Placement group (see `place_orders`)
         
     Returns:
         Dict containing the API response
     """
-    if size <= 0:
-        raise HTTPException(status_code=400, detail="Stake must be greater than zero.")
-    if price <= 1.01:
+    return await place_orders(market_id, [limit_order_instruction(selection_id, side, size, price)], group)
+
+# ------------------------------------------------
+#               Order Management Functions
+# ------------------------------------------------
+async def list_current_orders(market_ids: Optional[List[str]] = None, customer_order_refs: Optional[List[str]] = None,
+                              bet_ids: Optional[List[str]] = None, order_projection: Optional[str] = None):
+    """
+    Fetch our current (unsettled) orders.
+
+    Args:
+        market_ids: Restrict to these markets
+        customer_order_refs: Restrict to orders placed with these customerOrderRefs
+        bet_ids: Restrict to these bets
+        order_projection: EXECUTABLE, EXECUTION_COMPLETE or ALL (default)
+
+    Returns:
+        Dict containing the API response
+    """
+    params = {}
+    if market_ids:
+        params["marketIds"] = market_ids
+    if customer_order_refs:
+        params["customerOrderRefs"] = customer_order_refs
+    if bet_ids:
+        params["betIds"] = bet_ids
+    if order_projection:
+        params["orderProjection"] = order_projection
+    payload = {
+        "jsonrpc": "2.0",
+        "method": "SportsAPING/v1.0/listCurrentOrders",
+        "params": params,
+        "id": 1
+    }
+    async def list_current_orders_operation():
+        response = await post_rpc(BETFAIR_API_URL, payload)
+        handle_api_error(response)
+        return check_rpc_error(response.json())
+    return await fetch_with_retry(list_current_orders_operation, endpoint="listCurrentOrders")
+
+def cancel_instruction(bet_id: str, size_reduction: Optional[float] = None) -> Dict[str, Any]:
+    """Build one cancelOrders instruction; without a size reduction the whole unmatched part is cancelled."""
+    instruction = {"betId": str(bet_id)}
+    if size_reduction is not None:
+        instruction["sizeReduction"] = size_reduction
+    return instruction
+
+async def cancel_orders(market_id: str, instructions: Optional[List[Dict[str, Any]]] = None):
+    """
+    Cancel unmatched orders on one market in a single request.
+
+    Args:
+        market_id: Betfair market ID
+        instructions: Instructions built with `cancel_instruction`; None
+            cancels every unmatched order on the market
+
+    Returns:
+        Dict containing the API response
+    """
+    params = {"marketId": market_id}
+    if instructions:
+        params["instructions"] = instructions
+    payload = {
+        "jsonrpc": "2.0",
+        "method": "SportsAPING/v1.0/cancelOrders",
+        "params": params,
+        "id": 1
+    }
+    async def cancel_orders_operation():
+        response = await post_rpc(BETFAIR_API_URL, payload)
+        handle_api_error(response)
+        return check_rpc_error(response.json())
+    # Cancelling twice is harmless, so cancellation is retried like a read
+    return await fetch_with_retry(cancel_orders_operation, endpoint="cancelOrders")
+
+def replace_instruction(bet_id: str, new_price: float) -> Dict[str, Any]:
+    """
+    Build one replaceOrders instruction.
+
+    Raises:
+        HTTPException: If the new price is invalid
+    """
+    if new_price <= 1.01:
         raise HTTPException(status_code=400, detail="Odds must be greater than 1.01.")
+    return {"betId": str(bet_id), "newPrice": new_price}
+
+async def replace_orders(market_id: str, instructions: List[Dict[str, Any]]):
+    """
+    Move unmatched orders on one market to new prices in a single request.
+
+    The exchange cancels each order's unmatched part and places it again at
+    the new price (with a new bet ID) in the same call.
+
+    Args:
+        market_id: Betfair market ID
+        instructions: Instructions built with `replace_instruction`
+
+    Returns:
+        Dict containing the API response
+    """
+    if not instructions:
+        raise HTTPException(status_code=400, detail="At least one replace instruction is required.")
     payload = {
         "jsonrpc": "2.0",
-        "method": "SportsAPING/v1.0/placeOrders",
+        "method": "SportsAPING/v1.0/replaceOrders",
         "params": {
             "marketId": market_id,
-            "instructions": [{
-                "selectionId": selection_id,
-                "handicap": 0,
-                "side": side,
-                "orderType": "LIMIT",
-                "limitOrder": {
-                    "size": size,
-                    "price": price,
-                    "persistenceType": "LAPSE"
-                }
-            }],
-            "customerRef": "unique_ref"
+            "instructions": instructions
         },
         "id": 1
     }
-    async def place_bet_operation():
-        response = requests.post(BETFAIR_API_URL, headers=get_headers(), json=payload)
+    async def replace_orders_operation():
+        response = await post_rpc(BETFAIR_API_URL, payload)
         handle_api_error(response)
-        return response.json()
-    return await fetch_with_retry(place_bet_operation)
+        return check_rpc_error(response.json())
+    # A lost response would hide the new bet IDs, so only provable rejections are retried
+    return await fetch_with_retry(replace_orders_operation, endpoint="replaceOrders", idempotent=False)
 
 # ------------------------------------------------
 #               Data Classes
@@ -326,7 +758,7 @@ async def execute_betting_workflow(market_id: str, time_to_start: int, matched_a
         match = Match(market_id, matched_amount, time_to_start)
         
         # Get market data to populate odds
-        market_data = await fetch_market_data(market_id)
+        market_data = (await get_all_market_data([market_id])).get(market_id)
         if not market_data:
             logger.error("Failed to fetch market data")
             return {"success": False, "message": "Failed to fetch market data"}
@@ -356,7 +788,7 @@ async def execute_betting_workflow(market_id: str, time_to_start: int, matched_a
         back_wager = BackDutchWager(match)
         if back_wager.check_preconditions():
             logger.info("Market conditions suitable for BackDutch strategy")
-            back_wager.place_back_dutch_bets()
+            await asyncio.to_thread(back_wager.place_back_dutch_bets)
             return {"success": True, "message": "BackDutch strategy executed successfully"}
         
         # Fall back to Modified LTD strategy
@@ -370,7 +802,7 @@ async def execute_betting_workflow(market_id: str, time_to_start: int, matched_a
         )
         
         if ltd_wager.check_preconditions():
-            ltd_wager.execute()
+            await asyncio.to_thread(ltd_wager.execute)
             return {"success": True, "message": "Modified LTD strategy executed successfully"}
         
         # No suitable strategy found
@@ -407,17 +839,13 @@ async def get_account_funds():
     }
     
     async def fetch_account_funds():
-        response = requests.post(
-            "https://api.betfair.com/exchange/account/json-rpc/v1",
-            headers=get_headers(),
-            json=payload
-        )
+        response = await post_rpc(BETFAIR_ACCOUNT_URL, payload)
         handle_api_error(response)
-        result = response.json()
+        result = check_rpc_error(response.json())
         # Add debug logging to see the structure of the response
         logger.info(f"Account funds response: {result}")
         return result.get("result", {})
     
-    result = await fetch_with_retry(fetch_account_funds)
+    result = await single_flight.do("getAccountFunds", payload["params"], lambda: fetch_with_retry(fetch_account_funds, endpoint="getAccountFunds"))
     return result
 from app.logger import logger
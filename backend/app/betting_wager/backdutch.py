@@ -1,9 +1,12 @@
 from typing import List, Dict, Any
 from app.betfair import fetch_market_data
+from app.betfair.cache import market_cache
+from app.betfair.client import betfair_client
+from app.betfair.orders import wager_group
 from app.betfair.utils import (
-    place_bet,
     calculate_implied_probability,
     check_preconditions,
+    limit_order_instruction,
     Match,
     Wager
 )
@@ -80,7 +83,9 @@ class BackDutchWager:
         try:
             if not self.check_preconditions():
                 return
-            market_data = fetch_market_data(self.match.market_id)
+            market_data = market_cache.get_market_data(self.match.market_id)
+            if market_data is None:
+                market_data = fetch_market_data(self.match.market_id)
             if not market_data or "runners" not in market_data:
                 logger.error("Failed to fetch valid market data")
                 return
@@ -98,13 +103,18 @@ class BackDutchWager:
             stakes = self.distribute_stakes(outcomes)
             if not stakes:
                 return
+            instructions = []
             for outcome in outcomes:
                 selection_id = outcome['selection_id']
                 odds = outcome['odds']
                 stake = stakes.get(selection_id, 0)
                 if stake > 0:
                     logger.info(f"Placing Back Bet: Selection {selection_id}, Odds {odds}, Stake {stake}")
-                    place_bet(self.match.market_id, selection_id, side="BACK", size=stake, price=odds)
+                    instructions.append(limit_order_instruction(selection_id, side="BACK", size=stake, price=odds))
+            # All legs go out in one placeOrders request
+            if instructions:
+                return betfair_client.sync.place_orders(self.match.market_id, instructions,
+                                                        group=wager_group("backdutch", self.match.market_id))
         except Exception as e:
             logger.error(f"Error in place_back_dutch_bets: {e}")
             return
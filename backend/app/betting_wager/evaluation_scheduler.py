@@ -0,0 +1,263 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+import asyncio
+import math
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.logger import logger
+from app.betfair.conflation import MarketConflator
+from app.betfair.records import parse_market_book
+from app.betfair.timing_wheel import HierarchicalTimingWheel
+from app.betting_wager.scanner import (
+    BACKDUTCH,
+    BACKDUTCH_MAX_START_MINUTES,
+    GV_SCAN_START_MINUTES,
+    GV_SCAN_START_MINUTES_LTD,
+    LAYDUTCH,
+    LTD,
+    MarketScanner,
+    scan_markets
+)
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+TICK_SECONDS = 1.0
+STREAM_CONFLATION_WINDOW = 0.5  # Seconds between stream-driven evaluations of one market
+# Minutes to start at which each strategy starts considering a market
+STRATEGY_WINDOWS = {
+    LAYDUTCH: GV_SCAN_START_MINUTES,
+    LTD: GV_SCAN_START_MINUTES_LTD,
+    BACKDUTCH: BACKDUTCH_MAX_START_MINUTES,
+}
+# (minutes to start at or below, seconds between evaluations), closest to the off first
+EVALUATION_CADENCE = ((5, 5), (15, 15), (60, 30), (180, 60), (math.inf, 300))
+
+def evaluation_interval(minutes_to_start: float, cadence: Tuple[Tuple[float, float], ...] = EVALUATION_CADENCE) -> float:
+    """Seconds until the next evaluation of a market this far from the off."""
+    for minutes, seconds in cadence:
+        if minutes_to_start <= minutes:
+            return seconds
+    return cadence[-1][1]
+
+# ------------------------------------------------
+#               EvaluationScheduler Class
+# ------------------------------------------------
+class EvaluationScheduler:
+    """
+    Wakes market evaluations when markets cross strategy time windows.
+
+    Each market has one timer on a hierarchical timing wheel, set to its
+    next wake-up: the moment it enters the next strategy window (start time
+    minus the window) or, once inside a window, its next periodic
+    evaluation, which comes sooner as the off approaches
+    (`EVALUATION_CADENCE`). Markets outside every window cost nothing until
+    their timer fires. Markets due in the same tick are evaluated together:
+
+        evaluation_scheduler.attach(market_discovery)
+        await evaluation_scheduler.start()
+
+    `evaluate` receives {market_id: active strategies}; the default scans
+    the due markets and keeps the candidates for their active strategies.
+
+    Streamed markets are also re-evaluated on price updates, from the stream
+    cache. Updates pass through a MarketConflator, so a burst on one market
+    costs at most one evaluation per `conflation_window`; markets outside
+    every window are ignored before reaching it:
+
+        evaluation_scheduler.attach_stream(stream)
+    """
+    def __init__(self, evaluate: Optional[Callable] = None, windows: Optional[Dict[str, float]] = None,
+                 cadence: Tuple[Tuple[float, float], ...] = EVALUATION_CADENCE,
+                 tick_seconds: float = TICK_SECONDS, clock: Callable[[], float] = time.time,
+                 conflation_window: float = STREAM_CONFLATION_WINDOW, cache=None):
+        self.evaluate = evaluate or self.scan
+        self.windows = dict(windows or STRATEGY_WINDOWS)
+        self.cadence = cadence
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self.wheel = HierarchicalTimingWheel(self._tick(clock()))
+        self.start_times: Dict[str, float] = {}  # market_id -> start (epoch seconds)
+        self.candidates: Dict[str, Dict[str, Any]] = {}
+        self.conflator = MarketConflator(self.evaluate_update, window=conflation_window, cache=cache)
+        self.listener = None
+        self.running = False
+        self.task = None
+        self.wakeups = 0
+        self.evaluations = 0
+        self.stream_evaluations = 0
+
+    def _tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    # ------------------------------------------------
+    #               Scheduling
+    # ------------------------------------------------
+    def active_strategies(self, minutes_to_start: float) -> List[str]:
+        return [name for name, window in self.windows.items() if 0 <= minutes_to_start <= window]
+
+    def next_wake(self, market_id: str, now: float) -> Optional[float]:
+        """Time of the market's next evaluation, or None once it is off."""
+        start = self.start_times[market_id]
+        if start <= now:
+            return None
+        entries = [start - window * 60 for window in self.windows.values() if start - window * 60 > now]
+        wake = min(entries, default=math.inf)
+        if self.active_strategies((start - now) / 60):
+            wake = min(wake, now + evaluation_interval((start - now) / 60, self.cadence))
+        return wake if wake < start else start
+
+    def _arm(self, market_id: str, now: float):
+        wake = self.next_wake(market_id, now)
+        if wake is None:
+            self.cancel(market_id)
+            return
+        # Round up so a market is never evaluated before it crosses a window
+        self.wheel.schedule(market_id, math.ceil(wake / self.tick_seconds))
+
+    def schedule(self, market_id: str, start_time: datetime, now: Optional[float] = None):
+        """Track a market, or move it after its start time changed."""
+        self.start_times[market_id] = start_time.timestamp()
+        self._arm(market_id, self.clock() if now is None else now)
+
+    def cancel(self, market_id: str):
+        self.start_times.pop(market_id, None)
+        self.candidates.pop(market_id, None)
+        self.wheel.cancel(market_id)
+        self.conflator.discard(market_id)
+
+    def due(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """
+        Advance the wheel to `now` and return the markets to evaluate with
+        their active strategies. Each one is re-armed for its next wake-up.
+        """
+        now = self.clock() if now is None else now
+        due = {}
+        for timer in self.wheel.advance(self._tick(now)):
+            market_id = timer.key
+            strategies = self.active_strategies((self.start_times[market_id] - now) / 60)
+            if strategies:
+                due[market_id] = strategies
+            self._arm(market_id, now)
+        self.wakeups += len(due)
+        return due
+
+    # ------------------------------------------------
+    #               Evaluation
+    # ------------------------------------------------
+    def _keep_candidates(self, due: Dict[str, List[str]], candidates: List[Dict[str, Any]],
+                         start_minutes: Dict[str, float], now: float):
+        found = {candidate["market_id"]: candidate for candidate in candidates}
+        for market_id, strategies in due.items():
+            candidate = found.get(market_id)
+            strategies = [name for name in strategies if candidate and name in candidate["strategies"]]
+            if strategies:
+                self.candidates[market_id] = {**candidate, "strategies": strategies,
+                                              "time_to_start": start_minutes[market_id], "evaluated": now}
+            else:
+                self.candidates.pop(market_id, None)
+
+    async def scan(self, due: Dict[str, List[str]]):
+        """Scan the due markets and keep the candidates for their active strategies."""
+        now = self.clock()
+        start_minutes = {market_id: (self.start_times[market_id] - now) / 60 for market_id in due}
+        self._keep_candidates(due, await scan_markets(list(due), start_minutes), start_minutes, now)
+
+    def evaluate_update(self, market_id: str, market_book: Dict[str, Any]):
+        """Re-evaluate one market from its streamed book (called by the conflator)."""
+        if market_id not in self.start_times:
+            return
+        now = self.clock()
+        minutes = (self.start_times[market_id] - now) / 60
+        strategies = self.active_strategies(minutes)
+        if not strategies:
+            return
+        self.stream_evaluations += 1
+        candidates = MarketScanner().scan([parse_market_book(market_book)], {market_id: minutes})
+        self._keep_candidates({market_id: strategies}, candidates, {market_id: minutes}, now)
+
+    async def run_due(self, now: Optional[float] = None):
+        due = self.due(now)
+        if not due:
+            return
+        self.evaluations += 1
+        try:
+            result = self.evaluate(due)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Error evaluating {len(due)} markets: {e}")
+
+    # ------------------------------------------------
+    #               Watchlist Integration
+    # ------------------------------------------------
+    def attach(self, discovery):
+        """Follow a MarketDiscovery watchlist: schedule, reschedule and drop markets with it."""
+        def schedule_markets(market_ids: List[str]):
+            for market_id in market_ids:
+                market = discovery.get(market_id)
+                if market is not None and market.start_time is not None:
+                    self.schedule(market_id, market.start_time)
+
+        def cancel_markets(market_ids: List[str]):
+            for market_id in market_ids:
+                self.cancel(market_id)
+
+        schedule_markets(discovery.market_ids())
+        self.listener = discovery.add_listener(schedule_markets, cancel_markets, schedule_markets)
+        return self.listener
+
+    def detach(self, discovery):
+        if self.listener is not None:
+            discovery.remove_listener(self.listener)
+            self.listener = None
+
+    def on_market_update(self, market_id: str):
+        """Stream market listener: pass updates of markets inside a window to the conflator."""
+        start = self.start_times.get(market_id)
+        if self.running and start is not None and self.active_strategies((start - self.clock()) / 60):
+            self.conflator.notify(market_id)
+
+    def attach_stream(self, stream):
+        """Evaluate a stream's markets on price updates, conflated per market (stream on this loop)."""
+        stream.add_market_listener(self.on_market_update)
+
+    # ------------------------------------------------
+    #               Lifecycle
+    # ------------------------------------------------
+    async def _run(self):
+        while self.running:
+            await asyncio.sleep(self.tick_seconds - self.clock() % self.tick_seconds)
+            await self.run_due()
+
+    async def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.running = False
+        self.conflator.close()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "scheduled": len(self.wheel),
+            "wakeups": self.wakeups,
+            "evaluations": self.evaluations,
+            "stream_evaluations": self.stream_evaluations,
+            "stream_updates": self.conflator.stats(),
+            "cascaded": self.wheel.cascaded,
+            "candidates": len(self.candidates),
+            "windows": self.windows,
+        }
+
+# Shared scheduler used by routes
+evaluation_scheduler = EvaluationScheduler()
@@ -6,16 +6,23 @@ from decimal import Decimal, ROUND_DOWN
 import asyncio
 from app.logger import logger
 from app.betfair import fetch_market_data
+from app.betfair.cache import market_cache, order_cache, flatten_market_book
+from app.betfair.orders import wager_group
 from app.betfair.utils import (
-    
-    place_bet,
+    _fetch_market_data_async,
+    cancel_instruction,
+    cancel_orders,
+    get_instruction_reports,
+    limit_order_instruction,
+    place_orders,
+    replace_instruction,
+    replace_orders,
     calculate_implied_probability,
     check_preconditions,
     Match,
     Wager,
     get_account_funds,
-    list_market_book,
-    fetch_with_retry
+    list_market_book
 )
 
 # ------------------------------------------------
@@ -60,6 +67,7 @@ class LayDutchWager:
         self.roi = 0.0
         self.available_funds = 0.0
         self.market_depth = {}  # Store market depth information
+        self.placed_bets = []  # (selection, placement instruction report) per placed leg
 
     # Constants for market validation
     MIN_TOTAL_PROBABILITY = 0.8
@@ -72,7 +80,8 @@ class LayDutchWager:
     async def calculate_available_funds(self) -> bool:
         """Calculate available funds for lay dutch wagering."""
         try:
-            account_funds = await fetch_with_retry(get_account_funds)
+            # The API helpers retry transient errors themselves
+            account_funds = await get_account_funds()
             if not account_funds:
                 logger.error("Failed to fetch account funds")
                 return False
@@ -92,6 +101,23 @@ class LayDutchWager:
             logger.error(f"Error calculating available funds: {str(e)}")
             return False
 
+    # ------------------------------------------------
+    #               Market Snapshots
+    # ------------------------------------------------
+    async def get_market_data(self) -> Optional[Dict[str, Any]]:
+        """Read best prices from the stream cache, falling back to REST."""
+        market_data = market_cache.get_market_data(self.match.market_id)
+        if market_data is None:
+            market_data = await _fetch_market_data_async(self.match.market_id)
+        return market_data
+
+    async def get_market_book(self) -> Optional[Dict[str, Any]]:
+        """Read the price ladders from the stream cache, falling back to REST."""
+        market_book = market_cache.get_market_book(self.match.market_id)
+        if market_book is None:
+            market_book = flatten_market_book(await list_market_book(self.match.market_id))
+        return market_book
+
     # ------------------------------------------------
     #               Market Validation
     # ------------------------------------------------
@@ -113,13 +139,13 @@ class LayDutchWager:
                 return False
 
             # Fetch market data with retry
-            market_data = await fetch_with_retry( self.match.market_id)
+            market_data = await self.get_market_data()
             if not market_data:
                 logger.warning("Failed to fetch market data after retries")
                 return False
 
             # Get market book for depth information
-            market_book = await fetch_with_retry(list_market_book, self.match.market_id)
+            market_book = await self.get_market_book()
             if not market_book:
                 logger.warning("Failed to fetch market book after retries")
                 return False
@@ -326,6 +352,143 @@ class LayDutchWager:
             logger.error(f"Error calculating stakes: {str(e)}")
             return False
 
+    # ------------------------------------------------
+    #               Fill Tracking
+    # ------------------------------------------------
+    def match_instruction_reports(self, reports: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Pair each selection with its placeOrders instruction report. Reports
+        echo their instruction, so they are matched by selection ID; legs
+        without a successful report are left out.
+        """
+        by_selection = {
+            report.get('instruction', {}).get('selectionId'): report
+            for report in reports if report.get('status') == 'SUCCESS'
+        }
+        return [
+            (selection, by_selection[selection['selection_id']])
+            for selection in self.selections if selection['selection_id'] in by_selection
+        ]
+
+    def get_fill_states(self) -> List[Dict[str, Any]]:
+        """
+        Current fill state of every placed leg. Orders seen on the order stream
+        are read from the order cache; otherwise the placement report is used.
+        """
+        fills = []
+        for selection, report in self.placed_bets:
+            bet_id = report.get('betId')
+            order = order_cache.get(bet_id) if bet_id else None
+            if order:
+                order['source'] = 'stream'
+                fills.append(order)
+                continue
+            size = float(selection['stake'])
+            size_matched = report.get('sizeMatched', 0.0)
+            size_cancelled = report.get('sizeCancelled', 0.0)
+            fills.append({
+                "bet_id": bet_id,
+                "market_id": self.match.market_id,
+                "selection_id": selection['selection_id'],
+                "side": "LAY",
+                "price": selection['lay_odds'],
+                "size": size,
+                "size_matched": size_matched,
+                "size_remaining": size - size_matched - size_cancelled,
+                "average_price_matched": report.get('averagePriceMatched', 0.0),
+                "status": report.get('orderStatus'),
+                "source": "placement"
+            })
+        return fills
+
+    # ------------------------------------------------
+    #               Order Management
+    # ------------------------------------------------
+    def get_unmatched_legs(self) -> List[tuple]:
+        """(index into placed_bets, fill state) of every leg with an unmatched part."""
+        return [
+            (index, fill) for index, fill in enumerate(self.get_fill_states())
+            if fill['bet_id'] and fill['size_remaining'] > 0 and fill['status'] != 'EXECUTION_COMPLETE'
+        ]
+
+    def mark_cancelled(self, index: int, size_cancelled: float):
+        """Record on a placed leg that its unmatched part was cancelled."""
+        selection, report = self.placed_bets[index]
+        self.placed_bets[index] = (selection, {
+            **report,
+            'sizeCancelled': report.get('sizeCancelled', 0.0) + size_cancelled,
+            'orderStatus': 'EXECUTION_COMPLETE'
+        })
+
+    async def cancel_unmatched_legs(self) -> Dict[str, Any]:
+        """Cancel the unmatched part of every placed leg in one cancelOrders call."""
+        legs = {str(fill['bet_id']): index for index, fill in self.get_unmatched_legs()}
+        if not legs:
+            return {"success": True, "cancelled": 0, "bet_results": self.get_fill_states()}
+
+        response = await cancel_orders(self.match.market_id, [cancel_instruction(bet_id) for bet_id in legs])
+        cancelled = 0
+        for report in get_instruction_reports(response):
+            bet_id = str(report.get('instruction', {}).get('betId'))
+            if report.get('status') == 'SUCCESS' and bet_id in legs:
+                self.mark_cancelled(legs[bet_id], report.get('sizeCancelled', 0.0))
+                cancelled += 1
+
+        logger.info(f"Cancelled {cancelled} of {len(legs)} unmatched legs on {self.match.market_id}")
+        return {"success": cancelled == len(legs), "cancelled": cancelled, "bet_results": self.get_fill_states()}
+
+    async def reprice_unmatched_legs(self) -> Dict[str, Any]:
+        """
+        Move the unmatched part of every placed leg to the current best lay
+        price in one replaceOrders call. Prices come from the stream cache
+        when it holds the market; legs that moved further than
+        validate_price_movement allows are left in place.
+        """
+        market_book = await self.get_market_book()
+        if not market_book:
+            return {"success": False, "message": "Failed to fetch current market data"}
+        best_lay = {
+            runner['selectionId']: runner['availableToLay'][0]['price']
+            for runner in market_book['runners'] if runner.get('availableToLay')
+        }
+
+        legs = {}  # bet_id -> (index into placed_bets, new price)
+        for index, fill in self.get_unmatched_legs():
+            price = best_lay.get(fill['selection_id'])
+            if price is None or price == fill['price']:
+                continue
+            selection = self.placed_bets[index][0]
+            if not self.validate_price_movement(price, selection.get('original_lay_odds', selection['lay_odds'])):
+                continue
+            legs[str(fill['bet_id'])] = (index, price)
+        if not legs:
+            return {"success": True, "repriced": 0, "bet_results": self.get_fill_states()}
+
+        instructions = [replace_instruction(bet_id, price) for bet_id, (index, price) in legs.items()]
+        response = await replace_orders(self.match.market_id, instructions)
+        repriced = 0
+        for report in get_instruction_reports(response):
+            cancel_report = report.get('cancelInstructionReport') or {}
+            place_report = report.get('placeInstructionReport') or {}
+            bet_id = str(cancel_report.get('instruction', {}).get('betId'))
+            if report.get('status') != 'SUCCESS' or bet_id not in legs or not place_report:
+                continue
+            index, price = legs[bet_id]
+            size_cancelled = cancel_report.get('sizeCancelled', 0.0)
+            self.mark_cancelled(index, size_cancelled)
+            # The unmatched part lives on as a new bet at the new price
+            selection = self.placed_bets[index][0]
+            self.placed_bets.append(({
+                **selection,
+                'stake': size_cancelled,
+                'lay_odds': price,
+                'original_lay_odds': selection.get('original_lay_odds', selection['lay_odds'])
+            }, place_report))
+            repriced += 1
+
+        logger.info(f"Repriced {repriced} of {len(legs)} unmatched legs on {self.match.market_id}")
+        return {"success": repriced == len(legs), "repriced": repriced, "bet_results": self.get_fill_states()}
+
     # ------------------------------------------------
     #               Wager Execution
     # ------------------------------------------------
@@ -349,7 +512,7 @@ class LayDutchWager:
                 return {"success": False, "message": "Could not find profitable stakes"}
 
             # Revalidate market conditions before placing bets
-            current_market_book = await fetch_with_retry(list_market_book, self.match.market_id)
+            current_market_book = await self.get_market_book()
             if not current_market_book:
                 return {"success": False, "message": "Failed to fetch current market data"}
 
@@ -379,49 +542,55 @@ class LayDutchWager:
             logger.info(f"ROI: {self.roi*100:.2f}%")
             logger.info(f"Number of selections: {len(self.selections)}")
 
-            # Place lay bets with retry mechanism and sequential execution
-            bet_results = []
-            for selection in self.selections:
-                bet_result = await fetch_with_retry(
-                    place_bet,
-                    market_id=self.match.market_id,
-                    selection_id=selection['selection_id'],
-                    stake=float(selection['stake']),
-                    price=selection['lay_odds'],
-                    side="LAY"
+            # Place all lay legs in a single placeOrders request so prices
+            # cannot move between legs
+            instructions = [
+                limit_order_instruction(
+                    selection['selection_id'],
+                    side="LAY",
+                    size=float(selection['stake']),
+                    price=selection['lay_odds']
                 )
-                
-                if not bet_result or not bet_result.get('success'):
-                    error_msg = bet_result.get('message') if bet_result else "Failed to place bet"
-                    logger.error(f"Failed to place lay bet: {error_msg}")
-                    
-                    # If we've already placed some bets, log the partial execution
-                    if bet_results:
-                        logger.warning(f"Partial bet execution: {len(bet_results)} of {len(self.selections)} bets placed")
-                    
-                    return {
-                        "success": False, 
-                        "message": "Failed to place all bets",
-                        "partial_execution": bool(bet_results),
-                        "bets_placed": len(bet_results),
-                        "total_bets": len(self.selections)
-                    }
-                
-                bet_results.append(bet_result)
-                logger.info(f"Successfully placed bet {len(bet_results)} of {len(self.selections)}")
-
-            # Calculate actual execution metrics
-            executed_liability = sum(float(bet['size']) * (float(bet['price']) - 1) 
-                                  for bet in bet_results)
+                for selection in self.selections
+            ]
+            # A re-run of this decision (e.g. after an error) reuses the customerRef
+            bet_result = await place_orders(self.match.market_id, instructions,
+                                            group=wager_group("laydutch", self.match.market_id))
+            self.placed_bets = self.match_instruction_reports(get_instruction_reports(bet_result))
+
+            if len(self.placed_bets) < len(self.selections):
+                logger.error(f"Failed to place lay bets: {bet_result}")
+
+                # If some legs were placed, log the partial execution
+                if self.placed_bets:
+                    logger.warning(f"Partial bet execution: {len(self.placed_bets)} of {len(self.selections)} bets placed")
+
+                return {
+                    "success": False, 
+                    "message": "Failed to place all bets",
+                    "partial_execution": bool(self.placed_bets),
+                    "bets_placed": len(self.placed_bets),
+                    "total_bets": len(self.selections),
+                    "bet_results": self.get_fill_states()
+                }
+
+            logger.info(f"Successfully placed all {len(self.placed_bets)} bets in one request")
+
+            # Calculate actual execution metrics from the latest fill state
+            bet_results = self.get_fill_states()
+            executed_liability = sum(bet['size'] * (bet['price'] - 1) for bet in bet_results)
+            matched_liability = sum(bet['size_matched'] * (bet['average_price_matched'] - 1)
+                                    for bet in bet_results if bet['size_matched'])
             executed_commission = executed_liability * COMMISSION_RATE
             
             return {
                 "success": True,
                 "total_liability": self.total_liability,
                 "actual_liability": executed_liability,
+                "matched_liability": matched_liability,
                 "potential_profit": self.potential_profit,
                 "commission": executed_commission,
-                "net_roi": (self.potential_profit - executed_commission) / executed_liability,
+                "net_roi": (self.potential_profit - executed_commission) / executed_liability if executed_liability else 0,
                 "number_of_selections": len(self.selections),
                 "bet_results": bet_results
             }
@@ -4,7 +4,10 @@
 from typing import Dict, Any
 from app.logger import logger
 from app.betfair import fetch_market_data
-from app.betfair.utils import place_bet, check_preconditions, calculate_implied_probability
+from app.betfair.cache import market_cache
+from app.betfair.client import betfair_client
+from app.betfair.orders import wager_group
+from app.betfair.utils import check_preconditions, calculate_implied_probability
 from app.betfair.utils import Match, Wager
 
 # ------------------------------------------------
@@ -50,7 +53,9 @@ class ModifiedLTDWager:
         if not self.check_preconditions():
             return
         
-        market_data = fetch_market_data(self.match.market_id)
+        market_data = market_cache.get_market_data(self.match.market_id)
+        if market_data is None:
+            market_data = fetch_market_data(self.match.market_id)
         if not market_data or "runners" not in market_data:
             logger.error("Failed to fetch valid market data")
             return
@@ -75,6 +80,7 @@ class ModifiedLTDWager:
         
         selection_id = best_outcome["selection_id"]
         if selection_id:
-            place_bet(self.match.market_id, selection_id, side="BACK", size=10, price=best_outcome["back_odds"])
+            betfair_client.sync.place_bet(self.match.market_id, selection_id, side="BACK", size=10, price=best_outcome["back_odds"],
+                                          group=wager_group("ltd", self.match.market_id))
         else:
             logger.warning("Failed to identify a valid selection ID for the draw market.")
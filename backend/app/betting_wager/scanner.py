@@ -0,0 +1,208 @@
+# ------------------------------------------------
+#                     Imports
+# ------------------------------------------------
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from app.logger import logger
+from app.betfair.cache import market_cache
+from app.betfair.discovery import market_discovery
+from app.betfair.records import MarketBookRecord
+from app.betfair.utils import SCAN_PRICE_PROJECTION, list_market_book_records
+from app.betting_wager.laydutch import (
+    COMMISSION_RATE,
+    GV_MATCHED_BETS_DOLLARS_MINIMUM,
+    GV_MAX_ODDS,
+    GV_MIN_ODDS,
+    GV_ODDS_RANGE_ABSOLUTE,
+    GV_SCAN_START_MINUTES,
+    MIN_LIQUIDITY_FACTOR,
+    MIN_STAKE,
+    LayDutchWager
+)
+from app.betting_wager.ltdModified import GV_LTD_MIN_ODDS_RANGE_RELATIVE, GV_SCAN_START_MINUTES_LTD
+
+# ------------------------------------------------
+#               Global Variables
+# ------------------------------------------------
+LAYDUTCH = "laydutch"
+BACKDUTCH = "backdutch"
+LTD = "ltd"
+
+BACKDUTCH_MIN_ODDS = 1.01  # BackDutchWager ignores runners at or below this price
+BACKDUTCH_MAX_START_MINUTES = 1440
+
+# ------------------------------------------------
+#               PriceMatrix Class
+# ------------------------------------------------
+class PriceMatrix:
+    """
+    Best prices of many markets as (markets x runners) arrays.
+
+    Row i holds the ACTIVE runners of market_ids[i] in book order, padded
+    with NaN up to the widest market; missing prices are NaN as well.
+    """
+    def __init__(self, market_ids: List[str], back: np.ndarray, lay: np.ndarray,
+                 lay_sizes: np.ndarray, total_matched: np.ndarray):
+        self.market_ids = market_ids
+        self.back = back
+        self.lay = lay
+        self.lay_sizes = lay_sizes
+        self.total_matched = total_matched
+
+    @classmethod
+    def from_records(cls, records: Iterable[MarketBookRecord]) -> "PriceMatrix":
+        records = list(records)
+        runners = [record.active_runners() for record in records]
+        shape = (len(records), max((len(active) for active in runners), default=0))
+        back, lay, lay_sizes = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for i, active in enumerate(runners):
+            for j, runner in enumerate(active):
+                if runner.back_prices:
+                    back[i, j] = runner.back_prices[0]
+                if runner.lay_prices:
+                    lay[i, j] = runner.lay_prices[0]
+                    lay_sizes[i, j] = runner.lay_sizes[0]
+        total_matched = np.array([record.total_matched or 0.0 for record in records], dtype=float)
+        return cls([record.market_id for record in records], back, lay, lay_sizes, total_matched)
+
+    def __len__(self) -> int:
+        return len(self.market_ids)
+
+# ------------------------------------------------
+#               MarketScanner Class
+# ------------------------------------------------
+class MarketScanner:
+    """
+    Vectorized pre-screen of many markets for the betting strategies.
+
+    One pass over a PriceMatrix computes, per market, the back and lay book
+    percentages, their commission-adjusted overround and the odds ranges,
+    and applies the top-of-book versions of the checks in
+    LayDutchWager.validate_market_conditions / calculate_optimal_stakes,
+    BackDutchWager.distribute_stakes and ModifiedLTDWager.check_preconditions.
+    Liquidity is judged on the best level only. The result is a shortlist;
+    each candidate still goes through the strategy's full validation.
+    """
+    def __init__(self, commission: float = COMMISSION_RATE):
+        self.commission = commission
+
+    def evaluate(self, prices: PriceMatrix, start_minutes: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Per-market metrics and strategy flags, each an array aligned with
+        `prices.market_ids`. `start_minutes` holds minutes to start (NaN if
+        unknown; unknown start times pass the time checks).
+        """
+        count = len(prices)
+        if start_minutes is None:
+            start_minutes = np.full(count, np.nan)
+        if prices.back.shape[1] == 0:
+            prices = PriceMatrix(prices.market_ids, *(np.full((count, 1), np.nan) for _ in range(3)), prices.total_matched)
+        liquid_enough = prices.total_matched >= GV_MATCHED_BETS_DOLLARS_MINIMUM
+        # NaN comparisons are False, so missing prices drop out of every mask
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Back book (BackDutch: every runner priced above 1.01)
+            backable = prices.back > BACKDUTCH_MIN_ODDS
+            back_book = np.where(backable, 1.0 / prices.back, 0.0).sum(axis=1)
+            back_count = backable.sum(axis=1)
+
+            # Lay book (LayDutch: runners in the odds band with enough liquidity at the best price)
+            layable = ((prices.lay >= GV_MIN_ODDS) & (prices.lay <= GV_MAX_ODDS)
+                       & (prices.lay_sizes >= MIN_STAKE * MIN_LIQUIDITY_FACTOR))
+            lay_book = np.where(layable, 1.0 / prices.lay, 0.0).sum(axis=1)
+            lay_count = layable.sum(axis=1)
+            lay_max = np.where(layable, prices.lay, -np.inf).max(axis=1)
+            lay_min = np.where(layable, prices.lay, np.inf).min(axis=1)
+            lay_odds_range = np.where(lay_count > 0, lay_max / lay_min, 0.0)
+
+            # Odds range of the first two runners (ModifiedLTD's team odds)
+            team_odds = prices.back[:, :2] if prices.back.shape[1] >= 2 else np.full((count, 2), np.nan)
+            odds_range = np.nan_to_num(np.max(team_odds, axis=1) / np.min(team_odds, axis=1), nan=0.0)
+
+        # Commission-adjusted overround, as in LayDutchWager.calculate_optimal_stakes
+        back_overround = np.where(back_count > 0, back_book * (1 + self.commission) - 1, np.inf)
+        lay_overround = np.where(lay_count > 0, lay_book * (1 + self.commission) - 1, np.inf)
+
+        laydutch = (
+            liquid_enough
+            & ~(start_minutes > GV_SCAN_START_MINUTES)
+            & (lay_count > 0)
+            & np.where(lay_count >= 2, lay_odds_range >= GV_ODDS_RANGE_ABSOLUTE, lay_min >= GV_MIN_ODDS * 1.1)
+            & (lay_book >= LayDutchWager.MIN_TOTAL_PROBABILITY)
+            & (lay_book <= LayDutchWager.MAX_TOTAL_PROBABILITY)
+            & (lay_overround < 0)
+        )
+        backdutch = (
+            liquid_enough
+            & ~(start_minutes > BACKDUTCH_MAX_START_MINUTES)
+            & (back_count >= 2)
+            & (back_book < 1)
+        )
+        ltd = (
+            liquid_enough
+            & ~(start_minutes > GV_SCAN_START_MINUTES_LTD)
+            & (odds_range >= GV_LTD_MIN_ODDS_RANGE_RELATIVE)
+        )
+        # Rank by the best commission-adjusted margin among the strategies a market qualifies for
+        score = np.maximum(np.where(laydutch, -lay_overround, -np.inf), np.where(backdutch | ltd, -back_overround, -np.inf))
+        return {
+            "back_book": back_book,
+            "lay_book": lay_book,
+            "back_overround": back_overround,
+            "lay_overround": lay_overround,
+            "lay_odds_range": lay_odds_range,
+            "odds_range": odds_range,
+            LAYDUTCH: laydutch,
+            BACKDUTCH: backdutch,
+            LTD: ltd,
+            "score": score,
+        }
+
+    def scan(self, records: Iterable[MarketBookRecord], start_minutes: Optional[Dict[str, float]] = None,
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Shortlist of markets that pass at least one strategy's pre-checks,
+        best score first.
+
+        Args:
+            records: Market books to scan
+            start_minutes: Minutes to start per market ID, where known
+            limit: Maximum number of candidates to return
+        """
+        prices = PriceMatrix.from_records(records)
+        if not len(prices):
+            return []
+        starts = np.array([(start_minutes or {}).get(market_id, np.nan) for market_id in prices.market_ids], dtype=float)
+        metrics = self.evaluate(prices, starts)
+        eligible = metrics[LAYDUTCH] | metrics[BACKDUTCH] | metrics[LTD]
+        ranked = [index for index in np.argsort(-metrics["score"], kind="stable") if eligible[index]]
+        candidates = [
+            {
+                "market_id": prices.market_ids[index],
+                "strategies": [name for name in (LAYDUTCH, BACKDUTCH, LTD) if metrics[name][index]],
+                "total_matched": float(prices.total_matched[index]),
+                "back_book": float(metrics["back_book"][index]),
+                "lay_book": float(metrics["lay_book"][index]),
+                "back_overround": float(metrics["back_overround"][index]),
+                "lay_overround": float(metrics["lay_overround"][index]),
+                "lay_odds_range": float(metrics["lay_odds_range"][index]),
+                "odds_range": float(metrics["odds_range"][index]),
+                "score": float(metrics["score"][index]),
+            }
+            for index in ranked[:limit]
+        ]
+        logger.info(f"Scanned {len(prices)} markets: {len(ranked)} candidates")
+        return candidates
+
+async def scan_markets(market_ids: Optional[List[str]] = None, start_minutes: Optional[Dict[str, float]] = None,
+                       limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Fetch top-of-book prices for many markets in batched requests and scan
+    them. Defaults to every market in the stream cache, or the discovery
+    watchlist when nothing is streamed; start times come from the watchlist.
+    """
+    if market_ids is None:
+        market_ids = market_cache.market_ids() or market_discovery.market_ids()
+    if start_minutes is None:
+        start_minutes = market_discovery.start_minutes()
+    records = await list_market_book_records(market_ids, SCAN_PRICE_PROJECTION)
+    return MarketScanner().scan(records.values(), start_minutes, limit)
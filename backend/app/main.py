@@ -8,8 +8,12 @@ import uvicorn
 from app.auth.routes import auth_router
 from app.config import config
 from app.logger import logger
-from app.betfair.auth import BetfairAuthManager
+from app.betfair.auth import session_manager
 from app.betfair.utils import execute_betting_workflow
+from app.betfair.http import http_client
+from app.betfair.client import betfair_client
+from app.betfair.discovery import market_discovery
+from app.betting_wager.evaluation_scheduler import evaluation_scheduler
 
 # ------------------------------------------------
 #               FastAPI App Setup
@@ -43,14 +47,44 @@ async def root():
 async def startup_event():
     """Initialize Betfair session on startup."""
     try:
-        BetfairAuthManager.login()
-        asyncio.create_task(BetfairAuthManager.monitor_connection())  # Start connection monitor
+        app.state.session_keep_alive = asyncio.create_task(session_manager.run())  # Start keep-alive loop
+        await session_manager.refresh()
         logger.info("Betfair session initialized on startup.")
     except Exception as e:
         logger.error(f"Startup error: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the Betfair stream task, if running, market discovery and evaluation, the session keep-alive, the client's background loop and pooled HTTP connections."""
+    stream = getattr(app.state, "betfair_stream", None)
+    if stream:
+        await stream.stop()
+        app.state.betfair_stream = None
+    await evaluation_scheduler.stop()
+    await market_discovery.stop()
+    stream_manager = getattr(app.state, "stream_manager", None)
+    if stream_manager:
+        await stream_manager.stop()
+        app.state.stream_manager = None
+    keep_alive = getattr(app.state, "session_keep_alive", None)
+    if keep_alive:
+        keep_alive.cancel()
+    session_manager.close()
+    betfair_client.close()
+    http_client.close()
 
 
+
+async def run_first_watched_market():
+    """Run the betting workflow on the next market to start within the scan window."""
+    await market_discovery.refresh()
+    markets = market_discovery.watchlist()
+    if not markets:
+        logger.info("No markets start within the scan window")
+        return
+    market = markets[0]
+    await execute_betting_workflow(market["market_id"], market["time_to_start"], market["total_matched"])
+
 # ------------------------------------------------
 #               Main Execution
 # ------------------------------------------------
@@ -60,10 +94,7 @@ if __name__ == "__main__":
         logger.info(f"Path: {route.path}, Name: {route.name}, Methods: {route.methods}")
 
     # Run the betting workflow
-    market_id = "1.123456789"  # Example market ID
-    time_to_start = 179  # Minutes to start (example)
-    matched_amount = 7968  # Matched amount in AUD (example)
-    asyncio.run(execute_betting_workflow(market_id, time_to_start, matched_amount))
+    asyncio.run(run_first_watched_market())
 
     # Start the FastAPI server
     uvicorn.run(app, host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
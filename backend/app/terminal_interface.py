@@ -19,6 +19,9 @@ from app.betfair.utils import (
     get_account_funds,
     fetch_market_data
 )
+from app.betfair.client import betfair_client
+from app.betfair.ttl_cache import navigation_cache
+from app.betfair.discovery import market_discovery, minutes_until, parse_start_time
 from app.betting_wager.laydutch import LayDutchWager
 from app.betting_wager.backdutch import BackDutchWager
 from app.betting_wager.ltdModified import ModifiedLTDWager
@@ -124,7 +127,7 @@ async def execute_betting_workflow(market_id: str, time_to_start: int, matched_a
     match = Match(market_id, matched_amount, time_to_start)
     
     # Get market data to populate odds
-    market_data = await fetch_market_data(match.market_id)
+    market_data = await betfair_client.list_market_book(match.market_id)
     if not market_data or "result" not in market_data or not market_data["result"]:
         logger.error("Failed to fetch market data")
         return {"success": False, "message": "Failed to fetch market data"}
@@ -154,13 +157,13 @@ async def execute_betting_workflow(market_id: str, time_to_start: int, matched_a
         elif strategy_choice == 2:
             print("\nExecuting BackDutch Strategy...")
             wager = BackDutchWager(match)
-            # BackDutchWager doesn't have an async execute method, so we call place_back_dutch_bets
-            wager.place_back_dutch_bets()
+            # BackDutchWager doesn't have an async execute method, so we run place_back_dutch_bets on a worker thread
+            await asyncio.to_thread(wager.place_back_dutch_bets)
             result = {"success": True, "message": "BackDutch bets placed"}
         elif strategy_choice == 3:
             print("\nExecuting Modified LTD Strategy...")
             wager = ModifiedLTDWager(market_id, matched_amount, time_to_start, match.team1_odds, match.team2_odds)
-            wager.execute()
+            await asyncio.to_thread(wager.execute)
             result = {"success": True, "message": "Modified LTD strategy executed"}
     except Exception as e:
         logger.error(f"Error executing strategy: {str(e)}")
@@ -177,7 +180,12 @@ async def execute_betting_workflow(market_id: str, time_to_start: int, matched_a
         if "bet_results" in result:
             print("\nIndividual bet results:")
             for i, bet in enumerate(result["bet_results"], 1):
-                print(f"Bet {i}: {bet.get('message', 'No details')}")
+                if "size_matched" in bet:
+                    print(f"Bet {i}: {bet.get('side')} {bet.get('size')} @ {bet.get('price')} "
+                          f"- matched {bet.get('size_matched')} @ {bet.get('average_price_matched')}, "
+                          f"remaining {bet.get('size_remaining')} ({bet.get('status')})")
+                else:
+                    print(f"Bet {i}: {bet.get('message', 'No details')}")
     else:
         print("❌ Betting operation failed!")
         print(f"Reason: {result.get('message', 'Unknown error')}")
@@ -237,8 +245,10 @@ async def browse_markets():
     market_details = market_book["result"][0]
     matched_amount = market_details.get("totalMatched", 0)
     
-    # Calculate time to start in minutes (simplified)
-    time_to_start = get_numeric_input("Enter minutes until event starts", default=60, min_value=0)
+    # Time to start from the catalogue's scheduled start time
+    time_to_start = minutes_until(parse_start_time(selected_market.get("marketStartTime")))
+    if time_to_start is None:
+        time_to_start = get_numeric_input("Enter minutes until event starts", default=60, min_value=0)
     
     return {
         "market_id": market_id,
@@ -273,9 +283,10 @@ async def main_menu():
         print("\n1. Browse Markets")
         print("2. Enter Market ID Manually")
         print("3. Account Summary")
-        print("4. Exit")
+        print("4. Refresh Market Listings")
+        print("5. Exit")
         
-        choice = get_numeric_input("\nSelect an option", default=1, min_value=1, max_value=4)
+        choice = get_numeric_input("\nSelect an option", default=1, min_value=1, max_value=5)
         
         if choice == 1:
             market_info = await browse_markets()
@@ -291,8 +302,13 @@ async def main_menu():
             if not market_id:
                 continue
                 
-            time_to_start = get_numeric_input("Enter minutes until event starts", default=60, min_value=0)
-            matched_amount = get_numeric_input("Enter matched amount", default=1000, min_value=0)
+            market = await market_discovery.lookup(market_id)
+            if market and market.start_time:
+                time_to_start, matched_amount = market.time_to_start, market.total_matched
+                print(f"Starts in {time_to_start:.0f} minutes, ${matched_amount:.2f} matched")
+            else:
+                time_to_start = get_numeric_input("Enter minutes until event starts", default=60, min_value=0)
+                matched_amount = get_numeric_input("Enter matched amount", default=1000, min_value=0)
             
             await execute_betting_workflow(market_id, time_to_start, matched_amount)
         
@@ -300,6 +316,10 @@ async def main_menu():
             await account_summary()
         
         elif choice == 4:
+            removed = navigation_cache.invalidate()
+            print(f"\nCleared {removed} cached listings. Cache stats: {navigation_cache.stats()}")
+        
+        elif choice == 5:
             print("\nExiting application. Goodbye!")
             break
 
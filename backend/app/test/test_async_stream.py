@@ -0,0 +1,112 @@
+"""
+Tests for the asyncio stream client.
+
+The TLS connection is replaced by an in-memory StreamReader/writer pair.
+"""
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app.betfair.async_stream import AsyncBetfairStream
+from app.betfair.cache import MarketCache
+
+# ------------------------------------------------
+#               Mock Transport
+# ------------------------------------------------
+class MockWriter:
+    """Collect written messages."""
+    def __init__(self):
+        self.sent = []
+
+    def write(self, data):
+        self.sent.append(json.loads(data))
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+def encode(*messages):
+    return b"".join(json.dumps(message).encode() + b"\r\n" for message in messages)
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestAsyncBetfairStream(unittest.IsolatedAsyncioTestCase):
+    """Test cases for AsyncBetfairStream."""
+
+    def setUp(self):
+        self.cache = MarketCache()
+        self.stream = AsyncBetfairStream(cache=self.cache)
+        self.stream.reader = asyncio.StreamReader()
+        self.stream.writer = MockWriter()
+
+    async def test_read_messages(self):
+        """Messages split across reads are parsed, handled and yielded in order."""
+        data = encode(
+            {"op": "mcm", "clk": "1", "mc": [{"id": "1.1", "img": True, "rc": [{"id": 5, "atl": [[2.0, 10.0]]}]}]},
+            {"op": "mcm", "clk": "2", "ct": "HEARTBEAT"}
+        )
+        self.stream.reader.feed_data(data[:30])
+        self.stream.reader.feed_data(data[30:])
+        self.stream.reader.feed_eof()
+
+        received = []
+        with self.assertRaises(ConnectionError):
+            async for message in self.stream.read_messages():
+                received.append(message["clk"])
+        self.assertEqual(received, ["1", "2"])
+        self.assertEqual(self.stream.clk, "2")
+        self.assertEqual(self.cache.get_market_data("1.1")["runners"][0]["lay_odds"], 2.0)
+
+    async def test_consumers_end_on_stop(self):
+        """Async iteration ends cleanly when the stream is stopped."""
+        received = []
+
+        async def consume():
+            async for message in self.stream:
+                received.append(message)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        self.stream.consumers[0].offer({"op": "mcm"})
+        await self.stream.stop()
+        await asyncio.wait_for(consumer, 1)
+        self.assertEqual(received, [{"op": "mcm"}])
+        self.assertEqual(self.stream.consumers, [])
+
+    async def test_slow_consumer_queue_is_bounded(self):
+        """A consumer that falls behind loses its oldest messages instead of growing without limit."""
+        received = []
+
+        async def consume():
+            async for message in self.stream.consume(maxsize=2):
+                received.append(message["clk"])
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        self.stream.reader.feed_data(encode(*({"op": "mcm", "clk": str(clk)} for clk in range(3))))
+        self.stream.running = True
+        self.stream.task = asyncio.create_task(self.stream.run())
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.stream.consumers[0].dropped, 1)
+        await self.stream.stop()
+        await asyncio.wait_for(consumer, 1)
+        self.assertEqual(received, ["1", "2"])
+        with self.assertRaises(ValueError):
+            await self.stream.consume(policy="coalesce").__anext__()
+
+    async def test_silent_server_times_out(self):
+        """A server that accepts the connection and never answers raises a reconnectable error."""
+        stream = AsyncBetfairStream(cache=self.cache, timeout=0.05)
+        silent = AsyncMock(return_value=(asyncio.StreamReader(), MockWriter()))
+        with patch("app.betfair.async_stream.session_manager.get_token", AsyncMock(return_value="token")), \
+                patch("app.betfair.async_stream.asyncio.open_connection", silent):
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(stream.connect(), 1)
+        self.assertIsNone(stream.writer)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Tests for the unified Betfair client and its sync facade.
+"""
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from app.betfair.client import BetfairClient
+
+async def fake_market_data(market_id):
+    await asyncio.sleep(0)
+    return {"market_id": market_id, "runners": [], "thread": threading.get_ident()}
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestSyncFacade(unittest.TestCase):
+    """Test cases for BetfairClient.sync."""
+
+    def setUp(self):
+        self.client = BetfairClient()
+        patcher = patch("app.betfair.utils._fetch_market_data_async", side_effect=fake_market_data)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.client.close)
+
+    def test_calls_share_one_background_loop(self):
+        first = self.client.sync.get_market_data("1.1")
+        second = self.client.sync.get_market_data("1.2")
+        self.assertEqual(first["market_id"], "1.1")
+        self.assertEqual(first["thread"], self.client.background._thread.ident)
+        self.assertEqual(second["thread"], first["thread"])
+
+    def test_sync_call_inside_running_loop(self):
+        """The facade works from code running inside another event loop."""
+        async def route():
+            return self.client.sync.get_market_data("1.1")
+        self.assertEqual(asyncio.run(route())["market_id"], "1.1")
+
+    def test_sync_call_from_own_loop_is_rejected(self):
+        async def nested():
+            return self.client.sync.get_market_data("1.1")
+        with self.assertRaises(RuntimeError):
+            self.client.background.run(nested())
+
+    def test_non_coroutine_attributes_pass_through(self):
+        self.assertIs(self.client.sync.background, self.client.background)
+
+if __name__ == '__main__':
+    unittest.main()
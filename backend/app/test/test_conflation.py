@@ -0,0 +1,81 @@
+"""
+Tests for per-market conflation of stream updates.
+"""
+import asyncio
+import unittest
+
+from app.betfair.cache import MarketCache
+from app.betfair.conflation import MarketConflator
+from app.betfair.stream import BetfairStream
+
+# ------------------------------------------------
+#               Helpers
+# ------------------------------------------------
+def price_update(market_id, price, image=False):
+    return {"op": "mcm", "clk": str(price), "mc": [{"id": market_id, "img": image, "rc": [{"id": 1, "batl": [[0, price, 10.0]]}]}]}
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestMarketConflator(unittest.IsolatedAsyncioTestCase):
+    """Test cases for MarketConflator."""
+
+    async def asyncSetUp(self):
+        self.evaluated = []
+        self.stream = BetfairStream(cache=MarketCache())
+        self.conflator = MarketConflator(self.evaluate, window=0.05, cache=self.stream.market_cache)
+        self.stream.add_market_listener(self.conflator.notify)
+
+    def evaluate(self, market_id, market_book):
+        self.evaluated.append((market_id, market_book["runners"][0]["availableToLay"][0]["price"]))
+
+    async def test_burst_is_coalesced(self):
+        """A burst of updates yields one immediate and one trailing evaluation with the latest prices."""
+        self.stream.handle_message(price_update("1.1", 2.0, image=True))
+        await asyncio.sleep(0)
+        for price in (2.02, 2.04, 2.06, 2.08):
+            self.stream.handle_message(price_update("1.1", price))
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.evaluated, [("1.1", 2.0), ("1.1", 2.08)])
+        self.assertEqual(self.conflator.stats()["updates"], 5)
+
+    async def test_markets_are_independent(self):
+        """Each market has its own window."""
+        self.stream.handle_message(price_update("1.1", 2.0, image=True))
+        self.stream.handle_message(price_update("1.2", 3.0, image=True))
+        await asyncio.sleep(0.01)
+        self.assertEqual(sorted(self.evaluated), [("1.1", 2.0), ("1.2", 3.0)])
+
+    async def test_one_async_evaluation_in_flight(self):
+        """Updates during a slow async evaluation are evaluated once it finishes."""
+        calls = []
+
+        async def slow_evaluate(market_id, market_book):
+            calls.append(market_book["runners"][0]["availableToLay"][0]["price"])
+            await asyncio.sleep(0.1)
+
+        self.conflator.evaluate = slow_evaluate
+        self.conflator.window = 0.01
+        self.stream.handle_message(price_update("1.1", 2.0, image=True))
+        await asyncio.sleep(0.03)
+        self.stream.handle_message(price_update("1.1", 2.5))
+        await asyncio.sleep(0.03)
+        self.assertEqual(calls, [2.0])
+        await asyncio.sleep(0.15)
+        self.assertEqual(calls, [2.0, 2.5])
+
+class TestConflateMs(unittest.TestCase):
+    """The exchange-side conflation option is sent with the subscription."""
+
+    def test_subscription_includes_conflate_ms(self):
+        stream = BetfairStream(cache=MarketCache())
+        stream.authenticated = True
+        sent = []
+        stream.send_message = sent.append
+        stream.subscribe_to_markets(["1.1"], conflate_ms=250)
+        self.assertEqual(sent[-1]["conflateMs"], 250)
+        stream.subscribe_to_markets(["1.1"])
+        self.assertEqual(sent[-1]["conflateMs"], 250)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests for market discovery and the watchlist.
+
+listMarketCatalogue is replaced by an in-memory catalogue that honours the
+start time window, FIRST_TO_START ordering and the page size.
+"""
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from app.betfair.discovery import MarketDiscovery, format_time, minutes_until, parse_start_time
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+def catalogue_entry(market_id, minutes, total_matched=1000.0):
+    return {
+        "marketId": market_id,
+        "marketName": "Match Odds",
+        "marketStartTime": format_time(NOW + timedelta(minutes=minutes)),
+        "totalMatched": total_matched,
+        "event": {"name": f"Event {market_id}"},
+        "eventType": {"id": "1"},
+        "description": {"marketType": "MATCH_ODDS"},
+    }
+
+class FakeCatalogue:
+    """listMarketCatalogue over a fixed set of markets."""
+    def __init__(self, entries):
+        self.entries = entries
+        self.filters = []
+
+    async def __call__(self, market_filter, max_results=200, market_projection=None):
+        self.filters.append(market_filter)
+        if "marketIds" in market_filter:
+            return {"result": [entry for entry in self.entries if entry["marketId"] in market_filter["marketIds"]]}
+        start_from = parse_start_time(market_filter["marketStartTime"]["from"])
+        start_to = parse_start_time(market_filter["marketStartTime"]["to"])
+        matching = sorted(
+            (entry for entry in self.entries if start_from <= parse_start_time(entry["marketStartTime"]) <= start_to),
+            key=lambda entry: entry["marketStartTime"]
+        )
+        return {"result": matching[:max_results]}
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestMarketDiscovery(unittest.IsolatedAsyncioTestCase):
+    """Test cases for MarketDiscovery."""
+
+    def discovery(self, entries, **kwargs):
+        self.catalogue = FakeCatalogue(entries)
+        patcher = patch("app.betfair.discovery.list_market_catalogue_by_filter", self.catalogue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return MarketDiscovery(**kwargs)
+
+    def test_time_helpers(self):
+        start = parse_start_time("2024-05-01T12:30:00.000Z")
+        self.assertEqual(start, NOW + timedelta(minutes=30))
+        self.assertEqual(minutes_until(start, NOW), 30)
+        self.assertIsNone(parse_start_time("not a time"))
+
+    async def test_pages_through_the_window(self):
+        entries = [catalogue_entry(f"1.{index}", index) for index in range(1, 8)]
+        entries.append(catalogue_entry("1.99", 500))  # Outside the window
+        discovery = self.discovery(entries, event_type_ids=["1"], market_type_codes=["MATCH_ODDS"],
+                                   window_minutes=180, page_size=3)
+
+        changes = await discovery.refresh(NOW)
+
+        self.assertEqual(sorted(changes["added"]), [f"1.{index}" for index in range(1, 8)])
+        self.assertGreater(len(self.catalogue.filters), 2)
+        self.assertEqual(self.catalogue.filters[0]["eventTypeIds"], ["1"])
+        self.assertEqual(self.catalogue.filters[0]["marketTypeCodes"], ["MATCH_ODDS"])
+        self.assertEqual(self.catalogue.filters[0]["marketStartTime"]["to"], format_time(NOW + timedelta(minutes=180)))
+
+    async def test_markets_enter_and_leave_the_window(self):
+        entries = [catalogue_entry("1.1", 10), catalogue_entry("1.2", 60)]
+        discovery = self.discovery(entries)
+        added, removed = [], []
+        discovery.add_listener(added.extend, AsyncMock(side_effect=removed.extend))
+
+        await discovery.refresh(NOW)
+        entries.append(catalogue_entry("1.3", 90, total_matched=50.0))
+        entries[1]["totalMatched"] = 2500.0
+        changes = await discovery.refresh(NOW + timedelta(minutes=20))  # 1.1 has started
+
+        self.assertEqual(changes, {"added": ["1.3"], "removed": ["1.1"], "changed": []})
+        self.assertEqual(added, ["1.1", "1.2", "1.3"])
+        self.assertEqual(removed, ["1.1"])
+        self.assertEqual(discovery.get("1.2").total_matched, 2500.0)
+        self.assertEqual([market["market_id"] for market in discovery.watchlist()], ["1.2", "1.3"])
+
+    async def test_failed_refresh_keeps_watchlist(self):
+        discovery = self.discovery([catalogue_entry("1.1", 10)])
+        await discovery.refresh(NOW)
+        with patch("app.betfair.discovery.list_market_catalogue_by_filter", AsyncMock(return_value=None)):
+            changes = await discovery.refresh(NOW)
+        self.assertEqual(changes, {"added": [], "removed": [], "changed": []})
+        self.assertEqual(discovery.market_ids(), ["1.1"])
+        self.assertEqual(discovery.stats()["failures"], 1)
+
+    async def test_stream_manager_listener(self):
+        discovery = self.discovery([catalogue_entry("1.1", 10)])
+        stream_manager = AsyncMock()
+        stream_manager.add_markets.return_value = []
+        listener = discovery.attach_stream_manager(stream_manager)
+
+        await discovery.refresh(NOW)
+        self.catalogue.entries.clear()
+        await discovery.refresh(NOW)
+
+        stream_manager.add_markets.assert_awaited_once_with(["1.1"])
+        stream_manager.remove_markets.assert_awaited_once_with(["1.1"])
+        discovery.remove_listener(listener)
+        self.assertEqual(discovery.listeners, [])
+
+    async def test_lookup_falls_back_to_catalogue(self):
+        discovery = self.discovery([catalogue_entry("1.5", 600)])
+        market = await discovery.lookup("1.5")
+        self.assertEqual(market.market_type, "MATCH_ODDS")
+        self.assertIsNone(discovery.get("1.5"))
+        self.assertIsNone(await discovery.lookup("1.6"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for the stream event bus and its overflow policies.
+"""
+import asyncio
+import unittest
+
+from app.betfair.cache import MarketCache, RunnerBookCache
+from app.betfair.events import (
+    EventBus, MarketChangeEvent, RunnerChangeEvent, COALESCE, DROP_NEWEST, DROP_OLDEST
+)
+from app.betfair.stream import BetfairStream
+
+def runner_change_message(market_id, selection_id, ltp, pt=1000):
+    return {"op": "mcm", "pt": pt, "mc": [{"id": market_id, "rc": [{"id": selection_id, "ltp": ltp}]}]}
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestEventBus(unittest.IsolatedAsyncioTestCase):
+    """Test cases for EventBus and Subscription."""
+
+    async def asyncSetUp(self):
+        self.bus = EventBus()
+        self.stream = BetfairStream(cache=MarketCache())
+        self.bus.attach(self.stream)
+
+    async def test_typed_events_from_stream(self):
+        """An mcm message yields a market event followed by its runner events."""
+        subscription = self.bus.subscribe("strategy")
+        self.stream.handle_message(runner_change_message("1.1", 11, 2.5))
+        market_event = await subscription.get()
+        runner_event = await subscription.get()
+        self.assertIsInstance(market_event, MarketChangeEvent)
+        self.assertEqual(market_event.selection_ids, [11])
+        self.assertIsInstance(runner_event, RunnerChangeEvent)
+        self.assertEqual((runner_event.selection_id, runner_event.last_traded_price), (11, 2.5))
+
+    async def test_filters(self):
+        """Subscribers only receive the event types and markets they asked for."""
+        subscription = self.bus.subscribe("runners", event_types=(RunnerChangeEvent,), market_ids=["1.2"])
+        self.stream.handle_message(runner_change_message("1.1", 11, 2.5))
+        self.stream.handle_message(runner_change_message("1.2", 21, 3.0))
+        event = await subscription.get()
+        self.assertEqual((event.market_id, event.selection_id), ("1.2", 21))
+        self.assertTrue(subscription.queue.empty())
+
+    async def test_drop_policies(self):
+        """Full queues drop the oldest or the newest event without blocking the publisher."""
+        oldest = self.bus.subscribe("oldest", maxsize=2, policy=DROP_OLDEST, event_types=(RunnerChangeEvent,))
+        newest = self.bus.subscribe("newest", maxsize=2, policy=DROP_NEWEST, event_types=(RunnerChangeEvent,))
+        for ltp in (2.0, 2.2, 2.4):
+            self.stream.handle_message(runner_change_message("1.1", 11, ltp))
+        self.assertEqual([(await oldest.get()).last_traded_price for _ in range(2)], [2.2, 2.4])
+        self.assertEqual([(await newest.get()).last_traded_price for _ in range(2)], [2.0, 2.2])
+        self.assertEqual((oldest.dropped, newest.dropped), (1, 1))
+
+    async def test_coalesce_keeps_latest_per_runner(self):
+        """A coalescing subscriber sees one merged event per runner."""
+        dashboard = self.bus.subscribe("dashboard", maxsize=10, policy=COALESCE)
+        self.stream.handle_message(runner_change_message("1.1", 11, 2.0))
+        self.stream.handle_message({"op": "mcm", "pt": 1001, "mc": [{"id": "1.1", "rc": [{"id": 12, "tv": 50.0}]}]})
+        self.stream.handle_message(runner_change_message("1.1", 11, 2.4))
+        events = [await dashboard.get() for _ in range(3)]
+        self.assertTrue(dashboard.queue.empty())
+        self.assertEqual(events[0].selection_ids, [11, 12])
+        self.assertEqual(events[1].last_traded_price, 2.4)
+        self.assertEqual(events[2].traded_volume, 50.0)
+        self.assertEqual(dashboard.coalesced, 3)  # Two market events, one runner event
+
+    async def test_coalesced_ladders_keep_every_level(self):
+        """Coalescing merges ladder deltas per price, so removals are not lost."""
+        dashboard = self.bus.subscribe("dashboard", maxsize=10, policy=COALESCE, event_types=(RunnerChangeEvent,))
+        self.stream.handle_message({"op": "mcm", "pt": 1000, "mc": [{"id": "1.1", "rc": [
+            {"id": 11, "atl": [[2.0, 0]], "batl": [[0, 2.02, 8.0], [1, 2.04, 3.0]]}]}]})
+        self.stream.handle_message({"op": "mcm", "pt": 1001, "mc": [{"id": "1.1", "rc": [
+            {"id": 11, "atl": [[2.02, 8.0]], "batl": [[1, 2.06, 0]]}]}]})
+        change = (await dashboard.get()).change
+        self.assertEqual(change["atl"], [[2.0, 0], [2.02, 8.0]])
+        self.assertEqual(change["batl"], [[0, 2.02, 8.0], [1, 2.06, 0]])
+
+        # A book rebuilt from the merged delta matches one built from both deltas
+        merged, separate = RunnerBookCache(11), RunnerBookCache(11)
+        separate.apply({"atl": [[2.0, 5.0]]})
+        merged.apply({"atl": [[2.0, 5.0]]})
+        for rc in ({"atl": [[2.0, 0]]}, {"atl": [[2.02, 8.0]]}):
+            separate.apply(rc)
+        merged.apply(change)
+        self.assertEqual(merged.lay_ladder(), separate.lay_ladder())
+
+    async def test_image_replaces_coalesced_deltas(self):
+        """A runner change from a market image is not merged with older deltas."""
+        older = RunnerChangeEvent("1.1", 11, change={"atl": [[2.0, 5.0]]})
+        image = RunnerChangeEvent("1.1", 11, change={"atl": [[2.02, 8.0]]}, image=True)
+        self.assertEqual(image.merge(older).change, {"atl": [[2.02, 8.0]]})
+
+    async def test_slow_subscriber_does_not_stall_others(self):
+        """A subscriber that never reads does not delay delivery to another one."""
+        self.bus.subscribe("stalled", maxsize=1)
+        strategy = self.bus.subscribe("strategy", event_types=(RunnerChangeEvent,))
+        for ltp in (2.0, 2.2, 2.4):
+            self.stream.handle_message(runner_change_message("1.1", 11, ltp))
+        received = [await asyncio.wait_for(strategy.get(), 1) for _ in range(3)]
+        self.assertEqual([event.last_traded_price for event in received], [2.0, 2.2, 2.4])
+
+    async def test_close_ends_iteration(self):
+        """Closing the bus ends `async for` loops after queued events."""
+        subscription = self.bus.subscribe("consumer", event_types=(MarketChangeEvent,))
+        self.stream.handle_message(runner_change_message("1.1", 11, 2.0))
+        self.bus.close()
+        self.assertEqual(len([event async for event in subscription]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
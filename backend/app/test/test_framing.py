@@ -0,0 +1,76 @@
+"""
+Tests for the stream CRLF framer.
+"""
+import json
+import unittest
+
+from app.betfair.framing import LineFramer
+
+# ------------------------------------------------
+#               Mock Socket
+# ------------------------------------------------
+class MockSocket:
+    """Return pre-defined chunks from `recv_into`, then EOF."""
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def recv_into(self, buffer):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+def read_all(framer, sock):
+    messages = []
+    while framer.recv_into(sock):
+        messages.extend(json.loads(line) for line in framer.lines())
+    return messages
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestLineFramer(unittest.TestCase):
+    """Test cases for LineFramer."""
+
+    def test_message_split_across_reads(self):
+        """A message spanning two reads is returned once, complete."""
+        sock = MockSocket([b'{"op":"connection"}\r\n{"op":"mc', b'm","clk":"1"}\r\n'])
+        self.assertEqual(read_all(LineFramer(64), sock), [{"op": "connection"}, {"op": "mcm", "clk": "1"}])
+
+    def test_delimiter_split_across_reads(self):
+        """A CRLF split between two reads still terminates the line."""
+        sock = MockSocket([b'{"a":1}\r', b'\n{"b":2}\r\n'])
+        self.assertEqual(read_all(LineFramer(64), sock), [{"a": 1}, {"b": 2}])
+
+    def test_message_larger_than_buffer(self):
+        """The buffer grows for messages bigger than the read size."""
+        payload = json.dumps({"op": "mcm", "mc": [{"id": "1.%d" % i} for i in range(200)]}).encode()
+        chunks = [payload[i:i + 16] for i in range(0, len(payload), 16)] + [b"\r\n"]
+        messages = read_all(LineFramer(16), MockSocket(chunks))
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(len(messages[0]["mc"]), 200)
+
+    def test_partial_tail_is_kept(self):
+        """Incomplete data is held until the delimiter arrives."""
+        framer = LineFramer(32)
+        framer.feed(b'{"a":1}\r\n{"b"')
+        self.assertEqual(list(framer.lines()), [b'{"a":1}'])
+        self.assertEqual(len(framer), 4)
+        framer.feed(b':2}\r\n')
+        self.assertEqual(list(framer.lines()), [b'{"b":2}'])
+        self.assertEqual(len(framer), 0)
+
+    def test_overlapping_tail_moved_to_front(self):
+        """A partial tail longer than the consumed prefix is moved intact."""
+        framer = LineFramer(8)  # 16-byte buffer
+        framer.feed(b'ab\r\n' + b'0123456789')
+        self.assertEqual(list(framer.lines()), [b'ab'])
+        self.assertGreater(len(framer), framer.start)  # Tail [4:14] overlaps its destination [0:10]
+        framer.feed(b'xy\r\n')
+        self.assertEqual(framer.start, 0)
+        self.assertEqual(list(framer.lines()), [b'0123456789xy'])
+        self.assertEqual(len(framer), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Tests for the pooled Betfair HTTP client.
+
+Network calls are replaced by a fake session that sleeps like a round-trip.
+"""
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.betfair.http import BetfairHttpClient
+from app.betfair import utils
+from app.betfair.retry import RetryPolicy
+
+ROUND_TRIP = 0.2
+
+def slow_response(*args, **kwargs):
+    time.sleep(ROUND_TRIP)
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"result": [{"marketId": kwargs["json"]["params"]["marketIds"][0]}]}
+    return response
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestBetfairHttpClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for BetfairHttpClient."""
+
+    def setUp(self):
+        self.client = BetfairHttpClient(pool_size=8)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_one_session_per_host(self):
+        """Endpoints on the same host share a session; other hosts get their own."""
+        betting = self.client._session("https://api.betfair.com/exchange/betting/json-rpc/v1")
+        account = self.client._session("https://api.betfair.com/exchange/account/json-rpc/v1")
+        other = self.client._session("https://identitysso.betfair.com/api/login")
+        self.assertIs(betting, account)
+        self.assertIsNot(betting, other)
+
+    async def test_concurrent_calls_overlap(self):
+        """Concurrent market book fetches run in parallel and leave the loop responsive."""
+        session = self.client._session(utils.BETFAIR_API_URL)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        with patch.object(session, "post", side_effect=slow_response), \
+             patch("app.betfair.utils.http_client", self.client), \
+             patch("app.betfair.utils.retry_policy", RetryPolicy()), \
+             patch("app.betfair.utils.get_headers_async", return_value={}):
+            ticker_task = asyncio.create_task(ticker())
+            started = time.perf_counter()
+            books = await asyncio.gather(*(utils.list_market_book(f"1.{i}") for i in range(5)))
+            elapsed = time.perf_counter() - started
+            ticker_task.cancel()
+
+        self.assertEqual([book["result"][0]["marketId"] for book in books], [f"1.{i}" for i in range(5)])
+        self.assertLess(elapsed, ROUND_TRIP * 3)
+        self.assertGreater(ticks, 5)
+
+if __name__ == '__main__':
+    unittest.main()
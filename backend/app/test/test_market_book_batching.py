@@ -0,0 +1,82 @@
+"""
+Tests for batched listMarketBook requests and data-weight chunking.
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.betfair import utils
+from app.betfair.retry import RetryPolicy
+
+def book(market_id):
+    return {
+        "marketId": market_id,
+        "totalMatched": 100,
+        "runners": [{"selectionId": 1, "status": "ACTIVE",
+                     "ex": {"availableToBack": [{"price": 2.0, "size": 10}], "availableToLay": [{"price": 2.1, "size": 10}]}}]
+    }
+
+class FakeHttpClient:
+    """Answers listMarketBook requests, failing those that contain `failing_market`."""
+    def __init__(self, failing_market=None):
+        self.requests = []
+        self.failing_market = failing_market
+
+    async def post(self, url, headers, json):
+        market_ids = json["params"]["marketIds"]
+        self.requests.append(market_ids)
+        response = MagicMock(status_code=200)
+        if self.failing_market in market_ids:
+            response.json.return_value = {"error": {"code": -32099}}
+        else:
+            response.json.return_value = {"result": [book(market_id) for market_id in market_ids]}
+        return response
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestDataWeight(unittest.TestCase):
+    """Test cases for market_book_weight and chunk_market_ids."""
+
+    def test_projection_weights(self):
+        self.assertEqual(utils.market_book_weight(None), 2)
+        self.assertEqual(utils.market_book_weight({"priceData": ["EX_BEST_OFFERS"]}), 5)
+        self.assertEqual(utils.market_book_weight({"priceData": ["EX_BEST_OFFERS", "EX_TRADED"]}), 20)
+        self.assertEqual(utils.market_book_weight({"priceData": ["EX_ALL_OFFERS", "EX_TRADED", "SP_AVAILABLE"]}), 35)
+        self.assertEqual(utils.market_book_weight({"priceData": ["EX_BEST_OFFERS"],
+                                                   "exBestOffersOverrides": {"bestPricesDepth": 6}}), 10)
+
+    def test_chunks_respect_limit(self):
+        market_ids = [f"1.{i}" for i in range(500)]
+        chunks = utils.chunk_market_ids(market_ids, {"priceData": ["EX_BEST_OFFERS"]})
+        self.assertEqual(len(chunks), 13)
+        self.assertTrue(all(len(chunk) * 5 <= utils.MAX_DATA_WEIGHT for chunk in chunks))
+        self.assertEqual(sum(chunks, []), market_ids)
+        self.assertEqual(len(utils.chunk_market_ids(market_ids, {"priceData": ["EX_ALL_OFFERS", "EX_TRADED"]})), 84)
+
+class TestListMarketBooks(unittest.IsolatedAsyncioTestCase):
+    """Test cases for list_market_books and get_all_market_data."""
+
+    def setUp(self):
+        for target, value in (("single_flight", utils.SingleFlight()), ("retry_policy", RetryPolicy())):
+            patcher = patch(f"app.betfair.utils.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_batches_and_merges(self):
+        client = FakeHttpClient()
+        with patch("app.betfair.utils.http_client", client), patch("app.betfair.utils.get_headers_async", return_value={}):
+            books = await utils.list_market_books([f"1.{i}" for i in range(100)] + ["1.0"])
+        self.assertEqual(len(client.requests), 3)
+        self.assertEqual(len(books), 100)
+        self.assertEqual(books["1.42"]["marketId"], "1.42")
+
+    async def test_failed_chunk_leaves_empty_market_data(self):
+        client = FakeHttpClient(failing_market="1.45")
+        with patch("app.betfair.utils.http_client", client), patch("app.betfair.utils.get_headers_async", return_value={}), \
+             patch("app.betfair.utils.asyncio.sleep"):
+            market_data = await utils.get_all_market_data([f"1.{i}" for i in range(50)])
+        self.assertEqual(market_data["1.0"]["runners"][0]["back_odds"], 2.0)
+        self.assertEqual(market_data["1.45"]["runners"], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for the stream-fed market cache.
+
+Stream messages below follow the Exchange Stream API `mcm` format.
+"""
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app.betfair.cache import MarketCache, flatten_market_book
+from app.betfair.stream import BetfairStream
+from app.betfair.utils import Match
+from app.betting_wager.laydutch import LayDutchWager
+
+# ------------------------------------------------
+#               Mock Data
+# ------------------------------------------------
+def mock_image_message():
+    """Full market image with two active runners."""
+    return {
+        "op": "mcm",
+        "id": 1,
+        "initialClk": "AAA",
+        "clk": "AAB",
+        "pt": 1700000000000,
+        "ct": "SUB_IMAGE",
+        "mc": [{
+            "id": "1.100",
+            "img": True,
+            "tv": 1500.0,
+            "marketDefinition": {
+                "status": "OPEN",
+                "inPlay": False,
+                "runners": [
+                    {"id": 1, "status": "ACTIVE"},
+                    {"id": 2, "status": "ACTIVE"}
+                ]
+            },
+            "rc": [
+                {"id": 1, "atb": [[1.9, 100.0], [1.8, 50.0]], "atl": [[2.0, 80.0], [2.1, 40.0]], "ltp": 1.95, "tv": 900.0},
+                {"id": 2, "atb": [[2.9, 60.0]], "atl": [[3.0, 70.0]], "trd": [[3.0, 20.0]]}
+            ]
+        }]
+    }
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestMarketCache(unittest.TestCase):
+    """Test cases for MarketCache."""
+
+    def setUp(self):
+        self.cache = MarketCache()
+        self.stream = BetfairStream(cache=self.cache)
+        self.stream.handle_message(mock_image_message())
+
+    def test_full_image(self):
+        """A full image populates best prices and totals."""
+        market_data = self.cache.get_market_data("1.100")
+        self.assertEqual(market_data["total_matched"], 1500.0)
+        self.assertEqual(market_data["runners"], [
+            {"selection_id": 1, "back_odds": 1.9, "lay_odds": 2.0},
+            {"selection_id": 2, "back_odds": 2.9, "lay_odds": 3.0}
+        ])
+        self.assertEqual(self.stream.clk, "AAB")
+
+    def test_runner_delta(self):
+        """Deltas update and remove price points without touching the rest."""
+        self.stream.handle_message({
+            "op": "mcm", "clk": "AAC", "pt": 1700000000100,
+            "mc": [{"id": "1.100", "rc": [{"id": 1, "atl": [[2.0, 0], [1.98, 25.0]], "ltp": 1.99}]}]
+        })
+        book = self.cache.get_market_book("1.100")
+        runner = next(r for r in book["runners"] if r["selectionId"] == 1)
+        self.assertEqual(runner["availableToLay"], [{"price": 1.98, "size": 25.0}, {"price": 2.1, "size": 40.0}])
+        self.assertEqual(runner["availableToBack"][0], {"price": 1.9, "size": 100.0})
+        self.assertEqual(runner["lastPriceTraded"], 1.99)
+        self.assertEqual(book["publishTime"], 1700000000100)
+
+    def test_removed_runner_excluded(self):
+        """Runners marked REMOVED in the market definition are not offered to strategies."""
+        self.stream.handle_message({
+            "op": "mcm", "clk": "AAD",
+            "mc": [{"id": "1.100", "marketDefinition": {
+                "status": "OPEN",
+                "runners": [{"id": 1, "status": "ACTIVE"}, {"id": 2, "status": "REMOVED"}]
+            }}]
+        })
+        market_data = self.cache.get_market_data("1.100")
+        self.assertEqual([r["selection_id"] for r in market_data["runners"]], [1])
+
+    def test_snapshot_is_a_copy(self):
+        """Mutating a snapshot does not change the cache."""
+        book = self.cache.get_market_book("1.100")
+        book["runners"][0]["availableToLay"].clear()
+        self.assertTrue(self.cache.get_market_book("1.100")["runners"][0]["availableToLay"])
+
+    def test_unknown_market(self):
+        """Markets that are not streamed return None so callers can fall back to REST."""
+        self.assertIsNone(self.cache.get_market_data("1.999"))
+        self.assertIsNone(self.cache.get_market_book("1.999"))
+
+    def test_stopped_stream_falls_back_to_rest(self):
+        """Books of a stopped stream are hidden until it streams again, so strategies use REST."""
+        self.stream.subscribe_to_markets(["1.100"])
+        self.stream.stop()
+        self.assertIsNone(self.cache.get_market_data("1.100"))
+        rest_book = {"result": [{"marketId": "1.100", "status": "OPEN", "runners": []}]}
+        with patch("app.betting_wager.laydutch.market_cache", self.cache), \
+                patch("app.betting_wager.laydutch.list_market_book", AsyncMock(return_value=rest_book)) as rest:
+            book = asyncio.run(LayDutchWager(Match("1.100", 1000, 60)).get_market_book())
+        rest.assert_awaited_once_with("1.100")
+        self.assertEqual(book["runners"], [])
+
+        self.stream.handle_message({"op": "mcm", "clk": "AAC", "ct": "HEARTBEAT"})
+        self.assertIsNotNone(self.cache.get_market_book("1.100"))
+
+    def test_old_books_expire(self):
+        """Books neither updated nor confirmed for `max_age` seconds are not served."""
+        now = [0.0]
+        cache = MarketCache(max_age=15.0, clock=lambda: now[0])
+        BetfairStream(cache=cache).handle_message(mock_image_message())
+        now[0] = 15.0
+        self.assertIsNotNone(cache.get_market_book("1.100"))
+        now[0] = 15.1
+        self.assertIsNone(cache.get_market_book("1.100"))
+        cache.touch(["1.100"])
+        self.assertIsNotNone(cache.get_market_data("1.100"))
+
+    def test_flatten_rest_market_book(self):
+        """REST listMarketBook responses convert to the same flattened shape."""
+        response = {"result": [{
+            "marketId": "1.100",
+            "status": "OPEN",
+            "totalMatched": 10.0,
+            "runners": [{"selectionId": 1, "status": "ACTIVE", "ex": {
+                "availableToBack": [{"price": 1.9, "size": 5.0}],
+                "availableToLay": [{"price": 2.0, "size": 6.0}]
+            }}]
+        }]}
+        book = flatten_market_book(response)
+        self.assertEqual(book["runners"][0]["availableToLay"], [{"price": 2.0, "size": 6.0}])
+        self.assertIsNone(flatten_market_book({"result": []}))
+
+if __name__ == '__main__':
+    unittest.main()
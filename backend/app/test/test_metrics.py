@@ -0,0 +1,85 @@
+"""
+Tests for stream latency and liveness metrics.
+"""
+import json
+import time
+import unittest
+
+from app.betfair.cache import MarketCache
+from app.betfair.metrics import Histogram, MetricsRegistry, StreamMetrics
+from app.betfair.stream import BetfairStream
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestHistogram(unittest.TestCase):
+    """Test cases for Histogram."""
+
+    def test_percentiles(self):
+        histogram = Histogram(buckets=[1, 10, 100])
+        for value in [0.5] * 50 + [5] * 40 + [50] * 9 + [500]:
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["p50_ms"], 1)
+        self.assertEqual(snapshot["p90_ms"], 10)
+        self.assertEqual(snapshot["p99_ms"], 100)
+        self.assertEqual(snapshot["max_ms"], 500)
+
+    def test_empty(self):
+        self.assertIsNone(Histogram().snapshot()["p50_ms"])
+
+class TestStreamMetrics(unittest.TestCase):
+    """Test cases for StreamMetrics."""
+
+    def test_heartbeat_gap_detection(self):
+        """Silences longer than two heartbeat intervals are counted."""
+        metrics = StreamMetrics(heartbeat_ms=1000)
+        metrics.observe({"op": "mcm", "ct": "HEARTBEAT"}, 100.0, 0, 0)
+        metrics.observe({"op": "mcm", "ct": "HEARTBEAT"}, 101.0, 0, 0)
+        metrics.observe({"op": "mcm"}, 104.5, 0, 0)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["heartbeats"], 2)
+        self.assertEqual(snapshot["heartbeat_gaps"], 1)
+        self.assertEqual(snapshot["max_gap_ms"], 3500.0)
+        self.assertTrue(metrics.is_stale(now=107.0))
+
+    def test_stream_records_latency(self):
+        """process_line measures exchange-to-receive latency from `pt`."""
+        stream = BetfairStream(cache=MarketCache())
+        publish_time = int((time.time() - 0.25) * 1000)
+        stream.process_line(json.dumps({"op": "mcm", "pt": publish_time, "clk": "1", "mc": []}).encode())
+        snapshot = stream.metrics.snapshot()
+        self.assertEqual(snapshot["messages"], 1)
+        self.assertGreaterEqual(snapshot["latency"]["max_ms"], 250)
+        self.assertEqual(snapshot["handler"]["count"], 1)
+
+    def test_gauges(self):
+        metrics = StreamMetrics()
+        metrics.register_gauge("queue_depth", lambda: 7)
+        metrics.register_gauge("broken", lambda: 1 / 0)
+        self.assertEqual(metrics.snapshot()["gauges"], {"queue_depth": 7, "broken": None})
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for MetricsRegistry."""
+
+    def test_streams_with_same_subscription_id_do_not_collide(self):
+        registry = MetricsRegistry()
+        first, second = BetfairStream(cache=MarketCache()), BetfairStream(cache=MarketCache())
+        self.assertNotEqual(first.metrics_name, second.metrics_name)
+        registry.register(first.metrics_name, first.metrics)
+        registry.register(second.metrics_name, second.metrics)
+        registry.unregister(first.metrics_name, first.metrics)
+        self.assertIs(registry.get(second.metrics_name), second.metrics)
+        self.assertEqual(BetfairStream(metrics_name="dashboard").metrics_name, "dashboard")
+
+    def test_unregister_keeps_replacement(self):
+        registry = MetricsRegistry()
+        old, new = StreamMetrics(), StreamMetrics()
+        registry.register("stream", old)
+        registry.register("stream", new)
+        registry.unregister("stream", old)
+        self.assertIs(registry.get("stream"), new)
+
+if __name__ == '__main__':
+    unittest.main()
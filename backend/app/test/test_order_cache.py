@@ -0,0 +1,94 @@
+"""
+Tests for the order stream subscription and order cache.
+"""
+import unittest
+from unittest.mock import patch
+
+from app.betfair.cache import MarketCache, OrderCache
+from app.betfair.stream import BetfairStream
+
+# ------------------------------------------------
+#               Mock Stream
+# ------------------------------------------------
+class RecordingStream(BetfairStream):
+    """BetfairStream that records outgoing messages instead of writing to a socket."""
+    def __init__(self):
+        super().__init__(cache=MarketCache(), orders=OrderCache())
+        self.sent = []
+
+    def send_message(self, message):
+        self.sent.append(message)
+
+def connect_and_authenticate(stream):
+    with patch('app.betfair.stream.get_headers', return_value={"X-Application": "key", "X-Authentication": "token"}):
+        stream.handle_message({"op": "connection", "connectionId": "conn-1"})
+    stream.handle_message({"op": "status", "statusCode": "SUCCESS"})
+
+def order_change(bet_id, full_image=False, **fields):
+    order = {"id": bet_id, "p": 3.0, "s": 10.0, "side": "L", "status": "E", "pd": 1000}
+    order.update(fields)
+    runner_change = {"id": 47972, "uo": [order]}
+    if full_image:
+        runner_change["fullImage"] = True
+    return {"id": "1.1", "orc": [runner_change]}
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestOrderCache(unittest.TestCase):
+    """Test cases for ocm handling."""
+
+    def test_fills_update_order(self):
+        """Partial and full fills update matched, remaining and status."""
+        stream = RecordingStream()
+        stream.handle_message({"op": "ocm", "initialClk": "i", "clk": "c1",
+                               "oc": [order_change("101", sm=0.0, sr=10.0)]})
+        stream.handle_message({"op": "ocm", "clk": "c2",
+                               "oc": [order_change("101", sm=4.0, sr=6.0, avp=2.98)]})
+        order = stream.order_cache.get("101")
+        self.assertEqual((order["size_matched"], order["size_remaining"]), (4.0, 6.0))
+        self.assertEqual(order["average_price_matched"], 2.98)
+        self.assertEqual(order["side"], "LAY")
+
+        stream.handle_message({"op": "ocm", "clk": "c3",
+                               "oc": [order_change("101", sm=10.0, sr=0.0, avp=3.0, status="EC")]})
+        self.assertEqual(stream.order_cache.get("101")["status"], "EXECUTION_COMPLETE")
+        self.assertEqual((stream.order_initial_clk, stream.order_clk), ("i", "c3"))
+
+    def test_full_image_replaces_runner_orders(self):
+        """A fullImage runner change drops orders it no longer lists."""
+        cache = OrderCache()
+        cache.apply_order_changes([order_change("101"), order_change("102")])
+        cache.apply_order_changes([order_change("102", full_image=True, sm=10.0, sr=0.0)])
+        self.assertIsNone(cache.get("101"))
+        self.assertEqual(cache.get("102")["size_matched"], 10.0)
+        self.assertEqual(len(cache.get_market_orders("1.1")), 1)
+
+    def test_segmented_order_image(self):
+        """Segmented ocm messages are applied together on SEG_END."""
+        stream = RecordingStream()
+        stream.handle_message({"op": "ocm", "segmentType": "SEG_START", "initialClk": "i",
+                               "oc": [order_change("101")]})
+        self.assertEqual(len(stream.order_cache), 0)
+        stream.handle_message({"op": "ocm", "segmentType": "SEG_END", "clk": "c1",
+                               "oc": [order_change("102")]})
+        self.assertEqual(len(stream.order_cache), 2)
+        self.assertEqual(stream.order_clk, "c1")
+
+    def test_order_subscription_resumed_with_clocks(self):
+        """The order subscription is deferred until authentication and resumed after reconnect."""
+        stream = RecordingStream()
+        stream.subscribe_to_orders()
+        self.assertEqual(stream.sent, [])
+        connect_and_authenticate(stream)
+        self.assertEqual(stream.sent[-1]["op"], "orderSubscription")
+        stream.handle_message({"op": "ocm", "initialClk": "i", "clk": "c1", "oc": []})
+
+        stream.sent.clear()
+        connect_and_authenticate(stream)
+        subscription = stream.sent[-1]
+        self.assertEqual(subscription["op"], "orderSubscription")
+        self.assertEqual((subscription["initialClk"], subscription["clk"]), ("i", "c1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for bulk cancel/replace and repricing of unmatched dutch legs.
+"""
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.betfair import utils
+from app.betfair.cache import OrderCache
+from app.betfair.retry import RetryPolicy
+from app.betfair.utils import Match
+from app.betting_wager.laydutch import LayDutchWager
+
+class FakeExchange:
+    """Answers cancelOrders/replaceOrders for every bet and records the payloads."""
+    def __init__(self):
+        self.payloads = []
+
+    async def post(self, url, headers, json):
+        self.payloads.append(json)
+        method = json["method"].rsplit("/", 1)[-1]
+        response = MagicMock(status_code=200)
+        if method == "cancelOrders":
+            reports = [{"status": "SUCCESS", "instruction": instruction, "sizeCancelled": 6.0}
+                       for instruction in json["params"]["instructions"]]
+        elif method == "replaceOrders":
+            reports = [{
+                "status": "SUCCESS",
+                "cancelInstructionReport": {"status": "SUCCESS", "instruction": {"betId": instruction["betId"]},
+                                            "sizeCancelled": 6.0},
+                "placeInstructionReport": {"status": "SUCCESS", "betId": f"new-{instruction['betId']}",
+                                           "sizeMatched": 0.0, "orderStatus": "EXECUTABLE"},
+            } for instruction in json["params"]["instructions"]]
+        else:
+            reports = []
+        response.json.return_value = {"result": {"status": "SUCCESS", "instructionReports": reports,
+                                                 "currentOrders": [], "moreAvailable": False}}
+        return response
+
+def placed_leg(selection_id, bet_id, lay_odds):
+    return ({"selection_id": selection_id, "lay_odds": lay_odds, "stake": 10.0},
+            {"status": "SUCCESS", "betId": bet_id, "sizeMatched": 4.0, "orderStatus": "EXECUTABLE"})
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestOrderManagement(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the order management wrappers and LayDutch repricing."""
+
+    def setUp(self):
+        self.exchange = FakeExchange()
+        for target, value in (("app.betfair.utils.http_client", self.exchange),
+                              ("app.betfair.utils.retry_policy", RetryPolicy(base_delay=0)),
+                              ("app.betfair.utils.get_headers_async", AsyncMock(return_value={})),
+                              ("app.betting_wager.laydutch.order_cache", OrderCache())):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.wager = LayDutchWager(Match("1.1"))
+        self.wager.placed_bets = [placed_leg(1, "b1", 2.0), placed_leg(2, "b2", 3.0)]
+
+    async def test_list_current_orders_filters(self):
+        await utils.list_current_orders(["1.1"], bet_ids=["b1"], order_projection="EXECUTABLE")
+        self.assertEqual(self.exchange.payloads[0]["params"],
+                         {"marketIds": ["1.1"], "betIds": ["b1"], "orderProjection": "EXECUTABLE"})
+
+    async def test_cancel_without_instructions_cancels_market(self):
+        await utils.cancel_orders("1.1")
+        self.assertEqual(self.exchange.payloads[0]["params"], {"marketId": "1.1"})
+
+    async def test_cancel_unmatched_legs(self):
+        result = await self.wager.cancel_unmatched_legs()
+        self.assertEqual(len(self.exchange.payloads), 1)
+        self.assertEqual(result["cancelled"], 2)
+        self.assertEqual([bet["size_remaining"] for bet in result["bet_results"]], [0.0, 0.0])
+        self.assertEqual(self.wager.get_unmatched_legs(), [])
+
+    async def test_reprice_moves_legs_in_one_request(self):
+        book = {"runners": [
+            {"selectionId": 1, "availableToLay": [{"price": 2.04, "size": 50}]},  # 2% move
+            {"selectionId": 2, "availableToLay": [{"price": 3.5, "size": 50}]},   # 17% move
+        ]}
+        with patch("app.betting_wager.laydutch.market_cache") as cache:
+            cache.get_market_book.return_value = book
+            result = await self.wager.reprice_unmatched_legs()
+
+        self.assertEqual(len(self.exchange.payloads), 1)
+        self.assertEqual(self.exchange.payloads[0]["params"]["instructions"], [{"betId": "b1", "newPrice": 2.04}])
+        self.assertEqual(result["repriced"], 1)
+        bets = {bet["bet_id"]: bet for bet in result["bet_results"]}
+        self.assertEqual(bets["b1"]["size_remaining"], 0.0)
+        self.assertEqual((bets["new-b1"]["price"], bets["new-b1"]["size"]), (2.04, 6.0))
+        self.assertEqual(bets["b2"]["size_remaining"], 6.0)
+
+if __name__ == '__main__':
+    unittest.main()
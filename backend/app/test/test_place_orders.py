@@ -0,0 +1,170 @@
+"""
+Tests for batched, reconciled placeOrders requests.
+"""
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import requests
+
+from fastapi import HTTPException
+
+from app.betfair import utils
+from app.betfair.orders import OutstandingOrders, make_customer_ref, wager_group
+from app.betfair.retry import RetryPolicy
+from app.betfair.utils import Match, get_instruction_reports, limit_order_instruction
+from app.betting_wager.backdutch import BackDutchWager
+from app.betting_wager.laydutch import LayDutchWager
+
+class FakeExchange:
+    """
+    Accepts every instruction and answers listCurrentOrders from the orders
+    it holds. The first `lost_responses` placements are applied but time out.
+    """
+    def __init__(self, lost_responses=0):
+        self.payloads = []
+        self.orders = []
+        self.lost_responses = lost_responses
+
+    async def post(self, url, headers, json):
+        self.payloads.append(json)
+        response = MagicMock(status_code=200)
+        if json["method"].endswith("listCurrentOrders"):
+            refs = json["params"].get("customerOrderRefs", [])
+            response.json.return_value = {"result": {"currentOrders": [
+                order for order in self.orders if order["customerOrderRef"] in refs
+            ], "moreAvailable": False}}
+            return response
+        reports = []
+        for instruction in json["params"]["instructions"]:
+            bet_id = str(len(self.orders))
+            self.orders.append({"betId": bet_id, "customerOrderRef": instruction["customerOrderRef"],
+                                "status": "EXECUTABLE", "sizeMatched": 0.0})
+            reports.append({"status": "SUCCESS", "instruction": instruction, "betId": bet_id, "sizeMatched": 0.0})
+        if self.lost_responses:
+            self.lost_responses -= 1
+            raise requests.Timeout("response lost")
+        response.json.return_value = {"result": {"status": "SUCCESS", "instructionReports": reports}}
+        return response
+
+    def placements(self):
+        return [payload for payload in self.payloads if payload["method"].endswith("placeOrders")]
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestPlaceOrders(unittest.IsolatedAsyncioTestCase):
+    """Test cases for place_orders and its use by the dutch wagers."""
+
+    def setUp(self):
+        self.use_exchange(FakeExchange())
+        self.instructions = [limit_order_instruction(1, "LAY", 10, 2.0), limit_order_instruction(2, "LAY", 5, 3.5)]
+
+    def use_exchange(self, exchange):
+        self.client = exchange
+        for target, value in (("http_client", exchange), ("retry_policy", RetryPolicy(base_delay=0)),
+                              ("outstanding_orders", OutstandingOrders()), ("get_headers_async", AsyncMock(return_value={}))):
+            patcher = patch(f"app.betfair.utils.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_all_legs_in_one_request(self):
+        response = await utils.place_orders("1.1", self.instructions)
+        self.assertEqual(len(self.client.payloads), 1)
+        params = self.client.payloads[0]["params"]
+        self.assertEqual([instruction["selectionId"] for instruction in params["instructions"]], [1, 2])
+        self.assertEqual(response["result"]["customerRef"], params["customerRef"])
+        self.assertEqual([report["betId"] for report in get_instruction_reports(response)], ["0", "1"])
+        self.assertEqual(len(utils.outstanding_orders), 0)
+
+    def test_customer_ref_is_deterministic_per_group(self):
+        ref = make_customer_ref("1.1", self.instructions, "wager-1")
+        self.assertEqual(ref, make_customer_ref("1.1", self.instructions, "wager-1"))
+        self.assertNotEqual(ref, make_customer_ref("1.1", self.instructions, "wager-2"))
+        self.assertLessEqual(len(ref), 32)
+
+    async def test_lost_response_is_reconciled_not_resent(self):
+        self.use_exchange(FakeExchange(lost_responses=1))
+        response = await utils.place_orders("1.1", self.instructions)
+        self.assertEqual(len(self.client.placements()), 1)
+        self.assertEqual(len(self.client.orders), 2)
+        self.assertEqual(response["result"]["status"], "SUCCESS")
+        self.assertTrue(all(report["reconciled"] for report in get_instruction_reports(response)))
+
+    async def test_unplaced_orders_are_resent_with_same_ref(self):
+        exchange = FakeExchange()
+        real_post = exchange.post
+        calls = []
+
+        async def post(url, headers, json):
+            calls.append(json["method"])
+            if len(calls) == 1:
+                raise requests.ConnectionError("connection reset")
+            return await real_post(url, headers, json)
+        exchange.post = post
+        self.use_exchange(exchange)
+
+        response = await utils.place_orders("1.1", self.instructions, group="wager-1")
+        self.assertEqual(calls[1].rsplit("/", 1)[-1], "listCurrentOrders")
+        self.assertEqual(response["result"]["customerRef"], make_customer_ref("1.1", self.instructions, "wager-1"))
+        self.assertEqual(exchange.placements()[0]["params"]["customerRef"], response["result"]["customerRef"])
+        self.assertEqual(len(exchange.orders), 2)
+
+    async def timed_out_call(self, group):
+        """Place with a first response that never arrives, then repeat the call like a re-run would."""
+        exchange = FakeExchange()
+        real_post = exchange.post
+
+        async def post(url, headers, json):
+            response = await real_post(url, headers, json)
+            if len(exchange.placements()) == 1:
+                await asyncio.sleep(0.2)  # Longer than the caller waits
+            return response
+        exchange.post = post
+        self.use_exchange(exchange)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(utils.place_orders("1.1", self.instructions, group=group), 0.05)
+        await utils.place_orders("1.1", self.instructions, group=group)
+        return exchange
+
+    async def test_repeated_call_with_group_is_not_resent(self):
+        exchange = await self.timed_out_call(wager_group("laydutch", "1.1"))
+        self.assertEqual(len(exchange.placements()), 1)
+        self.assertEqual(len(exchange.orders), 2)
+
+    async def test_repeated_call_without_group_is_not_idempotent(self):
+        exchange = await self.timed_out_call(None)
+        self.assertEqual(len(exchange.orders), 4)
+
+    async def test_invalid_leg_rejects_batch(self):
+        with self.assertRaises(HTTPException):
+            limit_order_instruction(1, "BACK", 0, 2.0)
+        with self.assertRaises(HTTPException):
+            await utils.place_orders("1.1", [])
+        self.assertEqual(self.client.payloads, [])
+
+    def test_reports_matched_by_selection(self):
+        wager = LayDutchWager(Match("1.1"))
+        wager.selections = [{"selection_id": 1}, {"selection_id": 2}]
+        reports = [
+            {"status": "SUCCESS", "instruction": {"selectionId": 2}, "betId": "b2"},
+            {"status": "FAILURE", "instruction": {"selectionId": 1}, "errorCode": "BET_LAPSED_PRICE_IMPROVEMENT_TOO_LARGE"},
+        ]
+        placed = wager.match_instruction_reports(reports)
+        self.assertEqual([(selection["selection_id"], report["betId"]) for selection, report in placed], [(2, "b2")])
+
+    def test_backdutch_places_one_batch(self):
+        match = Match("1.1", matched_amount=1000, time_to_start=60)
+        market_data = {"runners": [{"selection_id": 1, "back_odds": 2.2}, {"selection_id": 2, "back_odds": 2.5}]}
+        client = MagicMock()
+        with patch("app.betting_wager.backdutch.market_cache") as cache, \
+             patch("app.betting_wager.backdutch.betfair_client", client):
+            cache.get_market_data.return_value = market_data
+            BackDutchWager(match).place_back_dutch_bets()
+        client.sync.place_orders.assert_called_once()
+        market_id, instructions = client.sync.place_orders.call_args.args
+        self.assertEqual([instruction["selectionId"] for instruction in instructions], [1, 2])
+        self.assertEqual(client.sync.place_orders.call_args.kwargs["group"], wager_group("backdutch", "1.1"))
+
+if __name__ == '__main__':
+    unittest.main()
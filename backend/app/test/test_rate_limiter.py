@@ -0,0 +1,86 @@
+"""
+Tests for the priority-aware request scheduler.
+"""
+import asyncio
+import time
+import unittest
+
+from app.betfair.rate_limiter import (
+    RequestScheduler, RequestDeadlineExceeded, TokenBucket, method_class, ORDER, PRICE, NAVIGATION
+)
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket and method classification."""
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        now = bucket.updated
+        self.assertTrue(bucket.try_acquire(now))
+        self.assertTrue(bucket.try_acquire(now))
+        self.assertFalse(bucket.try_acquire(now))
+        self.assertAlmostEqual(bucket.time_until_token(now), 0.1)
+        self.assertTrue(bucket.try_acquire(now + 0.11))
+
+    def test_method_classes(self):
+        self.assertEqual(method_class("SportsAPING/v1.0/placeOrders"), ORDER)
+        self.assertEqual(method_class("SportsAPING/v1.0/listMarketBook"), PRICE)
+        self.assertEqual(method_class("SportsAPING/v1.0/listMarketCatalogue"), NAVIGATION)
+
+class TestRequestScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for RequestScheduler."""
+
+    async def test_strict_priority(self):
+        """With one slot busy, queued orders run before prices, and prices before navigation."""
+        scheduler = RequestScheduler(max_in_flight=1)
+        order_of_execution = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        async def record(name):
+            order_of_execution.append(name)
+
+        busy = asyncio.create_task(scheduler.run("listEvents", blocker))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(scheduler.run(method, lambda m=method: record(m)))
+                 for method in ("listMarketCatalogue", "listMarketBook", "placeOrders")]
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()["classes"]["order"]["queued"], 1)
+        gate.set()
+        await asyncio.gather(busy, *tasks)
+        self.assertEqual(order_of_execution, ["placeOrders", "listMarketBook", "listMarketCatalogue"])
+
+    async def test_rate_limit_per_class(self):
+        """A class beyond its burst waits for refills without delaying other classes."""
+        scheduler = RequestScheduler(rates={NAVIGATION: (20.0, 1)})
+
+        async def noop():
+            return time.monotonic()
+
+        started = time.monotonic()
+        navigation = await asyncio.gather(*(scheduler.run("listEvents", noop) for _ in range(3)))
+        price = await scheduler.run("listMarketBook", noop)
+        self.assertGreaterEqual(navigation[-1] - started, 0.09)
+        self.assertLess(price - started, navigation[-1] - started + 0.05)
+        self.assertEqual(scheduler.stats()["classes"]["navigation"]["completed"], 3)
+
+    async def test_stale_reads_dropped(self):
+        """Reads that cannot get a slot before their deadline are dropped."""
+        scheduler = RequestScheduler(max_in_flight=1, deadlines={NAVIGATION: 0.05})
+        gate = asyncio.Event()
+        busy = asyncio.create_task(scheduler.run("placeOrders", gate.wait))
+        await asyncio.sleep(0)
+        with self.assertRaises(RequestDeadlineExceeded):
+            await scheduler.run("listEvents", lambda: asyncio.sleep(0))
+        gate.set()
+        await busy
+        stats = scheduler.stats()
+        self.assertEqual(stats["classes"]["navigation"]["dropped"], 1)
+        self.assertEqual((stats["in_flight"], stats["classes"]["navigation"]["queued"]), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Tests for the stream journal recorder and replay engine.
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from app.betfair.cache import MarketCache
+from app.betfair.recorder import StreamRecorder, StreamReplayer, read_journal
+from app.betfair.stream import BetfairStream
+
+# ------------------------------------------------
+#               Mock Data
+# ------------------------------------------------
+MESSAGES = [
+    {"op": "connection", "connectionId": "conn-1"},
+    {"op": "status", "statusCode": "SUCCESS"},
+    {"op": "mcm", "clk": "1", "mc": [{"id": "1.1", "img": True, "rc": [{"id": 1, "atl": [[2.0, 10.0]]}]}]},
+    {"op": "mcm", "clk": "2", "mc": [{"id": "1.1", "rc": [{"id": 1, "atl": [[2.0, 0], [2.02, 8.0]]}]}]},
+]
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestStreamRecorder(unittest.TestCase):
+    """Test cases for StreamRecorder and StreamReplayer."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "journal.jsonl.gz")
+
+    def write(self, messages, start=1000.0, step=0.1):
+        with StreamRecorder(self.path) as recorder:
+            for i, message in enumerate(messages):
+                recorder.record(json.dumps(message).encode(), received_at=start + i * step)
+
+    def test_append_across_sessions(self):
+        """Reopening a journal appends instead of truncating."""
+        self.write(MESSAGES[:2])
+        self.write(MESSAGES[2:], start=2000.0)
+        records = list(read_journal(self.path))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[2][0], 2000.0)
+        self.assertEqual(json.loads(records[3][1])["clk"], "2")
+
+    def test_replay_through_process_line(self):
+        """Replay takes the live parse/handle/metrics path and skips connection/status messages."""
+        self.write(MESSAGES)
+        recorder = MagicMock()
+        stream = BetfairStream(cache=MarketCache(), recorder=recorder)
+        stats = StreamReplayer(self.path, speed=None).replay(stream)
+        self.assertEqual(stats["messages"], 2)
+        self.assertEqual(stream.clk, "2")
+        self.assertEqual(stream.market_cache.get_market_data("1.1")["runners"][0]["lay_odds"], 2.02)
+        self.assertEqual(stream.metrics.messages, 4)
+        self.assertEqual(stream.metrics.last_message_at, 1000.3)  # Recorded receive time
+        self.assertIsNone(stream.connection_id)
+        recorder.record.assert_not_called()
+        self.assertIs(stream.recorder, recorder)
+        self.assertFalse(stream.replaying)
+
+    def test_replay_speed(self):
+        """Paced replay takes the recorded span divided by the speed."""
+        self.write(MESSAGES[2:], step=0.5)
+        stats = StreamReplayer(self.path, speed=10).replay(BetfairStream(cache=MarketCache()))
+        self.assertGreaterEqual(stats["elapsed_seconds"], 0.045)
+        self.assertAlmostEqual(stats["recorded_seconds"], 0.5)
+
+    def test_invalid_speed(self):
+        with self.assertRaises(ValueError):
+            StreamReplayer(self.path, speed=0)
+
+if __name__ == '__main__':
+    unittest.main()
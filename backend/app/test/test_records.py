@@ -0,0 +1,57 @@
+"""
+Tests for price projections and compact market book records.
+"""
+import unittest
+
+from app.betfair import utils
+from app.betfair.records import parse_market_book
+
+BOOK = {
+    "marketId": "1.1",
+    "status": "OPEN",
+    "totalMatched": 1234.5,
+    "runners": [
+        {"selectionId": 11, "status": "ACTIVE", "lastPriceTraded": 2.02, "totalMatched": 800.0,
+         "ex": {"availableToBack": [{"price": 2.0, "size": 50.0}, {"price": 1.98, "size": 20.0}],
+                "availableToLay": [{"price": 2.04, "size": 30.0}],
+                "tradedVolume": [{"price": 2.02, "size": 800.0}]}},
+        {"selectionId": 12, "status": "REMOVED", "ex": {}},
+        {"selectionId": 13, "status": "ACTIVE", "ex": {"availableToBack": [], "availableToLay": []}},
+    ],
+}
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestPriceProjection(unittest.TestCase):
+    """Test cases for build_price_projection."""
+
+    def test_options(self):
+        self.assertEqual(utils.build_price_projection(), {"priceData": ["EX_BEST_OFFERS"]})
+        projection = utils.build_price_projection(best_prices_depth=1, virtualise=True, traded=True)
+        self.assertEqual(projection["priceData"], ["EX_BEST_OFFERS", "EX_TRADED"])
+        self.assertEqual(projection["exBestOffersOverrides"], {"bestPricesDepth": 1})
+        self.assertTrue(projection["virtualise"])
+        self.assertNotIn("exBestOffersOverrides", utils.build_price_projection(best_prices_depth=5, all_offers=True))
+
+class TestMarketBookRecord(unittest.TestCase):
+    """Test cases for parse_market_book and format_market_data."""
+
+    def test_parse(self):
+        record = parse_market_book(BOOK)
+        runner = record.runners[0]
+        self.assertEqual((record.market_id, record.total_matched, len(record.runners)), ("1.1", 1234.5, 3))
+        self.assertEqual(list(runner.back_prices), [2.0, 1.98])
+        self.assertEqual((runner.best_back_size, runner.best_lay_price), (50.0, 2.04))
+        self.assertEqual(list(runner.traded_sizes), [800.0])
+        self.assertEqual([r.selection_id for r in record.active_runners()], [11, 13])
+        with self.assertRaises(AttributeError):
+            runner.extra = 1  # __slots__ records carry no per-instance dict
+
+    def test_format_market_data(self):
+        market_data = utils.format_market_data("1.1", BOOK)
+        self.assertEqual(market_data["runners"], [{"selection_id": 11, "back_odds": 2.0, "lay_odds": 2.04}])
+        self.assertEqual(market_data["total_matched"], 1234.5)
+
+if __name__ == '__main__':
+    unittest.main()
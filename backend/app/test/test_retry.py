@@ -0,0 +1,153 @@
+"""
+Tests for error classification, retry budget and circuit breakers.
+"""
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import requests
+from fastapi import HTTPException
+
+from app.betfair import utils
+from app.betfair.auth import BetfairAuthManager
+from app.betfair.rate_limiter import RequestDeadlineExceeded
+from app.betfair.retry import (
+    BetfairAPIError, CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy, check_rpc_error, is_retriable,
+    retry_policy
+)
+
+def aping_error(error_code):
+    return {"error": {"code": -32099, "data": {"APINGException": {"errorCode": error_code}}}}
+
+def fast_policy(**kwargs):
+    return RetryPolicy(base_delay=0, **kwargs)
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestClassification(unittest.TestCase):
+    """Test cases for check_rpc_error and is_retriable."""
+
+    def test_rpc_errors(self):
+        with self.assertRaises(BetfairAPIError) as raised:
+            check_rpc_error(aping_error("TOO_MUCH_DATA"))
+        self.assertEqual(raised.exception.error_code, "TOO_MUCH_DATA")
+        self.assertFalse(is_retriable(raised.exception))
+        self.assertTrue(is_retriable(BetfairAPIError("busy", "TOO_MANY_REQUESTS")))
+        self.assertEqual(check_rpc_error({"result": []}), {"result": []})
+
+    def test_http_and_transport_errors(self):
+        self.assertTrue(is_retriable(HTTPException(status_code=503)))
+        self.assertFalse(is_retriable(HTTPException(status_code=400)))
+        self.assertFalse(is_retriable(TypeError("bad argument")))
+        self.assertTrue(is_retriable(requests.Timeout()))
+
+    def test_non_idempotent_calls(self):
+        """Orders are only retried when the exchange provably rejected them."""
+        self.assertFalse(is_retriable(requests.Timeout(), idempotent=False))
+        self.assertFalse(is_retriable(HTTPException(status_code=500), idempotent=False))
+        self.assertTrue(is_retriable(HTTPException(status_code=429), idempotent=False))
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker."""
+
+    def test_open_half_open_close(self):
+        breaker = CircuitBreaker("listMarketBook", failure_threshold=2, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow())  # Reset timeout elapsed: one trial call
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+class TestRetryPolicy(unittest.IsolatedAsyncioTestCase):
+    """Test cases for RetryPolicy.call."""
+
+    async def test_fatal_error_not_retried(self):
+        operation = AsyncMock(side_effect=BetfairAPIError("bad", "INVALID_INPUT_DATA"))
+        with self.assertRaises(BetfairAPIError):
+            await fast_policy().call(operation, endpoint="listEvents")
+        self.assertEqual(operation.await_count, 1)
+
+    async def test_transient_error_retried(self):
+        operation = AsyncMock(side_effect=[HTTPException(status_code=503), {"result": [1]}])
+        self.assertEqual(await fast_policy().call(operation, endpoint="listEvents"), {"result": [1]})
+        self.assertEqual(operation.await_count, 2)
+
+    async def test_budget_limits_retries(self):
+        policy = fast_policy(budget=RetryBudget(rate=0, burst=1))
+        operation = AsyncMock(side_effect=requests.ConnectionError("down"))
+        with self.assertRaises(requests.ConnectionError):
+            await policy.call(operation, endpoint="listMarketBook", retries=5)
+        self.assertEqual(operation.await_count, 2)
+        self.assertEqual(policy.budget.exhausted, 1)
+
+    async def test_open_circuit_fails_fast(self):
+        policy = fast_policy()
+        policy.breakers["listMarketBook"] = CircuitBreaker("listMarketBook", failure_threshold=2)
+        operation = AsyncMock(side_effect=requests.ConnectionError("down"))
+        with self.assertRaises(requests.ConnectionError):
+            await policy.call(operation, endpoint="listMarketBook", retries=2)
+        with self.assertRaises(CircuitOpenError):
+            await policy.call(operation, endpoint="listMarketBook")
+        self.assertEqual(operation.await_count, 2)
+        await fast_policy().call(AsyncMock(return_value={"result": []}), endpoint="listEvents")
+
+    def half_open_policy(self):
+        policy = fast_policy()
+        breaker = policy.breakers["listMarketBook"] = CircuitBreaker("listMarketBook", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        return policy, breaker
+
+    async def test_unclassified_error_releases_trial(self):
+        policy, breaker = self.half_open_policy()
+        with self.assertRaises(RequestDeadlineExceeded):
+            await policy.call(AsyncMock(side_effect=RequestDeadlineExceeded("late")), endpoint="listMarketBook")
+        self.assertFalse(breaker.trial_in_flight)
+        self.assertEqual(await policy.call(AsyncMock(return_value={"result": []}), endpoint="listMarketBook"), {"result": []})
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_cancelled_trial_releases_trial(self):
+        policy, breaker = self.half_open_policy()
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        task = asyncio.create_task(policy.call(hang, endpoint="listMarketBook"))
+        await started.wait()
+        self.assertTrue(breaker.trial_in_flight)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertFalse(breaker.trial_in_flight)
+        self.assertEqual(await policy.call(AsyncMock(return_value={"result": []}), endpoint="listMarketBook"), {"result": []})
+
+    async def test_rejected_session_is_replaced_before_retry(self):
+        tokens = []
+
+        async def post(url, headers, json):
+            tokens.append(headers["X-Authentication"])
+            response = MagicMock(status_code=200)
+            response.json.return_value = aping_error("INVALID_SESSION_INFORMATION") if len(tokens) == 1 else {"result": []}
+            return response
+
+        def login():
+            BetfairAuthManager.session_token = "new-token"
+            BetfairAuthManager.token_expiration = datetime.now() + timedelta(hours=24)
+
+        with patch.object(BetfairAuthManager, "session_token", "rejected-token"), \
+                patch.object(BetfairAuthManager, "token_expiration", datetime.now() + timedelta(hours=24)), \
+                patch.object(BetfairAuthManager, "login", login), \
+                patch.object(retry_policy, "base_delay", 0), \
+                patch.object(utils.http_client, "post", post):
+            result = await utils.list_market_catalogue_by_filter({"eventTypeIds": ["1"]})
+        self.assertEqual(result, {"result": []})
+        self.assertEqual(tokens, ["rejected-token", "new-token"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the vectorized market scanner.
+"""
+import unittest
+
+from app.betfair.records import parse_market_book
+from app.betting_wager.scanner import BACKDUTCH, LAYDUTCH, LTD, MarketScanner, PriceMatrix
+
+def record(market_id, prices, total_matched=1000, lay_size=100):
+    """Market book with one runner per (back, lay) price pair."""
+    return parse_market_book({
+        "marketId": market_id,
+        "totalMatched": total_matched,
+        "runners": [
+            {"selectionId": index, "status": "ACTIVE", "ex": {
+                "availableToBack": [{"price": back, "size": 100}] if back else [],
+                "availableToLay": [{"price": lay, "size": lay_size}] if lay else [],
+            }}
+            for index, (back, lay) in enumerate(prices, 1)
+        ],
+    })
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestMarketScanner(unittest.TestCase):
+    """Test cases for PriceMatrix and MarketScanner."""
+
+    def test_price_matrix_pads_ragged_markets(self):
+        prices = PriceMatrix.from_records([record("1.1", [(2.0, 2.02)]), record("1.2", [(3.0, 3.1), (1.5, None)])])
+        self.assertEqual(prices.back.shape, (2, 2))
+        self.assertEqual(prices.back[1].tolist(), [3.0, 1.5])
+        self.assertTrue(all(value != value for value in (prices.back[0, 1], prices.lay[1, 1])))  # NaN padding
+
+    def test_books_and_overround(self):
+        metrics = MarketScanner(commission=0.05).evaluate(PriceMatrix.from_records([record("1.1", [(2.2, 4.0), (2.2, 2.5)])]))
+        self.assertAlmostEqual(metrics["back_book"][0], 2 / 2.2)
+        self.assertAlmostEqual(metrics["lay_book"][0], 0.65)
+        self.assertAlmostEqual(metrics["lay_overround"][0], 0.65 * 1.05 - 1)
+
+    def test_strategy_flags_and_ranking(self):
+        markets = [
+            record("back", [(2.2, 2.3), (2.5, 2.6)]),            # Back book 0.85: back dutch
+            record("lay", [(1.75, 1.8), (3.9, 4.0), (2.2, 11.0)]),  # Lay book 0.81 in band, range 2.2: lay dutch and LTD
+            record("none", [(1.8, 1.82), (2.0, 2.02)]),          # Overround above 100%, range too small
+            record("thin", [(2.2, 2.3), (2.5, 2.6)], total_matched=100),  # Too little matched
+            record("empty", []),
+        ]
+        candidates = MarketScanner().scan(markets)
+        self.assertEqual([candidate["market_id"] for candidate in candidates], ["lay", "back"])
+        self.assertEqual(candidates[0]["strategies"], [LAYDUTCH, LTD])
+        self.assertEqual(candidates[1]["strategies"], [BACKDUTCH])
+        self.assertGreater(candidates[0]["score"], candidates[1]["score"])
+
+    def test_start_time_and_limit(self):
+        markets = [record("back", [(2.2, 2.3), (2.5, 2.6)]), record("lay", [(1.75, 1.8), (3.9, 4.0), (2.2, 11.0)])]
+        self.assertEqual(MarketScanner().scan(markets, start_minutes={"lay": 600}, limit=5)[0]["market_id"], "back")
+        self.assertEqual(len(MarketScanner().scan(markets, limit=1)), 1)
+        self.assertEqual(MarketScanner().scan([]), [])
+
+if __name__ == '__main__':
+    unittest.main()
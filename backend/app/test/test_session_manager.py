@@ -0,0 +1,87 @@
+"""
+Tests for the non-blocking Betfair session manager.
+
+Logins and keepAlive calls are replaced by fakes that sleep like a round-trip.
+"""
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.betfair.auth import BetfairAuthManager, SessionManager
+
+ROUND_TRIP = 0.1
+
+def slow_login():
+    time.sleep(ROUND_TRIP)
+    BetfairAuthManager.session_token = f"token-{threading.current_thread().name}"
+    BetfairAuthManager.token_expiration = datetime.now() + timedelta(hours=24)
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestSessionManager(unittest.IsolatedAsyncioTestCase):
+    """Test cases for SessionManager."""
+
+    def setUp(self):
+        self.manager = SessionManager()
+        self.addCleanup(self.manager.close)
+        for attribute, value in (("session_token", None), ("token_expiration", None)):
+            patcher = patch.object(BetfairAuthManager, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_concurrent_callers_share_one_login(self):
+        with patch.object(BetfairAuthManager, "login", side_effect=slow_login) as login:
+            tokens = await asyncio.gather(*(self.manager.get_token() for _ in range(5)))
+        self.assertEqual(login.call_count, 1)
+        self.assertEqual(len(set(tokens)), 1)
+        self.assertEqual(self.manager.shared, 4)
+
+    async def test_login_does_not_block_loop(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        with patch.object(BetfairAuthManager, "login", side_effect=slow_login):
+            await self.manager.get_token()
+        ticker_task.cancel()
+        self.assertGreater(ticks, 3)
+
+    async def test_refresh_before_expiry_uses_keep_alive(self):
+        BetfairAuthManager.session_token = "old"
+        BetfairAuthManager.token_expiration = datetime.now() + timedelta(seconds=60)
+
+        def keep_alive():
+            time.sleep(ROUND_TRIP)
+            BetfairAuthManager.token_expiration = datetime.now() + timedelta(hours=24)
+            return True
+
+        with patch.object(BetfairAuthManager, "keep_alive", side_effect=keep_alive), \
+             patch.object(BetfairAuthManager, "login") as login:
+            started = time.perf_counter()
+            self.assertEqual(await self.manager.get_token(), "old")  # Served without waiting
+            self.assertLess(time.perf_counter() - started, ROUND_TRIP)
+            await asyncio.wrap_future(self.manager.start_refresh(keep_alive=True))
+        login.assert_not_called()
+        self.assertEqual(self.manager.keep_alives, 1)
+        self.assertGreater(self.manager.expires_in(), 3600)
+
+    async def test_cancelled_caller_does_not_cancel_refresh(self):
+        with patch.object(BetfairAuthManager, "login", side_effect=slow_login):
+            first = asyncio.create_task(self.manager.get_token())
+            second = asyncio.create_task(self.manager.get_token())
+            await asyncio.sleep(0.01)
+            first.cancel()
+            self.assertTrue((await second).startswith("token-"))
+        self.assertTrue(first.cancelled())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests for single-flight coalescing of identical Betfair read calls.
+"""
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.betfair import utils
+from app.betfair.retry import RetryPolicy
+
+class CountingHttpClient:
+    """Fake pooled client that counts requests and answers after a short delay."""
+    def __init__(self):
+        self.requests = 0
+
+    async def post(self, url, headers, json):
+        self.requests += 1
+        await asyncio.sleep(0.05)
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"result": [{"marketId": json["params"]["marketIds"][0], "runners": []}]}
+        return response
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test cases for SingleFlight and its use in the read helpers."""
+
+    def setUp(self):
+        self.client = CountingHttpClient()
+        for target, value in (("http_client", self.client), ("single_flight", utils.SingleFlight()),
+                              ("retry_policy", RetryPolicy()),
+                              ("get_headers_async", AsyncMock(return_value={}))):
+            patcher = patch(f"app.betfair.utils.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_concurrent_identical_calls_share_one_request(self):
+        books = await asyncio.gather(*(utils.list_market_book("1.1") for _ in range(5)))
+        self.assertEqual(self.client.requests, 1)
+        self.assertTrue(all(book is books[0] for book in books))
+        self.assertEqual(utils.single_flight.stats()["shared"], 4)
+
+    async def test_different_params_are_not_coalesced(self):
+        await asyncio.gather(utils.list_market_book("1.1"), utils.list_market_book("1.2"))
+        self.assertEqual(self.client.requests, 2)
+
+    async def test_freshness_window(self):
+        """Market books completed within the freshness window are reused, then refetched."""
+        await utils.list_market_book("1.1")
+        await utils.list_market_book("1.1")
+        self.assertEqual(self.client.requests, 1)
+        await asyncio.sleep(utils.MARKET_BOOK_FRESHNESS)
+        await utils.list_market_book("1.1")
+        self.assertEqual(self.client.requests, 2)
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        first = asyncio.ensure_future(utils.list_market_book("1.1"))
+        second = asyncio.ensure_future(utils.list_market_book("1.1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual((await second)["result"][0]["marketId"], "1.1")
+        self.assertEqual(self.client.requests, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for the sharded stream manager.
+
+Stream connections are replaced by in-memory fakes that record subscriptions.
+"""
+import time
+import unittest
+from collections import deque
+
+from app.betfair.cache import MarketCache
+from app.betfair.stream_manager import RATE_WINDOW_SECONDS, StreamManager
+
+# ------------------------------------------------
+#               Mock Stream
+# ------------------------------------------------
+class MockStream:
+    """Stand-in for AsyncBetfairStream."""
+    def __init__(self, subscription_id):
+        self.subscription_id = subscription_id
+        self.running = False
+        self.subscriptions = []
+        self.message_count = 0
+        self.initialClk = None
+        self.clk = None
+
+    async def start(self):
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+    def subscribe_to_markets(self, market_ids):
+        self.subscriptions.append(list(market_ids))
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestStreamManager(unittest.IsolatedAsyncioTestCase):
+    """Test cases for StreamManager."""
+
+    async def asyncSetUp(self):
+        self.cache = MarketCache()
+        self.manager = StreamManager(
+            connections=3, max_markets_per_connection=4, cache=self.cache,
+            stream_factory=lambda index: MockStream(index + 1)
+        )
+        await self.manager.start()
+
+    async def asyncTearDown(self):
+        await self.manager.stop()
+
+    async def test_stable_sharding(self):
+        """Markets land on their hashed connection and stay there."""
+        market_ids = [f"1.{i}" for i in range(4)]
+        await self.manager.add_markets(market_ids)
+        for market_id in market_ids:
+            index = self.manager.assignments[market_id]
+            self.assertEqual(index, StreamManager.home_shard(market_id, 3))
+            self.assertIn(market_id, self.manager.streams[index].subscriptions[-1])
+
+    async def test_capacity_overflow(self):
+        """Markets beyond the per-connection cap spill over, and are rejected when all are full."""
+        rejected = await self.manager.add_markets([f"1.{i}" for i in range(14)])
+        self.assertEqual(len(rejected), 2)
+        self.assertTrue(all(len(shard) <= 4 for shard in self.manager.shards))
+
+    async def test_rebalance_drops_closed_markets(self):
+        """Closed markets are unsubscribed and empty connections are closed."""
+        await self.manager.add_markets(["1.1"])
+        index = self.manager.assignments["1.1"]
+        self.cache.apply_market_change({"id": "1.1", "img": True, "marketDefinition": {"status": "CLOSED"}})
+        await self.manager.rebalance()
+        self.assertNotIn("1.1", self.manager.assignments)
+        self.assertNotIn("1.1", self.cache)
+        self.assertFalse(self.manager.streams[index].running)
+
+    async def test_stats(self):
+        """Stats report markets and message counts per connection."""
+        await self.manager.add_markets(["1.1"])
+        index = self.manager.assignments["1.1"]
+        self.manager.streams[index].message_count = 10
+        stats = self.manager.stats()
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats[index]["markets"], 1)
+        self.assertEqual(stats[index]["messages"], 10)
+        self.assertGreater(stats[index]["messages_per_second"], 0)
+
+    async def test_rate_is_not_changed_by_reading(self):
+        """Repeated reads report the same windowed rate; only sampling moves the window."""
+        stream = self.manager.streams[0]
+        self.manager._rate_samples[0] = deque([(time.monotonic() - 10, 0)])
+        stream.message_count = 100
+        first = self.manager.stats()[0]["messages_per_second"]
+        self.assertAlmostEqual(self.manager.stats()[0]["messages_per_second"], first, delta=0.5)
+        self.assertAlmostEqual(first, 10, delta=0.5)
+
+        now = time.monotonic()
+        self.manager.sample_rates(now - 5)
+        self.manager.sample_rates(now + RATE_WINDOW_SECONDS - 1)
+        self.assertEqual(len(self.manager._rate_samples[0]), 2)  # Oldest sample fell out of the window
+
+if __name__ == '__main__':
+    unittest.main()
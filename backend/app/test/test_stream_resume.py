@@ -0,0 +1,92 @@
+"""
+Tests for stream subscription resume and segmented image assembly.
+"""
+import unittest
+from unittest.mock import patch
+
+from app.betfair.cache import MarketCache
+from app.betfair.stream import BetfairStream
+
+# ------------------------------------------------
+#               Mock Stream
+# ------------------------------------------------
+class RecordingStream(BetfairStream):
+    """BetfairStream that records outgoing messages instead of writing to a socket."""
+    def __init__(self):
+        super().__init__(cache=MarketCache())
+        self.sent = []
+
+    def send_message(self, message):
+        self.sent.append(message)
+
+def connect_and_authenticate(stream):
+    with patch('app.betfair.stream.get_headers', return_value={"X-Application": "key", "X-Authentication": "token"}):
+        stream.handle_message({"op": "connection", "connectionId": "conn-1"})
+    stream.handle_message({"op": "status", "statusCode": "SUCCESS"})
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestStreamResume(unittest.TestCase):
+    """Test cases for resubscription with stored clocks."""
+
+    def test_subscription_deferred_until_authenticated(self):
+        """Subscribing before authentication sends the subscription after the SUCCESS status."""
+        stream = RecordingStream()
+        stream.subscribe_to_markets(["1.1"])
+        self.assertEqual(stream.sent, [])
+        connect_and_authenticate(stream)
+        self.assertEqual([m["op"] for m in stream.sent], ["authentication", "marketSubscription"])
+        self.assertNotIn("clk", stream.sent[-1])
+
+    def test_reconnect_resumes_with_clocks(self):
+        """After a reconnect the same markets are resubscribed with the last clocks."""
+        stream = RecordingStream()
+        stream.subscribe_to_markets(["1.1", "1.2"])
+        connect_and_authenticate(stream)
+        stream.handle_message({"op": "mcm", "initialClk": "init", "clk": "c1", "ct": "SUB_IMAGE", "mc": []})
+        stream.handle_message({"op": "mcm", "clk": "c2", "mc": []})
+
+        stream.sent.clear()
+        connect_and_authenticate(stream)
+        subscription = stream.sent[-1]
+        self.assertEqual(subscription["marketFilter"]["marketIds"], ["1.1", "1.2"])
+        self.assertEqual((subscription["initialClk"], subscription["clk"]), ("init", "c2"))
+
+    def test_new_market_set_drops_clocks(self):
+        """Clocks are not reused for a different market set."""
+        stream = RecordingStream()
+        stream.subscribe_to_markets(["1.1"])
+        connect_and_authenticate(stream)
+        stream.handle_message({"op": "mcm", "initialClk": "init", "clk": "c1", "mc": []})
+        stream.subscribe_to_markets(["1.1", "1.3"])
+        self.assertNotIn("clk", stream.sent[-1])
+
+class TestSegmentedImage(unittest.TestCase):
+    """Test cases for SEG_START/SEG/SEG_END assembly."""
+
+    def test_segments_applied_atomically(self):
+        """Nothing is visible and clocks do not move until SEG_END arrives."""
+        stream = RecordingStream()
+        cache = stream.market_cache
+        stream.handle_message({"op": "mcm", "segmentType": "SEG_START", "initialClk": "init", "ct": "SUB_IMAGE",
+                               "mc": [{"id": "1.1", "img": True, "rc": [{"id": 1, "atl": [[2.0, 5.0]]}]}]})
+        stream.handle_message({"op": "mcm", "segmentType": "SEG",
+                               "mc": [{"id": "1.2", "img": True, "rc": [{"id": 1, "atl": [[3.0, 5.0]]}]}]})
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(stream.initialClk)
+
+        stream.handle_message({"op": "mcm", "segmentType": "SEG_END", "clk": "c1",
+                               "mc": [{"id": "1.3", "img": True, "rc": [{"id": 1, "atl": [[4.0, 5.0]]}]}]})
+        self.assertEqual(sorted(cache.market_ids()), ["1.1", "1.2", "1.3"])
+        self.assertEqual((stream.initialClk, stream.clk), ("init", "c1"))
+
+    def test_orphan_segment_end_discarded(self):
+        """A SEG_END without its SEG_START is ignored."""
+        stream = RecordingStream()
+        stream.handle_message({"op": "mcm", "segmentType": "SEG_END", "clk": "c1", "mc": [{"id": "1.1", "img": True}]})
+        self.assertEqual(len(stream.market_cache), 0)
+        self.assertIsNone(stream.clk)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Tests for the hierarchical timing wheel and the strategy evaluation scheduler.
+"""
+import asyncio
+import random
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+from app.betfair.cache import MarketCache
+from app.betfair.stream import BetfairStream
+from app.betfair.timing_wheel import HierarchicalTimingWheel
+from app.betting_wager.evaluation_scheduler import EvaluationScheduler, evaluation_interval
+from app.betting_wager.scanner import BACKDUTCH, LAYDUTCH, LTD
+
+START = 1_700_000_000  # Start time of the scheduled markets (epoch seconds)
+
+def start_time(offset_seconds=0):
+    return datetime.fromtimestamp(START + offset_seconds, timezone.utc)
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestHierarchicalTimingWheel(unittest.TestCase):
+    """Test cases for HierarchicalTimingWheel."""
+
+    def test_timers_expire_on_their_tick(self):
+        wheel = HierarchicalTimingWheel(current=100, slots=(4, 4, 4))
+        deadlines = {"a": 101, "b": 105, "c": 117, "d": 163, "e": 400}  # "e" is beyond the wheel's range
+        for key, deadline in deadlines.items():
+            wheel.schedule(key, deadline)
+        fired = {}
+        for tick in range(101, 401):
+            for timer in wheel.advance(tick):
+                fired[timer.key] = tick
+        self.assertEqual(fired, deadlines)
+        self.assertEqual(len(wheel), 0)
+        self.assertGreater(wheel.cascaded, 0)
+
+    def test_matches_brute_force_with_jumps(self):
+        rng = random.Random(7)
+        wheel = HierarchicalTimingWheel(current=0, slots=(8, 8, 8))
+        deadlines = {key: rng.randint(0, 2000) for key in range(300)}
+        for key, deadline in deadlines.items():
+            wheel.schedule(key, deadline)
+        fired, tick = {}, 0
+        while tick < 2000:
+            tick += rng.randint(1, 40)
+            for timer in wheel.advance(tick):
+                self.assertLessEqual(timer.deadline, tick)
+                fired[timer.key] = timer.deadline
+        self.assertEqual(fired, deadlines)
+
+    def test_reschedule_and_cancel(self):
+        wheel = HierarchicalTimingWheel(current=0, slots=(10, 10))
+        wheel.schedule("a", 50)
+        wheel.schedule("b", 20)
+        wheel.schedule("a", 5)  # Moved earlier
+        self.assertTrue(wheel.cancel("b"))
+        self.assertFalse(wheel.cancel("b"))
+        self.assertEqual([timer.key for timer in wheel.advance(5)], ["a"])
+        self.assertEqual(wheel.advance(100), [])
+
+class TestEvaluationScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for EvaluationScheduler."""
+
+    def setUp(self):
+        self.now = START - 2000 * 60  # 2000 minutes before the off
+        self.evaluated = []
+        self.scheduler = EvaluationScheduler(evaluate=self.evaluated.append, clock=lambda: self.now)
+
+    def test_cadence_tightens_towards_the_off(self):
+        self.assertEqual(evaluation_interval(2), 5)
+        self.assertEqual(evaluation_interval(100), 60)
+        self.assertEqual(evaluation_interval(1000), 300)
+
+    async def test_wakes_when_crossing_strategy_windows(self):
+        self.scheduler.schedule("1.1", start_time())
+        # Nothing happens until the market enters the BackDutch window (1440 minutes)
+        self.assertEqual(self.scheduler.due(START - 1441 * 60), {})
+        self.assertEqual(self.scheduler.due(START - 1440 * 60), {"1.1": [BACKDUTCH]})
+        # Then every 5 minutes, until the LayDutch/LTD window opens at 180 minutes
+        self.assertEqual(self.scheduler.due(START - 1436 * 60), {})
+        self.assertEqual(self.scheduler.due(START - 1435 * 60), {"1.1": [BACKDUTCH]})
+        self.scheduler.due(START - 181 * 60)
+        self.assertEqual(self.scheduler.due(START - 180 * 60), {"1.1": [LAYDUTCH, LTD, BACKDUTCH]})
+        self.assertEqual(self.scheduler.wheel.get("1.1").deadline, START - 180 * 60 + 60)
+        # Close to the off, every 5 seconds; nothing after it
+        self.scheduler.due(START - 2 * 60)
+        self.assertEqual(self.scheduler.wheel.get("1.1").deadline, START - 2 * 60 + 5)
+        self.scheduler.due(START)
+        self.assertNotIn("1.1", self.scheduler.wheel)
+
+    async def test_reschedules_when_start_time_moves(self):
+        self.scheduler.schedule("1.1", start_time())
+        self.scheduler.schedule("1.1", start_time(3600))  # Delayed by an hour
+        self.assertEqual(self.scheduler.wheel.get("1.1").deadline, START + 3600 - 1440 * 60)
+        self.assertEqual(len(self.scheduler.wheel), 1)
+
+    async def test_follows_discovery_watchlist(self):
+        from app.betfair.discovery import MarketDiscovery, WatchedMarket
+        discovery = MarketDiscovery()
+        discovery.markets["1.1"] = WatchedMarket("1.1", start_time=start_time())
+        self.now = START - 1000 * 60  # Already inside the BackDutch window
+        self.scheduler.attach(discovery)
+        await self.scheduler.run_due(self.now + 299)
+        self.assertEqual(self.evaluated, [])
+        await self.scheduler.run_due(self.now + 300)
+        self.assertEqual(self.evaluated, [{"1.1": [BACKDUTCH]}])
+
+        await discovery._notify(1, ["1.1"])
+        self.assertNotIn("1.1", self.scheduler.wheel)
+        self.scheduler.detach(discovery)
+        self.assertEqual(discovery.listeners, [])
+
+    async def test_scan_keeps_candidates_for_active_strategies(self):
+        scheduler = EvaluationScheduler(clock=lambda: self.now)
+        scheduler.schedule("1.1", start_time())
+        self.now = START - 100 * 60
+        candidate = {"market_id": "1.1", "strategies": [LAYDUTCH, BACKDUTCH], "score": 0.1}
+        with patch("app.betting_wager.evaluation_scheduler.scan_markets", AsyncMock(return_value=[candidate])) as scan:
+            await scheduler.scan({"1.1": [BACKDUTCH]})
+        self.assertEqual(scan.await_args.args[1], {"1.1": 100})
+        self.assertEqual(scheduler.candidates["1.1"]["strategies"], [BACKDUTCH])
+
+    async def test_stream_bursts_are_conflated(self):
+        """A burst of stream updates to one market costs a single evaluation."""
+        cache = MarketCache()
+        stream = BetfairStream(cache=cache)
+        scheduler = EvaluationScheduler(clock=lambda: self.now, cache=cache, conflation_window=60)
+        scheduler.attach_stream(stream)
+        scheduler.running = True
+        self.now = START - 1000 * 60  # Inside the BackDutch window only
+        scheduler.schedule("1.1", start_time())
+        scheduler.schedule("1.2", start_time(3 * 86400))  # Outside every window
+
+        for market_id in ("1.1", "1.2"):
+            for price in range(10):
+                stream.handle_message({"op": "mcm", "clk": str(price), "mc": [{
+                    "id": market_id, "img": True, "tv": 1000.0,
+                    "marketDefinition": {"status": "OPEN", "runners": [{"id": 1, "status": "ACTIVE"}, {"id": 2, "status": "ACTIVE"}]},
+                    "rc": [{"id": 1, "atb": [[2.2, 100.0]], "atl": [[2.3, 100.0]]},
+                           {"id": 2, "atb": [[2.5 + price / 100, 100.0]], "atl": [[2.6, 100.0]]}],
+                }]})
+        await asyncio.sleep(0)
+
+        self.assertEqual(scheduler.stream_evaluations, 1)
+        self.assertEqual(scheduler.conflator.stats()["updates"], 10)  # 1.2 never reached the conflator
+        self.assertEqual(scheduler.candidates["1.1"]["strategies"], [BACKDUTCH])
+        self.assertNotIn("1.2", scheduler.candidates)
+        await scheduler.stop()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Tests for the TTL + LRU navigation cache.
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.betfair import utils
+from app.betfair.retry import RetryPolicy
+from app.betfair.ttl_cache import TTLCache
+
+# ------------------------------------------------
+#               Test Classes
+# ------------------------------------------------
+class TestTTLCache(unittest.TestCase):
+    """Test cases for TTLCache."""
+
+    def test_per_method_ttl(self):
+        cache = TTLCache(ttls={"listEvents": 60, "listMarketCatalogue": 0})
+        cache.set("listEvents", "k", {"result": [1]})
+        cache.set("listMarketCatalogue", "k", {"result": [2]})
+        self.assertEqual(cache.get("listEvents", "k"), {"result": [1]})
+        self.assertIsNone(cache.get("listMarketCatalogue", "k"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("m", "a", 1)
+        cache.set("m", "b", 2)
+        cache.get("m", "a")  # "b" becomes least recently used
+        cache.set("m", "c", 3)
+        self.assertIsNone(cache.get("m", "b"))
+        self.assertEqual((cache.get("m", "a"), cache.get("m", "c")), (1, 3))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_invalidation(self):
+        cache = TTLCache()
+        for method, key in (("listEvents", "a"), ("listEvents", "b"), ("listEventTypes", "a")):
+            cache.set(method, key, 1)
+        self.assertEqual(cache.invalidate("listEvents", "a"), 1)
+        self.assertEqual(cache.invalidate("listEvents"), 1)
+        self.assertEqual(cache.invalidate(), 1)
+        self.assertEqual(len(cache), 0)
+
+class TestCachedNavigation(unittest.IsolatedAsyncioTestCase):
+    """Navigation helpers hit the API once per TTL and never cache errors."""
+
+    async def test_list_events_cached(self):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"result": [{"event": {"id": "1"}}]}
+        client = MagicMock()
+
+        async def post(url, headers, json):
+            return response
+        client.post = MagicMock(side_effect=post)
+
+        with patch("app.betfair.utils.http_client", client), patch("app.betfair.utils.get_headers_async", return_value={}), \
+             patch("app.betfair.utils.navigation_cache", TTLCache()) as cache, \
+             patch("app.betfair.utils.retry_policy", RetryPolicy()):
+            await utils.list_events(7522)
+            await utils.list_events(7522)
+            self.assertEqual(client.post.call_count, 1)
+
+            response.json.return_value = {"error": {"code": -32099}}
+            await utils.list_events(1)
+            await utils.list_events(1)
+            self.assertEqual(client.post.call_count, 3)
+            self.assertEqual(cache.stats()["hits"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
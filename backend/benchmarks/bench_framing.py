@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for the stream CRLF framer.
+
+Replays a recorded Exchange Stream byte stream through `LineFramer` in
+socket-sized reads and reports messages and megabytes per second. Without a
+recording, a synthetic `mcm` stream is generated.
+
+Usage:
+    python benchmarks/bench_framing.py [recording.bin] [--chunk 8192] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.betfair.framing import LineFramer
+
+# ------------------------------------------------
+#               Replay Source
+# ------------------------------------------------
+class ReplaySocket:
+    """Serve a byte string through `recv_into` in fixed-size reads."""
+    def __init__(self, data: bytes, chunk_size: int):
+        self.data = memoryview(data)
+        self.chunk_size = chunk_size
+        self.offset = 0
+
+    def recv_into(self, buffer) -> int:
+        size = min(self.chunk_size, len(buffer), len(self.data) - self.offset)
+        buffer[:size] = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return size
+
+def synthetic_stream(message_count: int = 50000, markets: int = 200) -> bytes:
+    """Generate a plausible mix of mcm deltas and heartbeats."""
+    rng = random.Random(42)
+    lines = []
+    for i in range(message_count):
+        if i % 50 == 0:
+            message = {"op": "mcm", "id": 1, "clk": str(i), "pt": 1700000000000 + i, "ct": "HEARTBEAT"}
+        else:
+            message = {
+                "op": "mcm", "id": 1, "clk": str(i), "pt": 1700000000000 + i,
+                "mc": [{
+                    "id": f"1.{rng.randrange(markets)}",
+                    "rc": [{
+                        "id": rng.randrange(1, 20),
+                        "atb": [[round(rng.uniform(1.01, 20), 2), round(rng.uniform(0, 500), 2)]],
+                        "atl": [[round(rng.uniform(1.01, 20), 2), round(rng.uniform(0, 500), 2)]]
+                    }]
+                }]
+            }
+        lines.append(json.dumps(message))
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+# ------------------------------------------------
+#               Benchmark
+# ------------------------------------------------
+def run(data: bytes, chunk_size: int, parse: bool) -> tuple:
+    framer = LineFramer(chunk_size)
+    sock = ReplaySocket(data, chunk_size)
+    count = 0
+    start = time.perf_counter()
+    while framer.recv_into(sock):
+        for line in framer.lines():
+            if parse:
+                json.loads(line)
+            count += 1
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", nargs="?", help="Raw CRLF-delimited stream capture")
+    parser.add_argument("--chunk", type=int, default=8192, help="Bytes per simulated recv")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs")
+    args = parser.parse_args()
+
+    if args.recording:
+        with open(args.recording, "rb") as file:
+            data = file.read()
+    else:
+        data = synthetic_stream()
+    print(f"Replaying {len(data) / 1e6:.1f} MB in {args.chunk}-byte reads")
+
+    for parse in (False, True):
+        best = None
+        for _ in range(args.repeat):
+            count, elapsed = run(data, args.chunk, parse)
+            best = elapsed if best is None else min(best, elapsed)
+        label = "frame + json.loads" if parse else "frame only"
+        print(f"{label:>20}: {count} messages, {count / best:,.0f} msg/s, {len(data) / best / 1e6:,.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Market book parsing benchmark.
+
+Builds a synthetic `listMarketBook` response and measures the JSON payload
+size and per-market parse time at different best-offer depths, parsing into
+`MarketBookRecord` and formatting the strategies' market data.
+
+Usage:
+    python benchmarks/bench_market_book.py [--markets 500] [--runners 3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.betfair.records import parse_market_book
+from app.betfair.utils import format_market_data
+
+def synthetic_response(markets: int, runners: int, depth: int, traded: bool) -> bytes:
+    rng = random.Random(7)
+
+    def ladder(start, step):
+        return [{"price": round(start + step * i, 2), "size": round(rng.uniform(2, 500), 2)} for i in range(depth)]
+
+    result = []
+    for m in range(markets):
+        book_runners = []
+        for r in range(runners):
+            price = rng.uniform(1.5, 10)
+            ex = {"availableToBack": ladder(price, -0.02), "availableToLay": ladder(price + 0.02, 0.02)}
+            if traded:
+                ex["tradedVolume"] = ladder(price - 0.2, 0.02) * 5
+            book_runners.append({"selectionId": 1000 + r, "status": "ACTIVE", "lastPriceTraded": price,
+                                 "totalMatched": 1000.0, "ex": ex})
+        result.append({"marketId": f"1.{m}", "status": "OPEN", "totalMatched": 5000.0, "runners": book_runners})
+    return json.dumps({"jsonrpc": "2.0", "result": result, "id": 1}).encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=500)
+    parser.add_argument("--runners", type=int, default=3)
+    args = parser.parse_args()
+
+    for depth, traded in ((1, False), (3, False), (10, True)):
+        payload = synthetic_response(args.markets, args.runners, depth, traded)
+        started = time.perf_counter()
+        books = json.loads(payload)["result"]
+        decoded = time.perf_counter()
+        records = [parse_market_book(book) for book in books]
+        parsed = time.perf_counter()
+        for book in books:
+            format_market_data(book["marketId"], book)
+        formatted = time.perf_counter()
+        print(f"depth {depth:>2}{' +traded' if traded else '        '}: {len(payload) / args.markets / 1024:6.2f} KiB/market, "
+              f"json {(decoded - started) / len(records) * 1e6:6.1f} us, "
+              f"records {(parsed - decoded) / len(records) * 1e6:6.1f} us, "
+              f"market data {(formatted - parsed) / len(records) * 1e6:6.1f} us per market")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Replay benchmark for the stream message pipeline.
+
+Feeds a recorded stream journal (see `app.betfair.recorder.StreamRecorder`)
+through `BetfairStream.handle_message` and the market cache with no network,
+at maximum speed or a multiple of real time. Without a journal, a synthetic
+one is generated.
+
+Usage:
+    python benchmarks/bench_replay.py [journal.gz] [--speed 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.betfair.cache import MarketCache
+from app.betfair.recorder import StreamRecorder, StreamReplayer
+from app.betfair.stream import BetfairStream
+from bench_framing import synthetic_stream
+
+def build_journal(path: str):
+    """Write the synthetic stream as a journal, 1 ms apart."""
+    started = time.time()
+    with StreamRecorder(path) as recorder:
+        for i, line in enumerate(synthetic_stream().split(b"\r\n")):
+            if line:
+                recorder.record(line, received_at=started + i / 1000)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("journal", nargs="?", help="Journal written by StreamRecorder")
+    parser.add_argument("--speed", type=float, default=None, help="Multiple of real time (default: maximum speed)")
+    args = parser.parse_args()
+
+    journal = args.journal
+    if journal is None:
+        journal = os.path.join(tempfile.mkdtemp(), "synthetic.jsonl.gz")
+        build_journal(journal)
+
+    stream = BetfairStream(cache=MarketCache())
+    stats = StreamReplayer(journal, speed=args.speed).replay(stream)
+    print(f"Replayed {stats['messages']} messages ({stats['recorded_seconds']:.1f}s recorded) "
+          f"in {stats['elapsed_seconds']:.2f}s")
+    print(f"{stats['messages_per_second']:,.0f} msg/s, {stats['mean_handler_us']:.1f} us per message, "
+          f"{len(stream.market_cache)} markets cached")
+
+if __name__ == "__main__":
+    main()